@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ChatbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chatbot'
+
+    def ready(self):
+        # Drop cached chat context snapshots when the data behind them changes
+        from django.db.models.signals import post_delete, post_save
+        from core.transitions import transitioned
+        from .context import mechanic_changed, service_request_changed, service_request_transitioned, user_changed
+        post_save.connect(service_request_changed, sender='core.ServiceRequest', dispatch_uid='chat_context_sr_saved')
+        post_delete.connect(service_request_changed, sender='core.ServiceRequest', dispatch_uid='chat_context_sr_deleted')
+        transitioned.connect(service_request_transitioned, dispatch_uid='chat_context_sr_transitioned')
+        post_save.connect(mechanic_changed, sender='core.Mechanic', dispatch_uid='chat_context_mechanic_saved')
+        post_delete.connect(mechanic_changed, sender='core.Mechanic', dispatch_uid='chat_context_mechanic_deleted')
+        post_save.connect(user_changed, sender=settings.AUTH_USER_MODEL, dispatch_uid='chat_context_user_saved')
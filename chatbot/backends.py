@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core.clients import clients
+
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+]
+
+SYSTEM_INSTRUCTION = (
+    "You are 'ResQAssist', the virtual assistant for MechResQ, an on-road vehicle breakdown "
+    "assistance platform. You must follow ALL of these rules strictly:\n"
+    "1) Only answer questions related to MechResQ, vehicle breakdown assistance, this user's "
+    "service requests, mechanics, payments, or app features.\n"
+    "2) Do NOT suggest or mention external apps or sites (Google Maps, Apple Maps, Yelp, "
+    "other garages, other companies, generic internet search, etc.). Always answer inside "
+    "the MechResQ app context.\n"
+    "3) If the question is outside this scope (for example general internet questions, "
+    "unrelated personal topics, or other companies), reply exactly with: \n"
+    "- I cannot answer this question because it is outside MechResQ's services.\n"
+    "4) Do NOT greet, introduce yourself, or restate the question. No meta commentary.\n"
+    "5) When you can answer, keep responses VERY SHORT and CLEAR. Use at most 5 bullet points, "
+    "each under 20 words. No long paragraphs.\n"
+    "6) Structure answers as markdown bullets under clear headings when helpful. Prefer this shape:\n"
+    "- **For user**: ...\n"
+    "- **For mechanic**: ...\n"
+    "Add only the headings that make sense for the question and for this account's role.\n"
+    "7) Anchor your answers on the context about this signed-in account and its service requests.\n"
+    "8) Never invent data. If something is not in the context or clearly implied by the product, "
+    "say that you don't know.\n"
+)
+
+
+class GeminiBackend:
+    """Google Gemini via google-generativeai."""
+
+    def __init__(self):
+        self.genai = clients.get('genai')
+        self.model = self.genai.GenerativeModel(
+            model_name=settings.GEMINI_MODEL,
+            safety_settings=SAFETY_SETTINGS,
+            system_instruction=SYSTEM_INSTRUCTION,
+        )
+
+    def _generation_config(self):
+        return self.genai.types.GenerationConfig(
+            candidate_count=1,
+            stop_sequences=[],
+            temperature=0.15,
+            max_output_tokens=800,
+        )
+
+    @staticmethod
+    def _text(response):
+        raw_content = ""
+        if getattr(response, "candidates", None):
+            first_candidate = response.candidates[0]
+            if getattr(first_candidate, "content", None) and getattr(first_candidate.content, "parts", None):
+                for part in first_candidate.content.parts:
+                    if getattr(part, "text", None):
+                        raw_content += part.text
+        return raw_content
+
+    def generate(self, messages):
+        response = self.model.generate_content(
+            messages,
+            generation_config=self._generation_config(),
+            safety_settings=SAFETY_SETTINGS,
+        )
+        return (self._text(response) or "").strip()
+
+    async def stream(self, messages):
+        """Yield text fragments as Gemini produces them."""
+        response = await self.model.generate_content_async(
+            messages,
+            generation_config=self._generation_config(),
+            safety_settings=SAFETY_SETTINGS,
+            stream=True,
+        )
+        async for chunk in response:
+            text = self._text(chunk)
+            if text:
+                yield text
+
+
+class StubBackend:
+    """
+    Offline stand-in for the model, for tests and local development.
+
+    Answers deterministically from the last user message and counts calls so
+    callers can assert whether the model was reached at all.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        # Simulated per-token latency, so streaming and blocking paths can be compared
+        self.token_delay = getattr(settings, 'CHATBOT_STUB_TOKEN_DELAY', 0)
+
+    def _answer(self, messages):
+        self.calls += 1
+        question = messages[-1]["parts"][0] if messages else ""
+        return f"- **Answer**: stub response to \"{question}\""
+
+    def generate(self, messages):
+        answer = self._answer(messages)
+        time.sleep(self.token_delay * len(answer.split(" ")))
+        return answer
+
+    async def stream(self, messages):
+        words = self._answer(messages).split(" ")
+        for index, word in enumerate(words):
+            await asyncio.sleep(self.token_delay)
+            yield word if index == 0 else " " + word
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the configured chatbot backend (CHATBOT_BACKEND), built once per process."""
+    global _backend
+    if _backend is None:
+        _backend = import_string(getattr(settings, 'CHATBOT_BACKEND', 'chatbot.backends.GeminiBackend'))()
+    return _backend
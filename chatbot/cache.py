@@ -0,0 +1,96 @@
+from collections import OrderedDict
+import hashlib
+import re
+import threading
+import time
+
+from django.conf import settings
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_message(message):
+    """Fold case, punctuation and spacing so trivially different phrasings share a key."""
+    message = _PUNCTUATION_RE.sub(" ", (message or "").casefold())
+    return _WHITESPACE_RE.sub(" ", message).strip()
+
+
+def fingerprint(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL.
+
+    Entries expire `ttl_seconds` after they were stored; when the cache is
+    full the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(role, message, context_fingerprint):
+        return fingerprint(role, normalize_message(message), context_fingerprint)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=getattr(settings, "CHATBOT_CACHE_MAX_ENTRIES", 512),
+    ttl_seconds=getattr(settings, "CHATBOT_CACHE_TTL_SECONDS", 3600),
+)
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from core.models import ServiceRequest, Mechanic
+
+# Per-user snapshot of the account context sent ahead of every chat turn.
+# It is rebuilt only when the user, their mechanic profile or one of their
+# service requests changes, so a chat turn normally runs no context queries
+# and the prompt prefix stays byte-identical between turns, which lets the
+# model provider reuse its prompt cache.
+CONTEXT_CACHE_PREFIX = 'chatbot:context:'
+# Location pings save only these columns, none of which the context shows
+MECHANIC_LOCATION_FIELDS = frozenset({'latitude', 'longitude'})
+REQUEST_LOCATION_FIELDS = frozenset({'mechanic_latitude', 'mechanic_longitude', 'updated_at'})
+
+
+def context_cache_key(user_id):
+    return f'{CONTEXT_CACHE_PREFIX}{user_id}'
+
+
+def _build_context_message(user, role, mechanic_obj, recent_requests):
+    sr_summaries = [
+        f"#{sr.id} | status={sr.status} | vehicle={sr.vehicle_type} | issue={sr.issue_description[:80]}"
+        for sr in recent_requests
+    ]
+
+    context_lines = [
+        f"Current user role: {role}",
+        f"Username: {user.username}",
+        f"Full name: {user.get_full_name() or user.username}",
+    ]
+
+    if role == "mechanic" and mechanic_obj:
+        context_lines.append(
+            "Mechanic details: specialization={specialization}, experience_years={experience_years}, rating={rating}".format(
+                specialization=mechanic_obj.specialization,
+                experience_years=mechanic_obj.experience_years,
+                rating=mechanic_obj.rating,
+            )
+        )
+
+    if sr_summaries:
+        context_lines.append("Recent related service requests (max 5):")
+        context_lines.extend(f"- {line}" for line in sr_summaries)
+
+    return "Context about this signed-in account:\n" + "\n".join(context_lines)
+
+
+def build_account_context(user):
+    role = "mechanic" if getattr(user, "is_mechanic", False) else "user"
+
+    mechanic_obj = None
+    if role == "mechanic":
+        mechanic_obj = Mechanic.objects.filter(user=user).first()
+
+    if role == "mechanic":
+        recent_requests = ServiceRequest.objects.filter(
+            mechanic__user=user
+        ).order_by('-created_at', '-id')[:3]
+    else:
+        recent_requests = ServiceRequest.objects.filter(
+            user=user
+        ).order_by('-created_at', '-id')[:3]
+
+    return role, _build_context_message(user, role, mechanic_obj, recent_requests)
+
+
+def get_account_context(user):
+    """(role, context_message) for `user`, from the snapshot cache when possible."""
+    key = context_cache_key(user.pk)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_account_context(user)
+        cache.set(key, snapshot, getattr(settings, 'CHATBOT_CONTEXT_TTL_SECONDS', 600))
+    return snapshot
+
+
+def invalidate_account_context(*user_ids):
+    keys = [context_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+def _mechanic_user_id(mechanic_id):
+    if mechanic_id is None:
+        return None
+    return Mechanic.objects.filter(pk=mechanic_id).values_list('user_id', flat=True).first()
+
+
+def service_request_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= REQUEST_LOCATION_FIELDS:
+        return
+    invalidate_account_context(instance.user_id, _mechanic_user_id(instance.mechanic_id))
+
+
+def service_request_transitioned(sender, service_request_id, previous_mechanic_id=None, **kwargs):
+    # Transitions are conditional UPDATEs and send no post_save
+    row = ServiceRequest.objects.filter(pk=service_request_id).values_list('user_id', 'mechanic__user_id').first()
+    if row:
+        invalidate_account_context(*row, _mechanic_user_id(previous_mechanic_id))
+
+
+def mechanic_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= MECHANIC_LOCATION_FIELDS:
+        return
+    invalidate_account_context(instance.user_id)
+
+
+def user_changed(sender, instance, **kwargs):
+    invalidate_account_context(instance.pk)
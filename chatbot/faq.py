@@ -0,0 +1,105 @@
+import json
+import re
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from .cache import normalize_message
+
+DEFAULT_FAQ_PATH = Path(__file__).resolve().parent / 'data' / 'faq.json'
+DEFAULT_DIMENSIONS = 4096
+
+FAQEntry = namedtuple('FAQEntry', 'id questions answer')
+FAQMatch = namedtuple('FAQMatch', 'entry question score')
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _features(text):
+    """
+    Word unigrams and bigrams plus character trigrams of each word, so
+    rephrasings that share vocabulary and small typos still overlap.
+    """
+    words = _WORD_RE.findall(normalize_message(text))
+    features = [f"w:{word}" for word in words]
+    features.extend(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f"<{word}>"
+        features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def load_faq_entries(path=DEFAULT_FAQ_PATH):
+    with open(path, encoding='utf-8') as handle:
+        return [FAQEntry(item['id'], tuple(item['questions']), item['answer']) for item in json.load(handle)]
+
+
+class FAQIndex:
+    """
+    TF-IDF over hashed n-gram features for the FAQ questions.
+
+    Every paraphrase of every entry is one L2-normalised row of a dense
+    (questions x dimensions) matrix, so a lookup is one hashed query vector
+    and a single matrix-vector product.
+    """
+
+    def __init__(self, entries, dimensions=DEFAULT_DIMENSIONS):
+        self.entries = list(entries)
+        self.dimensions = dimensions
+        self._rows = [(entry, question) for entry in self.entries for question in entry.questions]
+
+        counts = np.zeros((len(self._rows), dimensions), dtype=np.float32)
+        for row, (_entry, question) in enumerate(self._rows):
+            for bucket in self._buckets(question):
+                counts[row, bucket] += 1
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self._idf = (np.log((1 + len(self._rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self._matrix = self._normalize(counts * self._idf)
+
+    def _buckets(self, text):
+        # crc32 rather than hash() so buckets are stable across processes
+        return [zlib.crc32(feature.encode('utf-8')) % self.dimensions for feature in _features(text)]
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1
+        return matrix / norms
+
+    def vectorize(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for bucket in self._buckets(text):
+            vector[bucket] += 1
+        return self._normalize(vector * self._idf)
+
+    def search(self, message):
+        """Best matching FAQ question for `message`, or None for an empty index or message."""
+        if not self._rows:
+            return None
+        vector = self.vectorize(message)
+        if not vector.any():
+            return None
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        entry, question = self._rows[best]
+        return FAQMatch(entry, question, float(scores[best]))
+
+    def answer(self, message, threshold):
+        match = self.search(message)
+        if match is None or match.score < threshold:
+            return None
+        return match
+
+
+@lru_cache(maxsize=1)
+def get_faq_index():
+    return FAQIndex(load_faq_entries(getattr(settings, 'CHATBOT_FAQ_PATH', DEFAULT_FAQ_PATH)))
+
+
+def faq_answer(message):
+    """FAQ match for `message` above CHATBOT_FAQ_THRESHOLD, or None to fall through to the model."""
+    return get_faq_index().answer(message, getattr(settings, 'CHATBOT_FAQ_THRESHOLD', 0.45))
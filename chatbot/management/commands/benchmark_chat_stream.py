@@ -0,0 +1,73 @@
+import asyncio
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+
+from chatbot import backends
+from chatbot.cache import response_cache
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare time-to-first-token of /chatbot/stream/ against the blocking "
+        "/chatbot/response/ endpoint through the ASGI handler, using the stub "
+        "backend with simulated per-token latency. Creates a throwaway user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5)
+        parser.add_argument('--token-delay', type=float, default=0.05, help="Seconds per generated token.")
+
+    async def _blocking(self, client, message):
+        started = time.perf_counter()
+        response = await client.post(
+            '/chatbot/response/', data=json.dumps({'message': message}), content_type='application/json',
+        )
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 200, response.content
+        return elapsed, elapsed
+
+    async def _streaming(self, client, message):
+        started = time.perf_counter()
+        response = await client.post(
+            '/chatbot/stream/', data=json.dumps({'message': message}), content_type='application/json',
+        )
+        first_token = None
+        async for chunk in response.streaming_content:
+            if first_token is None and b'event: token' in chunk:
+                first_token = time.perf_counter() - started
+        return first_token, time.perf_counter() - started
+
+    async def _run(self, client, count):
+        results = {'blocking': [], 'streaming': []}
+        for index in range(count):
+            # A fresh question each time so the response cache never answers
+            results['blocking'].append(await self._blocking(client, f'benchmark question {index} a'))
+            results['streaming'].append(await self._streaming(client, f'benchmark question {index} b'))
+        return results
+
+    def handle(self, *args, **options):
+        stub = backends.StubBackend()
+        stub.token_delay = options['token_delay']
+        previous_backend, backends._backend = backends._backend, stub
+        response_cache.clear()
+
+        user = User.objects.create(username=f'chat-bench-{uuid.uuid4().hex[:8]}')
+        client = AsyncClient()
+        client.force_login(user)
+        try:
+            results = asyncio.run(self._run(client, options['requests']))
+        finally:
+            backends._backend = previous_backend
+            user.delete()
+
+        for mode, samples in results.items():
+            first = sum(sample[0] for sample in samples) / len(samples)
+            total = sum(sample[1] for sample in samples) / len(samples)
+            self.stdout.write(
+                f"{mode:>9}: time to first token {first * 1000:7.1f} ms, full answer {total * 1000:7.1f} ms"
+            )
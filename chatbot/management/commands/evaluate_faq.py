@@ -0,0 +1,77 @@
+import json
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from chatbot.faq import get_faq_index
+
+DEFAULT_DATASET = Path(__file__).resolve().parents[2] / 'data' / 'faq_eval.json'
+
+
+class Command(BaseCommand):
+    help = (
+        "Evaluate the FAQ retrieval tier offline against a labelled question set "
+        "(question -> expected FAQ id, or null when the model should answer). "
+        "Reports hit rate, accuracy of the answers given and lookup latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dataset', default=str(DEFAULT_DATASET))
+        parser.add_argument('--threshold', type=float, default=None,
+                            help="Similarity threshold; defaults to CHATBOT_FAQ_THRESHOLD.")
+        parser.add_argument('--sweep', action='store_true', help="Report a range of thresholds.")
+        parser.add_argument('--verbose', action='store_true', help="List every misrouted question.")
+
+    def _evaluate(self, scored, threshold):
+        answered = [(item, match) for item, match in scored if match and match.score >= threshold]
+        correct = sum(1 for item, match in answered if match.entry.id == item['expected'])
+        in_scope = sum(1 for item, _match in scored if item['expected'])
+        wrongly_answered = sum(1 for item, _match in answered if not item['expected'])
+        return {
+            'hit_rate': len(answered) / len(scored),
+            'accuracy': correct / len(answered) if answered else 0.0,
+            'recall': correct / in_scope if in_scope else 0.0,
+            'out_of_scope_answered': wrongly_answered,
+            'answered': answered,
+        }
+
+    def _report(self, threshold, result):
+        self.stdout.write(
+            f"threshold {threshold:.2f}: hit rate {result['hit_rate']:.1%}, accuracy {result['accuracy']:.1%}, "
+            f"in-scope recall {result['recall']:.1%}, out-of-scope answered {result['out_of_scope_answered']}"
+        )
+
+    def handle(self, *args, **options):
+        with open(options['dataset'], encoding='utf-8') as handle:
+            dataset = json.load(handle)
+        index = get_faq_index()
+
+        started = time.perf_counter()
+        scored = [(item, index.search(item['question'])) for item in dataset]
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{len(dataset)} questions, {len(index.entries)} FAQ entries, "
+            f"{elapsed / len(dataset) * 1000:.3f} ms per lookup"
+        )
+
+        threshold = options['threshold']
+        if threshold is None:
+            threshold = getattr(settings, 'CHATBOT_FAQ_THRESHOLD', 0.45)
+
+        if options['sweep']:
+            for step in range(20, 75, 5):
+                self._report(step / 100, self._evaluate(scored, step / 100))
+            return
+
+        result = self._evaluate(scored, threshold)
+        self._report(threshold, result)
+        if options['verbose']:
+            answered = {id(item) for item, _match in result['answered']}
+            for item, match in scored:
+                routed = match.entry.id if id(item) in answered else None
+                if routed != item['expected']:
+                    self.stdout.write(
+                        f"  expected {item['expected']}, got {routed} ({match.score:.2f}): {item['question']}"
+                    )
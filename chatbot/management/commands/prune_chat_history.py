@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatbot.retention import prune_chat_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll chat turns beyond each user's most recent ones into their running "
+        "summary and delete them. Run periodically (e.g. from cron) or with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=None,
+                            help="Turns to keep per user; defaults to CHATBOT_HISTORY_KEEP_TURNS.")
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Seconds between runs; 0 runs once and exits.")
+
+    def handle(self, *args, **options):
+        while True:
+            users, turns = prune_chat_history(keep=options['keep'])
+            self.stdout.write(f"Summarized {turns} turn(s) for {users} user(s).")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
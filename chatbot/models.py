@@ -7,5 +7,23 @@ class ChatMessage(models.Model):
     response = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Recent turns for the prompt and cursor-paginated history
+            models.Index(fields=['user', '-timestamp', '-id'], name='chat_user_timestamp'),
+        ]
+
     def __str__(self):
         return f"Chat with {self.user.username} at {self.timestamp}"
+
+
+class ChatSummary(models.Model):
+    """Running summary of the turns pruned from a user's chat history."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chat_summary')
+    summary = models.TextField(blank=True, default='')
+    turns_summarized = models.PositiveIntegerField(default=0)
+    summarized_until = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Chat summary for {self.user.username} ({self.turns_summarized} turns)"
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import ChatMessage, ChatSummary
+
+DEFAULT_KEEP_TURNS = 20
+DEFAULT_SUMMARY_MAX_CHARS = 1500
+_QUESTION_CHARS = 120
+
+
+def keep_turns():
+    return getattr(settings, 'CHATBOT_HISTORY_KEEP_TURNS', DEFAULT_KEEP_TURNS)
+
+
+def _summary_line(chat):
+    question = " ".join(chat.message.split())
+    if len(question) > _QUESTION_CHARS:
+        question = question[:_QUESTION_CHARS - 1] + "…"
+    return f"- {chat.timestamp:%Y-%m-%d}: asked \"{question}\""
+
+
+def _merge_summary(previous, new_lines, max_chars):
+    # Oldest lines fall off first so the summary never outgrows max_chars
+    lines = [line for line in previous.splitlines() if line] + new_lines
+    while lines and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def summarize_user_history(user_id, keep=None, max_chars=None):
+    """
+    Roll every turn older than the user's `keep` most recent ones into their
+    ChatSummary row and delete those turns. Returns the number of turns rolled up.
+
+    The summary is extractive (dated one-line questions, newest last) so the
+    job needs no model call, and it is capped at `max_chars` so the prompt
+    context stays the same size however long the user has been chatting.
+    """
+    keep = keep_turns() if keep is None else keep
+    max_chars = max_chars or getattr(settings, 'CHATBOT_SUMMARY_MAX_CHARS', DEFAULT_SUMMARY_MAX_CHARS)
+
+    with transaction.atomic():
+        newest_kept = list(
+            ChatMessage.objects.filter(user_id=user_id).order_by('-timestamp', '-id').values_list('id', flat=True)[:keep]
+        )
+        old_turns = list(
+            ChatMessage.objects.filter(user_id=user_id).exclude(id__in=newest_kept).order_by('timestamp', 'id')
+        )
+        if not old_turns:
+            return 0
+
+        summary, _created = ChatSummary.objects.select_for_update().get_or_create(user_id=user_id)
+        summary.summary = _merge_summary(summary.summary, [_summary_line(chat) for chat in old_turns], max_chars)
+        summary.turns_summarized += len(old_turns)
+        summary.summarized_until = old_turns[-1].timestamp
+        summary.save()
+
+        ChatMessage.objects.filter(id__in=[chat.id for chat in old_turns]).delete()
+    return len(old_turns)
+
+
+def prune_chat_history(keep=None, max_chars=None):
+    """Summarize and prune every user holding more than `keep` turns. Returns (users, turns) processed."""
+    keep = keep_turns() if keep is None else keep
+    user_ids = (
+        ChatMessage.objects.values('user_id')
+        .annotate(turns=Count('id'))
+        .filter(turns__gt=keep)
+        .values_list('user_id', flat=True)
+    )
+    users = turns = 0
+    for user_id in list(user_ids):
+        rolled = summarize_user_history(user_id, keep=keep, max_chars=max_chars)
+        if rolled:
+            users += 1
+            turns += rolled
+    return users, turns
@@ -1,3 +1,58 @@
+import json
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from core import transitions
+from core.models import Mechanic, ServiceRequest, User
+
+from .context import context_cache_key, get_account_context
+
+
+class AccountContextCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.customer = User.objects.create(username='customer')
+        self.mechanic_user = User.objects.create(username='mechanic', is_mechanic=True)
+        self.mechanic = Mechanic.objects.create(
+            user=self.mechanic_user, specialization='General', experience_years=1, workshop_address='Test',
+            latitude=12.97, longitude=77.59,
+        )
+        self.request = ServiceRequest.objects.create(
+            user=self.customer, mechanic=self.mechanic, status='ACCEPTED', vehicle_type='CAR',
+            issue_description='Flat tyre', location='Test', latitude=12.97, longitude=77.59,
+        )
+
+    def assertCached(self, user, cached=True):
+        self.assertEqual(cache.get(context_cache_key(user.pk)) is not None, cached)
+
+    def test_location_ping_keeps_context(self):
+        self.client.force_login(self.mechanic_user)
+        get_account_context(self.mechanic_user)
+        get_account_context(self.customer)
+        response = self.client.post(
+            reverse('core:update_mechanic_location'), json.dumps({'latitude': 12.98, 'longitude': 77.6}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertCached(self.mechanic_user)
+        self.assertCached(self.customer)
+
+        self.mechanic.specialization = 'Electrical'
+        self.mechanic.save()
+        self.assertCached(self.mechanic_user, False)
+
+    def test_reassignment_drops_previous_mechanic_context(self):
+        ServiceRequest.objects.filter(pk=self.request.pk).update(status='PENDING')
+        other_user = User.objects.create(username='other', is_mechanic=True)
+        other = Mechanic.objects.create(
+            user=other_user, specialization='General', experience_years=1, workshop_address='Test',
+        )
+        for user in (self.customer, self.mechanic_user, other_user):
+            get_account_context(user)
 
-# Create your tests here.
+        self.assertTrue(transitions.assign(self.request.pk, other, reassign=True))
+        for user in (self.customer, self.mechanic_user, other_user):
+            self.assertCached(user, False)
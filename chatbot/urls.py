@@ -5,4 +5,7 @@ app_name = 'chatbot'
 
 urlpatterns = [
     path('response/', views.chatbot_response, name='chatbot_response'),
+    path('history/', views.chat_history, name='chat_history'),
+    path('stream/', views.chatbot_stream, name='chatbot_stream'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
 ]
@@ -1,73 +1,47 @@
+import json
+import logging
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.http import JsonResponse
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
-import json
-import google.generativeai as genai
-from .models import ChatMessage
-from core.models import ServiceRequest, Mechanic
-
-# Configure Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
-gemini_model = genai.GenerativeModel(
-    model_name=settings.GEMINI_MODEL,
-    safety_settings=[
-        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-    ],
-    system_instruction=(
-        "You are 'ResQAssist', the virtual assistant for MechResQ, an on-road vehicle breakdown "
-        "assistance platform. You must follow ALL of these rules strictly:\n"
-        "1) Only answer questions related to MechResQ, vehicle breakdown assistance, this user's "
-        "service requests, mechanics, payments, or app features.\n"
-        "2) Do NOT suggest or mention external apps or sites (Google Maps, Apple Maps, Yelp, "
-        "other garages, other companies, generic internet search, etc.). Always answer inside "
-        "the MechResQ app context.\n"
-        "3) If the question is outside this scope (for example general internet questions, "
-        "unrelated personal topics, or other companies), reply exactly with: \n"
-        "- I cannot answer this question because it is outside MechResQ's services.\n"
-        "4) Do NOT greet, introduce yourself, or restate the question. No meta commentary.\n"
-        "5) When you can answer, keep responses VERY SHORT and CLEAR. Use at most 5 bullet points, "
-        "each under 20 words. No long paragraphs.\n"
-        "6) Structure answers as markdown bullets under clear headings when helpful. Prefer this shape:\n"
-        "- **For user**: ...\n"
-        "- **For mechanic**: ...\n"
-        "Add only the headings that make sense for the question and for this account's role.\n"
-        "7) Anchor your answers on the context about this signed-in account and its service requests.\n"
-        "8) Never invent data. If something is not in the context or clearly implied by the product, "
-        "say that you don't know.\n"
-    )
-)
+from .models import ChatMessage, ChatSummary
+from .backends import get_backend
+from .cache import response_cache, fingerprint
+from .faq import faq_answer
+from .context import get_account_context
+from core.ratelimit import get_limiter, RateLimited
 
+logger = logging.getLogger(__name__)
 
-def _build_context_message(request, role, mechanic_obj, recent_requests):
-    sr_summaries = [
-        f"#{sr.id} | status={sr.status} | vehicle={sr.vehicle_type} | issue={sr.issue_description[:80]}"
-        for sr in recent_requests
-    ]
 
-    context_lines = [
-        f"Current user role: {role}",
-        f"Username: {request.user.username}",
-        f"Full name: {request.user.get_full_name() or request.user.username}",
+def _build_messages(user, context_message, user_message):
+    # Retrieve a small recent history for continuity (limit to last 4)
+    chat_history_qs = ChatMessage.objects.filter(
+        user=user
+    ).order_by('-timestamp')[:4]
+    chat_history = list(chat_history_qs)[::-1]  # chronological order
+
+    # Build messages for Gemini API
+    messages_for_gemini = [
+        {"role": "user", "parts": [context_message]},
     ]
 
-    if role == "mechanic" and mechanic_obj:
-        context_lines.append(
-            "Mechanic details: specialization={specialization}, experience_years={experience_years}, rating={rating}".format(
-                specialization=mechanic_obj.specialization,
-                experience_years=mechanic_obj.experience_years,
-                rating=mechanic_obj.rating,
-            )
-        )
+    # Older turns live on only as the bounded summary written by the retention job
+    summary = ChatSummary.objects.filter(user=user).values_list('summary', flat=True).first()
+    if summary:
+        messages_for_gemini.append({"role": "user", "parts": ["Earlier questions from this account:\n" + summary]})
 
-    if sr_summaries:
-        context_lines.append("Recent related service requests (max 5):")
-        context_lines.extend(f"- {line}" for line in sr_summaries)
+    for chat in chat_history:
+        messages_for_gemini.append({"role": "user", "parts": [chat.message]})
+        messages_for_gemini.append({"role": "model", "parts": [chat.response]})
 
-    return "Context about this signed-in account:\n" + "\n".join(context_lines)
+    messages_for_gemini.append({"role": "user", "parts": [user_message]})
+    return messages_for_gemini
 
 
 def _fallback_ai_message(user, user_message: str, detail: str | None = None):
@@ -91,6 +65,19 @@ def _fallback_ai_message(user, user_message: str, detail: str | None = None):
     )
 
 
+def _rate_limited_response(exc):
+    response = JsonResponse(
+        {
+            "error": "RATE_LIMITED",
+            "detail": f"Too many questions right now. Please try again in {exc.retry_after_seconds} seconds.",
+            "retry_after": exc.retry_after_seconds,
+        },
+        status=429,
+    )
+    response['Retry-After'] = str(exc.retry_after_seconds)
+    return response
+
+
 @csrf_exempt
 @login_required
 def chatbot_response(request):
@@ -104,70 +91,38 @@ def chatbot_response(request):
             if not user_message:
                 return JsonResponse({'error': 'No message provided'}, status=400)
 
-            role = "mechanic" if getattr(request.user, "is_mechanic", False) else "user"
-
-            mechanic_obj = None
-            if role == "mechanic":
-                mechanic_obj = Mechanic.objects.filter(user=request.user).first()
-
-            if role == "mechanic":
-                recent_requests = ServiceRequest.objects.filter(
-                    mechanic__user=request.user
-                ).order_by('-created_at')[:3]
-            else:
-                recent_requests = ServiceRequest.objects.filter(
-                    user=request.user
-                ).order_by('-created_at')[:3]
-
-            context_message = _build_context_message(request, role, mechanic_obj, recent_requests)
-
-            # Retrieve a small recent history for continuity (limit to last 4)
-            chat_history_qs = ChatMessage.objects.filter(
-                user=request.user
-            ).order_by('-timestamp')[:4]
-            chat_history = list(chat_history_qs)[::-1]  # chronological order
-
-            # Build messages for Gemini API
-            messages_for_gemini = [
-                {"role": "user", "parts": [context_message]},
-            ]
-
-            for chat in chat_history:
-                messages_for_gemini.append({"role": "user", "parts": [chat.message]})
-                messages_for_gemini.append({"role": "model", "parts": [chat.response]})
+            # Product questions with a curated answer never reach the model
+            faq_match = faq_answer(user_message)
+            if faq_match:
+                ChatMessage.objects.create(
+                    user=request.user,
+                    message=user_message,
+                    response=faq_match.entry.answer
+                )
+                return JsonResponse({'response': faq_match.entry.answer, 'cached': False, 'source': 'faq'})
 
-            messages_for_gemini.append({"role": "user", "parts": [user_message]})
+            role, context_message = get_account_context(request.user)
 
-            try:
-                response = gemini_model.generate_content(
-                    messages_for_gemini,
-                    generation_config=genai.types.GenerationConfig(
-                        candidate_count=1,
-                        stop_sequences=[],
-                        temperature=0.15,
-                        max_output_tokens=800,
-                    ),
-                    safety_settings=[
-                        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-                    ],
-                )
+            # FAQ-style questions repeat a lot; answers depend on the role, the
+            # question and the account context, not on earlier chat turns
+            cache_key = response_cache.make_key(role, user_message, fingerprint(context_message))
+            ai_response = response_cache.get(cache_key)
+            cached = ai_response is not None
 
-                raw_content = ""
-                if getattr(response, "candidates", None):
-                    first_candidate = response.candidates[0]
-                    if getattr(first_candidate, "content", None) and getattr(first_candidate.content, "parts", None):
-                        for part in first_candidate.content.parts:
-                            if getattr(part, "text", None):
-                                raw_content += part.text
+            if not cached:
+                messages_for_gemini = _build_messages(request.user, context_message, user_message)
 
-                ai_response = (raw_content or "").strip()
+                try:
+                    with get_limiter('gemini').limit(request.user.pk):
+                        ai_response = get_backend().generate(messages_for_gemini)
+                except RateLimited as e:
+                    return _rate_limited_response(e)
+                except Exception as e:
+                    detail = f"Gemini API exception: {str(e)}"
+                    return _fallback_ai_message(request.user, user_message, detail=detail)
 
-            except Exception as e:
-                detail = f"Gemini API exception: {str(e)}"
-                return _fallback_ai_message(request.user, user_message, detail=detail)
+                if ai_response:
+                    response_cache.set(cache_key, ai_response)
 
             # Store exactly what Gemini said
             ChatMessage.objects.create(
@@ -176,7 +131,7 @@ def chatbot_response(request):
                 response=ai_response
             )
 
-            return JsonResponse({'response': ai_response})
+            return JsonResponse({'response': ai_response, 'cached': cached, 'source': 'cache' if cached else 'model'})
 
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
@@ -186,17 +141,145 @@ def chatbot_response(request):
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
 
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def chatbot_stream(request):
+    """
+    Streaming variant of chatbot_response for ASGI deployments.
+
+    Relays the answer as server-sent events while the model is still
+    generating: `token` events carry text fragments, a final `done` event
+    reports where the answer came from (faq, cache or model), and `error`
+    replaces `done` when the model fails or its concurrency limit is full.
+    Under ASGI a slow model call only holds a coroutine, not a worker thread.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return JsonResponse({'error': 'User not authenticated'}, status=401)
+
+    try:
+        user_message = json.loads(request.body).get('message')
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    if not user_message:
+        return JsonResponse({'error': 'No message provided'}, status=400)
+
+    user = request.user
+    # Product questions with a curated answer never reach the model
+    faq_match = faq_answer(user_message)
+    cache_key = cached_response = messages_for_gemini = None
+    if faq_match:
+        source = 'faq'
+    else:
+        role, context_message = await sync_to_async(get_account_context)(user)
+        cache_key = response_cache.make_key(role, user_message, fingerprint(context_message))
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            source = 'cache'
+        else:
+            source = 'model'
+            messages_for_gemini = await sync_to_async(_build_messages)(user, context_message, user_message)
+
+    async def events():
+        if source != 'model':
+            ai_response = faq_match.entry.answer if faq_match else cached_response
+            yield _sse('token', {'text': ai_response})
+        else:
+            # Taken once the stream starts, so a client that leaves before the
+            # first byte never holds a slot
+            try:
+                lease_id = await sync_to_async(get_limiter('gemini').acquire)(user.pk)
+            except RateLimited as e:
+                yield _sse('error', {
+                    'error': 'RATE_LIMITED',
+                    'detail': f"Too many questions right now. Please try again in {e.retry_after_seconds} seconds.",
+                    'retry_after': e.retry_after_seconds,
+                })
+                return
+            parts = []
+            try:
+                async for token in get_backend().stream(messages_for_gemini):
+                    parts.append(token)
+                    yield _sse('token', {'text': token})
+            except Exception:
+                logger.exception("Chatbot fallback triggered: Gemini streaming failed")
+                yield _sse('error', {
+                    'error': 'GEMINI_UNAVAILABLE',
+                    'detail': 'AI service temporarily unavailable. Please try again.',
+                })
+                return
+            finally:
+                await sync_to_async(get_limiter('gemini').release)(lease_id)
+            ai_response = "".join(parts).strip()
+            if ai_response:
+                response_cache.set(cache_key, ai_response)
+
+        await sync_to_async(ChatMessage.objects.create)(
+            user=user,
+            message=user_message,
+            response=ai_response
+        )
+        yield _sse('done', {'cached': source == 'cache', 'source': source})
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+HISTORY_PAGE_SIZE = 10
+HISTORY_MAX_PAGE_SIZE = 25
+_HISTORY_CURSOR_SALT = 'chatbot.history'
+
+
 @login_required
 def chat_history(request):
-    limit = int(request.GET.get('limit', 10))
-    limit = max(1, min(limit, 25))
-    chats = ChatMessage.objects.filter(user=request.user).order_by('-timestamp')[:limit]
+    """
+    Page through the user's chat turns, newest page first, oldest turn first
+    within a page. Pass `cursor` from the previous page to load older turns.
+    """
+    try:
+        limit = int(request.GET.get('limit', HISTORY_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+
+    chats = ChatMessage.objects.filter(user=request.user)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            timestamp, chat_id = signing.loads(cursor, salt=_HISTORY_CURSOR_SALT)
+            timestamp = parse_datetime(timestamp)
+        except (signing.BadSignature, TypeError, ValueError):
+            timestamp = None
+        if timestamp is None:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+        chats = chats.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=chat_id))
+
+    page = list(chats.order_by('-timestamp', '-id')[:limit + 1])
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        next_cursor = signing.dumps([last.timestamp.isoformat(), last.id], salt=_HISTORY_CURSOR_SALT)
+
     history = [
         {
             'message': chat.message,
             'response': chat.response,
             'timestamp': chat.timestamp.isoformat()
         }
-        for chat in reversed(list(chats))
+        for chat in reversed(page)
     ]
-    return JsonResponse({'history': history})
+    return JsonResponse({'history': history, 'next_cursor': next_cursor})
+
+
+@login_required
+def cache_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return JsonResponse(response_cache.stats())
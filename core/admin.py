@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Mechanic, ServiceRequest, Review, Payment, Vehicle, Notification
+from .models import User, Mechanic, ServiceRequest, Review, Payment, Vehicle, Notification, EmergencyRequest
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
@@ -67,6 +67,12 @@ class VehicleAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['recipient', 'notification_type', 'title', 'read', 'created_at']
-    list_filter = ['notification_type', 'read', 'created_at']
-    search_fields = ['recipient__username', 'title', 'message']
\ No newline at end of file
+    list_display = ['recipient', 'notification_type', 'display_title', 'read', 'created_at']
+    list_filter = ['notification_type', 'template_key', 'read', 'created_at']
+    search_fields = ['recipient__username', 'template_key', 'title', 'message']
+
+@admin.register(EmergencyRequest)
+class EmergencyRequestAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user', 'mechanic', 'status', 'ring', 'first_offer_latency_ms', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['user__username', 'mechanic__user__username']
@@ -11,3 +11,31 @@ class CoreConfig(AppConfig):
             import core.templatetags.service_request_filters
         except ImportError:
             pass
+
+        # Compile the issue complexity matcher once per process
+        from .issue_matcher import get_issue_matcher
+        get_issue_matcher()
+
+        # Keep the emergency dispatcher's mechanic index in sync with saves
+        from django.db.models.signals import post_delete, post_save
+        from .emergency import mechanic_deleted, mechanic_saved
+        post_save.connect(mechanic_saved, sender='core.Mechanic', dispatch_uid='emergency_mechanic_saved')
+        post_delete.connect(mechanic_deleted, sender='core.Mechanic', dispatch_uid='emergency_mechanic_deleted')
+
+        # Queue a push for every notification whose recipient has a device token
+        from .push import notification_created
+        post_save.connect(notification_created, sender='core.Notification', dispatch_uid='push_notification_created')
+
+        # WAL mode for local SQLite databases
+        from django.db.backends.signals import connection_created
+        from .db.sqlite import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='core_configure_sqlite')
+
+        # Drop cached mechanic profiles when the mechanic, their reviews or the
+        # names shown on them change
+        from .profiles import mechanic_changed, review_changed, user_changed
+        post_save.connect(mechanic_changed, sender='core.Mechanic', dispatch_uid='profile_mechanic_saved')
+        post_delete.connect(mechanic_changed, sender='core.Mechanic', dispatch_uid='profile_mechanic_deleted')
+        post_save.connect(review_changed, sender='core.Review', dispatch_uid='profile_review_saved')
+        post_delete.connect(review_changed, sender='core.Review', dispatch_uid='profile_review_deleted')
+        post_save.connect(user_changed, sender='core.User', dispatch_uid='profile_user_saved')
@@ -0,0 +1,97 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Cache-aside helpers on top of Django's cache framework (CACHES, from
+# CACHE_URL). Each CacheAside caches one kind of value, e.g. the mechanic
+# details payload, built by one function from a scope id:
+#
+#   mechanic_details_cache = CacheAside('mechanic-details', build_details, ttl=300)
+#   data = mechanic_details_cache.get(mechanic_id)
+#   mechanic_details_cache.invalidate(mechanic_id)   # after a change
+#
+# Keys carry a per-scope version ("mechanic-details:42:v<version>"), so
+# invalidation is one version bump that orphans every entry for the scope
+# at once; orphans simply age out. A missing version is recreated from the
+# clock, so an evicted version key can never bring back older entries.
+
+_MISSING = object()
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class CacheAside:
+    def __init__(self, namespace, build, ttl=None, alias='default'):
+        self.namespace = namespace
+        self.build = build
+        self.ttl = ttl if ttl is not None else getattr(settings, 'CACHE_DEFAULT_TTL_SECONDS', 300)
+        self.alias = alias
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        with _registry_lock:
+            _registry[namespace] = self
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _version_key(self, scope):
+        return f'{self.namespace}:{scope}:version'
+
+    def _version(self, scope):
+        version = self.cache.get(self._version_key(scope))
+        if version is None:
+            self.cache.add(self._version_key(scope), time.time_ns(), timeout=None)
+            version = self.cache.get(self._version_key(scope))
+        return version
+
+    def key(self, scope):
+        return f'{self.namespace}:{scope}:v{self._version(scope)}'
+
+    def get(self, scope):
+        """The cached value for `scope`, building and storing it on a miss."""
+        key = self.key(scope)
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count('hits')
+            return value
+        self._count('misses')
+        value = self.build(scope)
+        self.cache.set(key, value, self.ttl)
+        return value
+
+    def invalidate(self, *scopes):
+        for scope in scopes:
+            if scope is None:
+                continue
+            try:
+                self.cache.incr(self._version_key(scope))
+            except ValueError:
+                # No version stored yet, so nothing cached under an older one either
+                self.cache.add(self._version_key(scope), time.time_ns(), timeout=None)
+            self._count('invalidations')
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
+
+
+def cache_stats():
+    """Per-namespace hit/miss counters of this process."""
+    with _registry_lock:
+        helpers = list(_registry.values())
+    return {helper.namespace: helper.stats() for helper in helpers}
@@ -0,0 +1,78 @@
+import threading
+
+from django.conf import settings
+
+# Lazy registry for external SDK clients. Importing google-generativeai,
+# googlemaps, geopy, xhtml2pdf or firebase-admin costs hundreds of
+# milliseconds each, so nothing here imports them at module level: each
+# factory imports its SDK and builds the client the first time `get` asks
+# for it, and the result is shared for the rest of the process.
+
+
+class ClientRegistry:
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def factory(self, name):
+        """Decorator registering `func` as the builder for client `name`."""
+        def decorator(func):
+            self._factories[name] = func
+            return func
+        return decorator
+
+    def get(self, name):
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def is_loaded(self, name):
+        return name in self._instances
+
+    def reset(self, name=None):
+        """Drop built clients (all of them, or just `name`) so the next `get` rebuilds them."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+
+clients = ClientRegistry()
+
+
+@clients.factory('genai')
+def _genai():
+    import google.generativeai as genai
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai
+
+
+@clients.factory('googlemaps')
+def _googlemaps():
+    import googlemaps
+    return googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+
+
+@clients.factory('geocoder')
+def _geocoder():
+    from geopy.geocoders import Nominatim
+    return Nominatim(user_agent="mechresq-app")
+
+
+@clients.factory('pdf')
+def _pdf():
+    from xhtml2pdf import pisa
+    return pisa
+
+
+@clients.factory('firebase')
+def _firebase():
+    from .firebase_admin_init import initialize_firebase
+    return initialize_firebase()
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from django.db import DatabaseError
+from django.db.backends.postgresql import base
+
+# PostgreSQL backend with an in-process connection pool. Django closes a
+# connection at the end of each request (or once CONN_MAX_AGE runs out);
+# here "closing" hands it back to a per-database pool instead, so requests
+# and short-lived worker threads reuse open server connections rather than
+# paying a TCP + auth handshake each time. The pool also caps how many
+# connections one process opens. Options (in DATABASES OPTIONS):
+#
+#   pool_max_size   most connections open at once (default 10)
+#   pool_timeout    seconds to wait for a free connection (default 10)
+#   pool_max_idle   close connections idle longer than this (default 300)
+#   pool_check_idle ping connections idle longer than this before reuse,
+#                   when CONN_HEALTH_CHECKS is on (default 5)
+
+POOL_OPTIONS = {'pool_max_size': 10, 'pool_timeout': 10.0, 'pool_max_idle': 300.0, 'pool_check_idle': 5.0}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(DatabaseError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, max_size, timeout, max_idle, check_idle, health_checks):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_idle = check_idle
+        self.health_checks = health_checks
+        self._idle = []  # (connection, returned_at), most recently returned last
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def getconn(self, connect):
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                while self._idle:
+                    connection, returned_at = self._idle.pop()
+                    idle_for = time.monotonic() - returned_at
+                    if connection.closed or idle_for > self.max_idle:
+                        self._discard(connection)
+                        continue
+                    if self.health_checks and idle_for > self.check_idle and not self._is_usable(connection):
+                        self._discard(connection)
+                        continue
+                    return connection
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(
+                        f"No database connection free within {self.timeout}s (pool_max_size={self.max_size})"
+                    )
+                self._condition.wait(remaining)
+        try:
+            return connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def putconn(self, connection):
+        reusable = not connection.closed
+        if reusable and connection.info.transaction_status != base.Database.extensions.TRANSACTION_STATUS_IDLE:
+            # Never hand out a connection with a transaction left open
+            try:
+                connection.rollback()
+            except base.Database.Error:
+                reusable = False
+        with self._condition:
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+            self._condition.notify()
+
+    def _discard(self, connection):
+        self._size -= 1
+        try:
+            connection.close()
+        except base.Database.Error:
+            pass
+
+    @staticmethod
+    def _is_usable(connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.info.transaction_status != base.Database.extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except base.Database.Error:
+            return False
+        return True
+
+    def stats(self):
+        with self._condition:
+            return {'open': self._size, 'idle': len(self._idle), 'max_size': self.max_size}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        # Pool settings live in OPTIONS but must not reach psycopg2.connect()
+        conn_params = super().get_connection_params()
+        for option in POOL_OPTIONS:
+            conn_params.pop(option, None)
+        return conn_params
+
+    @property
+    def pool(self):
+        with _pools_lock:
+            if self.alias not in _pools:
+                options = {**POOL_OPTIONS, **{
+                    key: value for key, value in self.settings_dict['OPTIONS'].items() if key in POOL_OPTIONS
+                }}
+                _pools[self.alias] = ConnectionPool(
+                    max_size=options['pool_max_size'], timeout=options['pool_timeout'],
+                    max_idle=options['pool_max_idle'], check_idle=options['pool_check_idle'],
+                    health_checks=self.settings_dict['CONN_HEALTH_CHECKS'],
+                )
+            return _pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        return self.pool.getconn(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
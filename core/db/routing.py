@@ -0,0 +1,130 @@
+import contextvars
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+# Read replica routing. Views decorated with @use_replica read app data from
+# the "replica" alias, unless
+#
+# - the client wrote something in the last REPLICA_PIN_SECONDS (a short
+#   signed cookie set by ReplicaPinMiddleware), so it sees its own writes;
+# - the replica lags more than REPLICA_MAX_LAG_SECONDS, judged from the
+#   heartbeat row the replica_heartbeat command keeps writing on the primary
+#   (no heartbeat on the replica counts as lagging);
+# - no replica is configured.
+#
+# Everything else, and every write, goes to the primary. Sessions, auth and
+# other contrib tables always stay on the primary.
+
+REPLICA = 'replica'
+PIN_COOKIE = 'replica_pin'
+PIN_SALT = 'core.db.routing.pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+REPLICATED_APPS = {'core', 'chatbot'}
+
+_read_alias = contextvars.ContextVar('read_alias', default=None)
+_lag_lock = threading.Lock()
+_lag_state = {'checked_at': 0.0, 'lag': None}
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def replica_lag():
+    """Seconds the replica is behind the primary (None if unknown), re-measured at most once a second."""
+    now = time.monotonic()
+    with _lag_lock:
+        if now - _lag_state['checked_at'] < getattr(settings, 'REPLICA_LAG_CHECK_SECONDS', 1.0):
+            return _lag_state['lag']
+        _lag_state['checked_at'] = now
+    from core.models import ReplicationHeartbeat
+
+    try:
+        beat_at = ReplicationHeartbeat.objects.using(REPLICA).values_list('beat_at', flat=True).first()
+    except DatabaseError:
+        beat_at = None
+        connections[REPLICA].close()
+    lag = (timezone.now() - beat_at).total_seconds() if beat_at else None
+    with _lag_lock:
+        _lag_state['lag'] = lag
+    return lag
+
+
+def write_heartbeat():
+    from core.models import ReplicationHeartbeat
+
+    ReplicationHeartbeat.objects.update_or_create(pk=1, defaults={'beat_at': timezone.now()})
+
+
+def reset_lag_cache():
+    with _lag_lock:
+        _lag_state.update(checked_at=0.0, lag=None)
+
+
+def is_pinned(request):
+    try:
+        signing.loads(request.COOKIES[PIN_COOKIE], salt=PIN_SALT, max_age=settings.REPLICA_PIN_SECONDS)
+    except (KeyError, signing.BadSignature):
+        return False
+    return True
+
+
+def choose_read_alias(request):
+    if not replica_configured() or request.method not in SAFE_METHODS or is_pinned(request):
+        return 'default'
+    lag = replica_lag()
+    if lag is None or lag > settings.REPLICA_MAX_LAG_SECONDS:
+        return 'default'
+    return REPLICA
+
+
+def use_replica(view):
+    """Serve this read-only view from the replica when it is safe to."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _read_alias.set(choose_read_alias(request))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """After a successful write request, pin the client's reads to the primary for a few seconds."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE, signing.dumps(1, salt=PIN_SALT), max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in REPLICATED_APPS:
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives schema changes through replication
+        return db != REPLICA
@@ -0,0 +1,14 @@
+# Local SQLite tuning. In rollback-journal mode every writer locks the whole
+# file and readers block behind it; WAL lets readers proceed during a write,
+# and synchronous=NORMAL is safe under WAL while skipping an fsync per commit.
+# Writers still serialize, so the busy timeout (OPTIONS["timeout"]) makes
+# them queue instead of failing with "database is locked".
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: switch new SQLite connections to WAL."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
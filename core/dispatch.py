@@ -0,0 +1,292 @@
+import re
+from collections import namedtuple
+from math import floor
+
+from django.conf import settings
+from django.db import transaction
+
+from .geo import GridIndex, haversine_km
+
+DispatchRequest = namedtuple('DispatchRequest', 'id latitude longitude vehicle_type created_at')
+DispatchMechanic = namedtuple('DispatchMechanic', 'id latitude longitude specialization')
+Assignment = namedtuple('Assignment', 'request_id mechanic_id distance_km')
+
+DEFAULT_MAX_RADIUS_KM = 50
+DEFAULT_REGION_DEGREES = 1.0
+DEFAULT_MAX_BATCH = 150
+
+# Cost given to pairs that must not be matched (out of range or wrong
+# specialization). It dominates any real distance so the solver first
+# maximises the number of feasible matches and then minimises distance.
+INFEASIBLE_COST = 1e7
+
+# Words in a mechanic's free-text specialization that tie them to a vehicle
+# type. A specialization that mentions none of these is treated as general.
+VEHICLE_KEYWORDS = {
+    'CAR': ('car', 'four wheeler', '4 wheeler', '4-wheeler', 'suv', 'sedan', 'hatchback', 'auto'),
+    'MOTORCYCLE': ('bike', 'motorcycle', 'motorbike', 'two wheeler', '2 wheeler', '2-wheeler', 'scooter'),
+    'TRUCK': ('truck', 'lorry', 'heavy', 'commercial', 'bus', 'tractor'),
+}
+GENERAL_KEYWORDS = ('general', 'all vehicles', 'all types', 'any vehicle', 'multi')
+
+
+def _keyword_re(keywords):
+    # Whole words only ('bus' must not match "business"), plurals allowed
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, keywords)) + r')(?:s|es)?\b')
+
+
+_GENERAL_RE = _keyword_re(GENERAL_KEYWORDS)
+_VEHICLE_RES = {kind: _keyword_re(keywords) for kind, keywords in VEHICLE_KEYWORDS.items()}
+
+
+def can_service(specialization, vehicle_type):
+    specialization = (specialization or '').lower()
+    if _GENERAL_RE.search(specialization):
+        return True
+    mentioned = [kind for kind, pattern in _VEHICLE_RES.items() if pattern.search(specialization)]
+    if not mentioned:
+        return True
+    return (vehicle_type or '').upper() in mentioned
+
+
+def distance_cost(request, mechanic):
+    return haversine_km(request.latitude, request.longitude, mechanic.latitude, mechanic.longitude)
+
+
+def solve_assignment(cost):
+    """
+    Minimum-cost bipartite matching (Hungarian algorithm, O(n^2 * m)).
+
+    `cost` is a list of n rows with m columns and n <= m. Returns a dict mapping
+    each row index to its column. Only strict improvements replace a candidate,
+    so equal-cost ties always resolve to the lowest column index and the result
+    is deterministic for a given input order.
+    """
+    n = len(cost)
+    if not n:
+        return {}
+    m = len(cost[0])
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = cost[i0 - 1]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                current = row[j - 1] - u[i0] - v[j]
+                if current < minv[j]:
+                    minv[j] = current
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    return {owner[j] - 1: j - 1 for j in range(1, m + 1) if owner[j]}
+
+
+def _solve_batch(requests, mechanics, max_radius_km, cost_fn):
+    cost = []
+    for request in requests:
+        row = []
+        for mechanic in mechanics:
+            value = INFEASIBLE_COST
+            if can_service(mechanic.specialization, request.vehicle_type):
+                distance = haversine_km(request.latitude, request.longitude, mechanic.latitude, mechanic.longitude)
+                if distance <= max_radius_km:
+                    value = cost_fn(request, mechanic)
+            row.append(value)
+        cost.append(row)
+
+    if len(requests) > len(mechanics):
+        # The solver wants rows <= columns, so solve mechanics -> requests
+        pairs = solve_assignment([list(column) for column in zip(*cost)])
+        pairs = {request_index: mechanic_index for mechanic_index, request_index in pairs.items()}
+    else:
+        pairs = solve_assignment(cost)
+
+    assignments = []
+    for request_index, mechanic_index in sorted(pairs.items()):
+        if cost[request_index][mechanic_index] >= INFEASIBLE_COST:
+            continue
+        request = requests[request_index]
+        mechanic = mechanics[mechanic_index]
+        distance = haversine_km(request.latitude, request.longitude, mechanic.latitude, mechanic.longitude)
+        assignments.append(Assignment(request.id, mechanic.id, round(distance, 2)))
+    return assignments
+
+
+def plan_assignments(requests, mechanics, max_radius_km=None, region_degrees=None, max_batch=None, cost_fn=None):
+    """
+    Plan a batch of request -> mechanic assignments minimising total cost.
+
+    Requests are grouped into lat/lng regions so each solve stays small. Regions
+    are processed in a fixed order and requests inside a region oldest first;
+    mechanics already used by an earlier region are not offered again. Every
+    ordering is keyed on (created_at, id) or id, so the same input always
+    produces the same plan. `cost_fn(request, mechanic)` defaults to distance
+    in kilometres; pass an ETA estimate to optimise travel time instead.
+    """
+    max_radius_km = max_radius_km or getattr(settings, 'DISPATCH_MAX_RADIUS_KM', DEFAULT_MAX_RADIUS_KM)
+    region_degrees = region_degrees or getattr(settings, 'DISPATCH_REGION_DEGREES', DEFAULT_REGION_DEGREES)
+    max_batch = max_batch or getattr(settings, 'DISPATCH_MAX_BATCH', DEFAULT_MAX_BATCH)
+    cost_fn = cost_fn or distance_cost
+
+    index = GridIndex(cell_degrees=region_degrees / 4)
+    mechanics_by_id = {}
+    for mechanic in sorted(mechanics, key=lambda m: m.id):
+        mechanics_by_id[mechanic.id] = mechanic
+        index.insert(mechanic.id, mechanic.latitude, mechanic.longitude)
+
+    regions = {}
+    for request in sorted(requests, key=lambda r: (r.created_at, r.id)):
+        region = (floor(request.latitude / region_degrees), floor(request.longitude / region_degrees))
+        regions.setdefault(region, []).append(request)
+
+    assignments = []
+    for region in sorted(regions):
+        region_requests = regions[region]
+        for start in range(0, len(region_requests), max_batch):
+            batch = region_requests[start:start + max_batch]
+            candidate_ids = set()
+            for request in batch:
+                candidate_ids.update(
+                    key for _, key in index.within(request.latitude, request.longitude, max_radius_km)
+                )
+            if not candidate_ids:
+                continue
+            candidates = [mechanics_by_id[key] for key in sorted(candidate_ids)]
+            for assignment in _solve_batch(batch, candidates, max_radius_km, cost_fn):
+                index.remove(assignment.mechanic_id)
+                assignments.append(assignment)
+    return assignments
+
+
+def greedy_assignments(requests, mechanics, max_radius_km=None):
+    """Nearest-free-mechanic baseline, oldest request first. Used by the simulator."""
+    max_radius_km = max_radius_km or getattr(settings, 'DISPATCH_MAX_RADIUS_KM', DEFAULT_MAX_RADIUS_KM)
+    index = GridIndex(cell_degrees=0.25)
+    mechanics_by_id = {}
+    for mechanic in mechanics:
+        mechanics_by_id[mechanic.id] = mechanic
+        index.insert(mechanic.id, mechanic.latitude, mechanic.longitude)
+
+    assignments = []
+    for request in sorted(requests, key=lambda r: (r.created_at, r.id)):
+        for distance, key in index.within(request.latitude, request.longitude, max_radius_km):
+            if can_service(mechanics_by_id[key].specialization, request.vehicle_type):
+                index.remove(key)
+                assignments.append(Assignment(request.id, key, round(distance, 2)))
+                break
+    return assignments
+
+
+def load_dispatch_inputs(region=None):
+    """
+    Snapshot the unassigned PENDING requests and free mechanics.
+
+    `region` is an optional (min_lat, max_lat, min_lng, max_lng) box. A mechanic
+    is free when marked available, has coordinates and holds no open job or
+    outstanding offer.
+    """
+    from .models import Mechanic, ServiceRequest
+
+    request_qs = ServiceRequest.objects.filter(
+        status='PENDING', mechanic__isnull=True,
+        latitude__isnull=False, longitude__isnull=False,
+    )
+    mechanic_qs = Mechanic.objects.filter(
+        available=True, latitude__isnull=False, longitude__isnull=False,
+    ).exclude(
+        servicerequest__status__in=['PENDING', 'ACCEPTED', 'IN_PROGRESS'],
+    )
+    if region:
+        min_lat, max_lat, min_lng, max_lng = region
+        request_qs = request_qs.filter(
+            latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng)
+        )
+        mechanic_qs = mechanic_qs.filter(
+            latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng)
+        )
+
+    requests = [
+        DispatchRequest(*row)
+        for row in request_qs.values_list('id', 'latitude', 'longitude', 'vehicle_type', 'created_at')
+    ]
+    mechanics = [
+        DispatchMechanic(*row)
+        for row in mechanic_qs.distinct().values_list('id', 'latitude', 'longitude', 'specialization')
+    ]
+    return requests, mechanics
+
+
+def apply_assignments(assignments):
+    """
+    Write planned assignments in one transaction.
+
+    Each write is conditional on the request still being PENDING and
+    unassigned, so a request a user assigned by hand (or a mechanic accepted)
+    while the plan was being computed is left alone. As with assign_mechanic the
+    status stays PENDING until the mechanic accepts. Returns the assignments
+    that were actually written.
+    """
+    from .models import Mechanic, Notification, ServiceRequest
+    from . import transitions
+
+    written = []
+    with transaction.atomic():
+        for assignment in assignments:
+            if transitions.assign(assignment.request_id, assignment.mechanic_id, distance_km=assignment.distance_km):
+                written.append(assignment)
+
+        def notify():
+            mechanics = Mechanic.objects.select_related('user').in_bulk(
+                [assignment.mechanic_id for assignment in written]
+            )
+            requests = ServiceRequest.objects.select_related('user').in_bulk(
+                [assignment.request_id for assignment in written]
+            )
+            for assignment in written:
+                service_request = requests[assignment.request_id]
+                Notification.create_service_request_notification(
+                    recipient=mechanics[assignment.mechanic_id].user,
+                    service_request=service_request,
+                )
+                Notification.create_status_update_notification(
+                    recipient=service_request.user,
+                    service_request=service_request,
+                )
+
+        transaction.on_commit(notify)
+    return written
+
+
+def run_dispatch(region=None, dry_run=False):
+    requests, mechanics = load_dispatch_inputs(region)
+    assignments = plan_assignments(requests, mechanics)
+    if dry_run:
+        return assignments
+    return apply_assignments(assignments)
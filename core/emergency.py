@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .geo import GridIndex
+from .models import EmergencyOffer, EmergencyRequest, Mechanic, Notification, ServiceRequest
+
+logger = logging.getLogger(__name__)
+
+# Search radii (km) offered in turn; each ring stays open for
+# EMERGENCY_ESCALATION_SECONDS before the next, wider one is offered. The
+# last ring is re-run on the same interval until the request is accepted or
+# cancelled, so mechanics who come free or into range later still get it.
+DEFAULT_RINGS_KM = (5, 10, 25, 50)
+DEFAULT_OFFERS_PER_RING = 5
+DEFAULT_ESCALATION_SECONDS = 30
+DEFAULT_OFFER_BUDGET_MS = 250
+DEFAULT_INDEX_TTL_SECONDS = 60
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def ring_radii():
+    return tuple(_setting('EMERGENCY_RINGS_KM', DEFAULT_RINGS_KM))
+
+
+class MechanicLocator:
+    """
+    Process-local spatial index of available mechanics.
+
+    Built from one query on first use and kept current by Mechanic save/delete
+    signals, so creating an emergency never scans the mechanic table. It is
+    rebuilt after EMERGENCY_INDEX_TTL_SECONDS to pick up changes made by other
+    processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = 0.0
+
+    def _build(self):
+        index = GridIndex(cell_degrees=0.1)
+        rows = Mechanic.objects.filter(
+            available=True, latitude__isnull=False, longitude__isnull=False
+        ).values_list('id', 'latitude', 'longitude')
+        for mechanic_id, latitude, longitude in rows:
+            index.insert(mechanic_id, latitude, longitude)
+        return index
+
+    def index(self):
+        ttl = _setting('EMERGENCY_INDEX_TTL_SECONDS', DEFAULT_INDEX_TTL_SECONDS)
+        with self._lock:
+            if self._index is None or time.monotonic() - self._built_at > ttl:
+                self._index = self._build()
+                self._built_at = time.monotonic()
+            return self._index
+
+    def update(self, mechanic):
+        with self._lock:
+            if self._index is None:
+                return
+            if mechanic.available and mechanic.latitude is not None and mechanic.longitude is not None:
+                self._index.insert(mechanic.id, mechanic.latitude, mechanic.longitude)
+            else:
+                self._index.remove(mechanic.id)
+
+    def discard(self, mechanic_id):
+        with self._lock:
+            if self._index is not None:
+                self._index.remove(mechanic_id)
+
+    def reset(self):
+        with self._lock:
+            self._index = None
+
+
+locator = MechanicLocator()
+
+
+def mechanic_saved(sender, instance, **kwargs):
+    locator.update(instance)
+
+
+def mechanic_deleted(sender, instance, **kwargs):
+    locator.discard(instance.id)
+
+
+def _busy_mechanic_ids():
+    busy = set(ServiceRequest.objects.filter(
+        status__in=['ACCEPTED', 'IN_PROGRESS'], mechanic__isnull=False
+    ).values_list('mechanic_id', flat=True))
+    busy.update(EmergencyRequest.objects.filter(
+        status='DISPATCHED', mechanic__isnull=False
+    ).values_list('mechanic_id', flat=True))
+    return busy
+
+
+def offer_next_ring(emergency, ring):
+    """
+    Offer `emergency` to the nearest free mechanics in ring `ring`.
+
+    Rings with nobody new in range are skipped immediately rather than waiting
+    out the escalation timer. Mechanics already offered the request are never
+    offered it again. Returns the offers created (empty when nobody new is in
+    range of the remaining rings).
+    """
+    radii = ring_radii()
+    per_ring = _setting('EMERGENCY_OFFERS_PER_RING', DEFAULT_OFFERS_PER_RING)
+    index = locator.index()
+    exclude = _busy_mechanic_ids()
+    exclude.update(EmergencyOffer.objects.filter(
+        emergency_request=emergency
+    ).values_list('mechanic_id', flat=True))
+
+    while ring < len(radii):
+        nearest = index.within(emergency.latitude, emergency.longitude, radii[ring], exclude=exclude)[:per_ring]
+        if nearest:
+            offers = EmergencyOffer.objects.bulk_create([
+                EmergencyOffer(emergency_request=emergency, mechanic_id=mechanic_id, distance_km=round(distance, 2), ring=ring)
+                for distance, mechanic_id in nearest
+            ], ignore_conflicts=True)
+            opened = EmergencyRequest.objects.filter(pk=emergency.pk, status='PENDING').update(
+                ring=ring, ring_opened_at=timezone.now()
+            )
+            if not opened:
+                return []
+            emergency.ring = ring
+            transaction.on_commit(lambda: _notify_offers(offers))
+            return offers
+        ring += 1
+
+    # Nobody new in range: park the request on the last ring until its next retry
+    if EmergencyRequest.objects.filter(pk=emergency.pk, status='PENDING').update(
+        ring=len(radii) - 1, ring_opened_at=timezone.now()
+    ):
+        emergency.ring = len(radii) - 1
+    return []
+
+
+def _notify_offers(offers):
+    mechanics = Mechanic.objects.select_related('user').in_bulk([offer.mechanic_id for offer in offers])
+    for offer in offers:
+        Notification.create_emergency_offer_notification(mechanics[offer.mechanic_id].user, offer)
+
+
+def create_emergency_request(user, latitude, longitude):
+    """Create an emergency and offer it to the closest free mechanics right away."""
+    started = time.perf_counter()
+    emergency = EmergencyRequest.objects.create(
+        user=user, latitude=latitude, longitude=longitude, ring_opened_at=timezone.now()
+    )
+    offers = offer_next_ring(emergency, 0)
+    if offers:
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        emergency.first_offer_latency_ms = latency_ms
+        EmergencyRequest.objects.filter(pk=emergency.pk).update(first_offer_latency_ms=latency_ms)
+        budget_ms = _setting('EMERGENCY_OFFER_BUDGET_MS', DEFAULT_OFFER_BUDGET_MS)
+        if latency_ms > budget_ms:
+            logger.warning(
+                "Emergency #%s first offer took %.1f ms (budget %s ms)", emergency.pk, latency_ms, budget_ms
+            )
+    return emergency, offers
+
+
+def escalate_if_due(emergency, now=None):
+    """
+    Widen the search ring when the current one has been open long enough, or
+    retry the last ring for mechanics not offered the request yet.
+    """
+    now = now or timezone.now()
+    interval = timedelta(seconds=_setting('EMERGENCY_ESCALATION_SECONDS', DEFAULT_ESCALATION_SECONDS))
+    if emergency.status != 'PENDING':
+        return []
+    if emergency.ring_opened_at and now - emergency.ring_opened_at < interval:
+        return []
+    offers = offer_next_ring(emergency, min(emergency.ring + 1, len(ring_radii()) - 1))
+    if offers and emergency.first_offer_latency_ms is None:
+        latency_ms = round((now - emergency.created_at).total_seconds() * 1000, 2)
+        EmergencyRequest.objects.filter(pk=emergency.pk).update(first_offer_latency_ms=latency_ms)
+    return offers
+
+
+def escalate_due_emergencies(now=None):
+    now = now or timezone.now()
+    interval = timedelta(seconds=_setting('EMERGENCY_ESCALATION_SECONDS', DEFAULT_ESCALATION_SECONDS))
+    due = EmergencyRequest.objects.filter(
+        status='PENDING', ring_opened_at__lte=now - interval
+    ).order_by('created_at')
+    escalated = 0
+    for emergency in due:
+        if escalate_if_due(emergency, now=now):
+            escalated += 1
+    return escalated
+
+
+def accept_emergency(emergency_id, mechanic):
+    """
+    First accept wins: the assignment is a single conditional UPDATE, so of
+    any number of concurrent accepts exactly one sees a row count of 1.
+    Only mechanics the request was offered to may accept it.
+    """
+    if not EmergencyOffer.objects.filter(emergency_request_id=emergency_id, mechanic=mechanic).exists():
+        return False
+    won = EmergencyRequest.objects.filter(
+        pk=emergency_id, status='PENDING', mechanic__isnull=True
+    ).update(mechanic=mechanic, status='DISPATCHED', accepted_at=timezone.now()) == 1
+    if won:
+        emergency = EmergencyRequest.objects.select_related('user', 'mechanic__user').get(pk=emergency_id)
+        transaction.on_commit(
+            lambda: Notification.create_emergency_accepted_notification(emergency.user, emergency)
+        )
+    return won
@@ -1,27 +1,45 @@
-import firebase_admin
-from firebase_admin import credentials, messaging
 import os
 
+from .ratelimit import get_limiter, RateLimited
+
 # Path to your service account key file
 # Ensure this file is kept secure and not committed to public repositories
 SERVICE_ACCOUNT_KEY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'serviceAccountKey.json')
 
-if not firebase_admin._apps:
+
+def initialize_firebase():
+    """
+    Initialize the Firebase Admin SDK and return the default app, or None if
+    it could not be initialized. Called on first use through
+    core.clients (clients.get('firebase')), not on import.
+    """
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if firebase_admin._apps:
+        return firebase_admin.get_app()
     try:
         cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
-        firebase_admin.initialize_app(cred)
+        app = firebase_admin.initialize_app(cred)
         print("Firebase Admin SDK initialized successfully.")
+        return app
     except FileNotFoundError:
         print(f"Error: serviceAccountKey.json not found at {SERVICE_ACCOUNT_KEY_PATH}. Please ensure it's in the project root.")
     except Exception as e:
         print(f"Error initializing Firebase Admin SDK: {e}")
+    return None
+
 
 def send_notification(fcm_token, title, body, data=None):
     """Sends a push notification to a specific FCM token."""
-    if not firebase_admin._apps:
+    from .clients import clients
+
+    if clients.get('firebase') is None:
         print("Firebase Admin SDK not initialized. Cannot send notification.")
         return
 
+    from firebase_admin import messaging
+
     message = messaging.Message(
         notification=messaging.Notification(
             title=title,
@@ -32,9 +50,13 @@ def send_notification(fcm_token, title, body, data=None):
     )
 
     try:
-        response = messaging.send(message)
+        with get_limiter('fcm').limit():
+            response = messaging.send(message)
         print(f"Successfully sent message: {response}")
         return True
+    except RateLimited as e:
+        print(f"Not sending message: {e}")
+        return False
     except Exception as e:
         print(f"Error sending message: {e}")
         return False
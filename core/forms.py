@@ -115,7 +115,7 @@ class UserProfileForm(forms.ModelForm):
 class MechanicProfileForm(forms.ModelForm):
     class Meta:
         model = Mechanic
-        fields = ['specialization', 'experience_years', 'workshop_address', 'latitude', 'longitude', 'available', 'preferred_language']
+        fields = ['specialization', 'experience_years', 'workshop_address', 'latitude', 'longitude', 'available', 'preferred_language', 'service_radius_km']
         widgets = {
             'workshop_address': forms.Textarea(attrs={'rows': 3}),
         }
@@ -0,0 +1,85 @@
+from math import radians, degrees, sin, cos, sqrt, atan2, floor
+
+EARTH_RADIUS_KM = 6371
+# On the sphere haversine_km measures, so the box always encloses its circle
+KM_PER_DEGREE_LAT = radians(1) * EARTH_RADIUS_KM
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+    return EARTH_RADIUS_KM * c
+
+
+def bounding_box(lat, lng, radius_km):
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing a circle of radius_km."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    # Clamp near the poles so the longitude span stays finite
+    lat_cos = max(cos(radians(min(abs(lat) + dlat, 89.0))), 0.01)
+    dlng = degrees(radius_km / (EARTH_RADIUS_KM * lat_cos))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+
+class GridIndex:
+    """
+    In-memory spatial index that buckets points into fixed-size lat/lng cells.
+
+    A radius query only visits the cells overlapping the query's bounding box
+    and then filters by great-circle distance, so lookups cost roughly the
+    number of nearby points rather than the size of the whole fleet.
+    """
+
+    def __init__(self, cell_degrees=0.25):
+        self.cell_degrees = cell_degrees
+        self._cells = {}
+        self._points = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, key):
+        return key in self._points
+
+    def cell_for(self, lat, lng):
+        return floor(lat / self.cell_degrees), floor(lng / self.cell_degrees)
+
+    def insert(self, key, lat, lng):
+        self.remove(key)
+        cell = self.cell_for(lat, lng)
+        self._points[key] = (lat, lng, cell)
+        self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        bucket = self._cells.get(point[2])
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[point[2]]
+
+    def get(self, key):
+        point = self._points.get(key)
+        return (point[0], point[1]) if point else None
+
+    def within(self, lat, lng, radius_km, exclude=()):
+        """Return [(distance_km, key), ...] within radius_km, nearest first."""
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        min_row, min_col = self.cell_for(min_lat, min_lng)
+        max_row, max_col = self.cell_for(max_lat, max_lng)
+        found = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for key in self._cells.get((row, col), ()):
+                    if key in exclude:
+                        continue
+                    point_lat, point_lng, _ = self._points[key]
+                    distance = haversine_km(lat, lng, point_lat, point_lng)
+                    if distance <= radius_km:
+                        found.append((distance, key))
+        found.sort()
+        return found
@@ -0,0 +1,146 @@
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Resized renditions of uploaded photos. A RenditionImageField stores the
+# original as ImageField does; once the saving transaction commits, a
+# worker pool writes one copy per IMAGE_RENDITION_SIZES entry and format
+# under RENDITIONS_DIR, keyed by the original's full name:
+#
+#   vehicle_images/car.jpg -> renditions/vehicle_images/car.jpg.thumb.webp, ...
+#
+# Nothing else is stored there, so a rendition can never collide with an
+# upload (car.jpg and car.png get separate copies) and the pipeline only
+# ever replaces files it wrote.
+#
+# `field_file.get_thumbnail_url('thumb')` (the `thumbnail` template filter)
+# returns the rendition's URL, or the original's until it has been written.
+# `manage generate_renditions` backfills images uploaded before this or
+# whose job was lost with its process.
+
+DEFAULT_SIZES = {'thumb': 128, 'medium': 480, 'large': 1280}
+DEFAULT_FORMATS = ['webp', 'jpeg']
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+RENDITIONS_DIR = 'renditions/'
+RENDITION = re.compile(rf'^{RENDITIONS_DIR}(?P<original>.+)\.(?P<size>[a-z]+)\.(?P<format>[a-z]+)$')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def rendition_sizes():
+    return getattr(settings, 'IMAGE_RENDITION_SIZES', DEFAULT_SIZES)
+
+
+def rendition_formats():
+    return getattr(settings, 'IMAGE_RENDITION_FORMATS', DEFAULT_FORMATS)
+
+
+def rendition_name(name, size, format='webp'):
+    return f'{RENDITIONS_DIR}{name}.{size}.{format}'
+
+
+def rendition_original(name):
+    """The original image a rendition name was made from, or None if `name` is not a rendition."""
+    match = RENDITION.match(name)
+    if match is None or match['size'] not in rendition_sizes() or match['format'] not in rendition_formats():
+        return None
+    return match['original']
+
+
+def generate_renditions(storage, name, overwrite=True):
+    """Write every size/format rendition of the image `name`; returns the names written."""
+    sizes = rendition_sizes()
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        # JPEGs can decode straight at a fraction of full resolution
+        largest = max(sizes.values())
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    written = []
+    for size, edge in sizes.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        for format in rendition_formats():
+            target = rendition_name(name, size, format)
+            if storage.exists(target):
+                if not overwrite:
+                    continue
+                # Only ever a rendition: nothing but this function writes under RENDITIONS_DIR
+                storage.delete(target)
+            frame = resized
+            if format == 'jpeg' and frame.mode != 'RGB':
+                frame = frame.convert('RGB')
+            elif frame.mode not in ('RGB', 'RGBA'):
+                frame = frame.convert('RGBA')
+            buffer = BytesIO()
+            frame.save(
+                buffer, PIL_FORMATS[format], quality=getattr(settings, 'IMAGE_RENDITION_QUALITY', 80), optimize=True,
+            )
+            written.append(storage.save(target, ContentFile(buffer.getvalue())))
+    return written
+
+
+def _generate_logged(storage, name):
+    try:
+        return generate_renditions(storage, name)
+    except Exception:
+        logger.exception("Could not generate renditions of %s", name)
+        return []
+
+
+def get_pool():
+    """The process-wide rendition worker pool (IMAGE_RENDITION_WORKERS threads)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_RENDITION_WORKERS', 2), thread_name_prefix='renditions',
+            )
+        return _pool
+
+
+def queue_renditions(storage, name):
+    """Generate renditions of `name` in the worker pool once the current transaction commits."""
+    transaction.on_commit(lambda: get_pool().submit(_generate_logged, storage, name))
+
+
+class RenditionFieldFile(models.fields.files.ImageFieldFile):
+    def get_thumbnail_url(self, size='thumb', format='webp'):
+        if not self:
+            return ''
+        name = rendition_name(self.name, size, format)
+        if size in rendition_sizes() and self.storage.exists(name):
+            return self.storage.url(name)
+        # Not written yet (or an unknown size): the original still renders
+        return self.url
+
+    def delete(self, save=True):
+        if self:
+            for size in rendition_sizes():
+                for format in rendition_formats():
+                    self.storage.delete(rendition_name(self.name, size, format))
+        super().delete(save=save)
+
+
+class RenditionImageField(models.ImageField):
+    attr_class = RenditionFieldFile
+
+    def pre_save(self, model_instance, add):
+        file = getattr(model_instance, self.attname)
+        uploaded = bool(file) and not file._committed
+        file = super().pre_save(model_instance, add)
+        if uploaded:
+            queue_renditions(file.storage, file.name)
+        return file
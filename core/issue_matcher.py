@@ -0,0 +1,275 @@
+from collections import deque
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+import re
+
+from django.conf import settings
+
+# Fault taxonomy used to price problem complexity. Each category carries a
+# weight and the phrases that indicate it; a request is surcharged the weight
+# of the heaviest category its description matches. Phrases cover English plus the languages offered in
+# LANGUAGES, both in native script and in the romanised form people type on
+# phone keyboards. Override with ISSUE_COMPLEXITY_TAXONOMY in settings.
+DEFAULT_ISSUE_TAXONOMY = {
+    'engine': {
+        'weight': '300.00',
+        'phrases': [
+            'engine failure', 'engine failed', 'engine seized', 'engine knocking',
+            'engine not starting', 'engine won\'t start', 'engine wont start',
+            'engine stalled', 'engine stalls', 'engine dead', 'engine noise',
+            'engine smoke', 'smoke from engine', 'white smoke', 'black smoke',
+            'oil leak', 'engine oil leak', 'piston', 'crankshaft', 'camshaft',
+            'timing belt', 'timing chain', 'head gasket', 'misfire', 'misfiring',
+            'check engine light', 'engine light', 'turbo failure', 'low compression',
+            'engine kharab', 'engine band', 'engine bandh', 'gaadi start nahi',
+            'gadi start nahi', 'start nahi ho rahi', 'start nahi ho raha',
+            'इंजन खराब', 'इंजन बंद', 'इंजन से धुआं', 'गाड़ी स्टार्ट नहीं', 'स्टार्ट नहीं हो',
+            'इंजिन बंद', 'इंजिन खराब', 'गाडी सुरू होत नाही',
+            'இன்ஜின் பழுது', 'இன்ஜின் வேலை செய்யவில்லை', 'ஸ்டார்ட் ஆகவில்லை',
+            'ఇంజన్ పాడైంది', 'ఇంజన్ ఆగిపోయింది', 'స్టార్ట్ అవ్వడం లేదు',
+            'ಇಂಜಿನ್ ಕೆಟ್ಟಿದೆ', 'ಇಂಜಿನ್ ನಿಂತಿದೆ', 'ಸ್ಟಾರ್ಟ್ ಆಗುತ್ತಿಲ್ಲ',
+            'എഞ്ചിൻ തകരാർ', 'എഞ്ചിൻ നിന്നു', 'സ്റ്റാർട്ട് ആകുന്നില്ല',
+            'ইঞ্জিন খারাপ', 'ইঞ্জিন বন্ধ', 'স্টার্ট হচ্ছে না',
+        ],
+    },
+    'transmission': {
+        'weight': '300.00',
+        'phrases': [
+            'transmission', 'gearbox', 'gear box', 'gear slipping', 'gears slipping',
+            'gear not engaging', 'stuck in gear', 'clutch plate', 'clutch failure',
+            'clutch burnt', 'clutch slipping', 'clutch pedal', 'clutch cable',
+            'differential', 'drive shaft', 'driveshaft', 'axle broken', 'cv joint',
+            'gear nahi lag raha', 'gear fas gaya', 'clutch kharab',
+            'गियर नहीं लग रहा', 'गियर खराब', 'क्लच खराब', 'क्लच प्लेट',
+            'கியர் பழுது', 'கிளட்ச் பழுது', 'గేర్ పడటం లేదు', 'క్లచ్ పాడైంది',
+            'ಗೇರ್ ಬೀಳುತ್ತಿಲ್ಲ', 'ಕ್ಲಚ್ ಕೆಟ್ಟಿದೆ', 'ഗിയർ വീഴുന്നില്ല', 'ക്ലച്ച് തകരാർ',
+            'गियर पडत नाही', 'क्लच खराब झाला', 'গিয়ার পড়ছে না', 'ক্লাচ খারাপ',
+        ],
+    },
+    'electrical': {
+        'weight': '300.00',
+        'phrases': [
+            'electrical fault', 'electrical problem', 'electrical issue', 'short circuit',
+            'wiring', 'burnt wire', 'fuse blown', 'blown fuse', 'alternator',
+            'starter motor', 'self starter', 'ignition coil', 'ignition switch',
+            'ecu', 'sensor fault', 'headlights not working', 'dashboard lights',
+            'no power', 'sparking', 'wiring kharab', 'self nahi chal raha',
+            'शॉर्ट सर्किट', 'वायरिंग खराब', 'तार जल गया', 'सेल्फ नहीं चल रहा',
+            'வயரிங் பழுது', 'ஷார்ட் சர்க்யூட்', 'వైరింగ్ సమస్య', 'షార్ట్ సర్క్యూట్',
+            'ವೈರಿಂಗ್ ಸಮಸ್ಯೆ', 'ಶಾರ್ಟ್ ಸರ್ಕ್ಯೂಟ್', 'വയറിംഗ് തകരാർ', 'ഷോർട്ട് സർക്യൂട്ട്',
+            'वायरिंग बिघडली', 'ওয়্যারিং সমস্যা', 'শর্ট সার্কিট',
+        ],
+    },
+    'major_repair': {
+        'weight': '300.00',
+        'phrases': [
+            'major repair', 'overhaul', 'engine overhaul', 'towing', 'tow truck',
+            'need a tow', 'needs towing', 'chassis', 'frame damage', 'total breakdown',
+            'completely broken down', 'fire', 'caught fire', 'flooded', 'water in engine',
+            'hydrolock', 'tow karna', 'towing chahiye',
+            'टोइंग', 'गाड़ी में आग', 'पानी में डूब गई', 'बड़ी मरम्मत',
+            'டோயிங்', 'தீப்பிடித்தது', 'టోయింగ్', 'మంటలు', 'ಟೋಯಿಂಗ್', 'ಬೆಂಕಿ',
+            'ടോയിംഗ്', 'തീപിടിച്ചു', 'टोइंग हवे', 'আগুন লেগেছে', 'টোয়িং',
+        ],
+    },
+    'accident': {
+        'weight': '300.00',
+        'phrases': [
+            'accident', 'collision', 'crashed', 'car crash', 'rear ended',
+            'rear-ended', 'airbag', 'airbags deployed', 'bumper damage', 'dent',
+            'rolled over', 'overturned', 'takkar', 'thok diya',
+            'दुर्घटना', 'एक्सीडेंट', 'टक्कर', 'अपघात',
+            'விபத்து', 'ప్రమాదం', 'ಅಪಘಾತ', 'അപകടം', 'দুর্ঘটনা', 'এক্সিডেন্ট',
+        ],
+    },
+    'cooling': {
+        'weight': '200.00',
+        'phrases': [
+            'overheating', 'overheated', 'over heating', 'engine hot', 'temperature high',
+            'high temperature', 'radiator', 'coolant leak', 'coolant', 'water pump',
+            'thermostat', 'fan not working', 'radiator fan', 'steam from bonnet',
+            'steam from hood', 'engine garam', 'garam ho gaya',
+            'इंजन गरम', 'ओवरहीट', 'रेडिएटर', 'कूलेंट',
+            'ஓவர் ஹீட்', 'ரேடியேட்டர்', 'ఓవర్ హీట్', 'రేడియేటర్', 'ಓವರ್ ಹೀಟ್', 'ರೇಡಿಯೇಟರ್',
+            'ഓവർ ഹീറ്റ്', 'റേഡിയേറ്റർ', 'इंजिन गरम', 'ইঞ্জিন গরম', 'রেডিয়েটর',
+        ],
+    },
+    'brakes': {
+        'weight': '200.00',
+        'phrases': [
+            'brake failure', 'brakes failed', 'brake fail', 'no brakes', 'brake not working',
+            'brakes not working', 'brake pads', 'brake pad', 'brake disc', 'brake drum',
+            'brake fluid', 'brake oil', 'brake noise', 'squeaking brakes', 'abs light',
+            'brake fail ho gaya', 'brake nahi lag raha',
+            'ब्रेक फेल', 'ब्रेक खराब', 'ब्रेक नहीं लग रहा', 'ब्रेक लागत नाही',
+            'பிரேக் பிடிக்கவில்லை', 'பிரேக் பழுது', 'బ్రేక్ ఫెయిల్', 'బ్రేకులు పనిచేయడం లేదు',
+            'ಬ್ರೇಕ್ ಫೇಲ್', 'ಬ್ರೇಕ್ ಹಿಡಿಯುತ್ತಿಲ್ಲ', 'ബ്രേക്ക് പോയി', 'ബ്രേക്ക് തകരാർ',
+            'ব্রেক ফেল', 'ব্রেক কাজ করছে না',
+        ],
+    },
+    'steering_suspension': {
+        'weight': '200.00',
+        'phrases': [
+            'steering', 'power steering', 'steering hard', 'steering locked',
+            'suspension', 'shock absorber', 'broken spring', 'leaf spring', 'tie rod',
+            'ball joint', 'wheel alignment', 'wheel bearing', 'wobbling',
+            'स्टीयरिंग', 'सस्पेंशन', 'स्टेअरिंग', 'ஸ்டீயரிங்', 'ஸ்டீரிங்', 'స్టీరింగ్',
+            'ಸ್ಟೀರಿಂಗ್', 'സ്റ്റിയറിംഗ്', 'স্টিয়ারিং',
+        ],
+    },
+    'battery': {
+        'weight': '100.00',
+        'phrases': [
+            'battery dead', 'dead battery', 'battery down', 'battery drained',
+            'battery discharged', 'flat battery', 'jump start', 'jumpstart',
+            'battery leak', 'battery terminal', 'weak battery', 'battery low',
+            'battery khatam', 'battery down ho gayi',
+            'बैटरी खत्म', 'बैटरी डाउन', 'बैटरी बैठ गई', 'बॅटरी संपली', 'बॅटरी डाउन',
+            'பேட்டரி டவுன்', 'பேட்டரி தீர்ந்தது', 'బ్యాటరీ డౌన్', 'బ్యాటరీ అయిపోయింది',
+            'ಬ್ಯಾಟರಿ ಡೌನ್', 'ಬ್ಯಾಟರಿ ಖಾಲಿ', 'ബാറ്ററി ഡൗൺ', 'ബാറ്ററി തീർന്നു',
+            'ব্যাটারি ডাউন', 'ব্যাটারি শেষ',
+        ],
+    },
+    'tyre': {
+        'weight': '100.00',
+        'phrases': [
+            'flat tyre', 'flat tire', 'puncture', 'punctured', 'tyre burst', 'tire burst',
+            'blowout', 'tyre blowout', 'tire blowout', 'spare tyre', 'spare tire',
+            'wheel nut', 'rim damage', 'tyre change', 'tire change', 'tubeless',
+            'pankchar', 'panchar', 'tyre phat gaya',
+            'पंचर', 'टायर फट', 'टायर फटा', 'टायर पंक्चर', 'पंक्चर',
+            'பஞ்சர்', 'டயர் வெடித்தது', 'పంక్చర్', 'పంచర్', 'టైర్ పేలింది',
+            'ಪಂಕ್ಚರ್', 'ಟೈರ್ ಒಡೆದಿದೆ', 'പഞ്ചർ', 'ടയർ പൊട്ടി',
+            'পাংচার', 'টায়ার ফেটে',
+        ],
+    },
+    'fuel': {
+        'weight': '100.00',
+        'phrases': [
+            'out of fuel', 'ran out of fuel', 'no fuel', 'out of petrol', 'out of diesel',
+            'empty tank', 'fuel leak', 'fuel pump', 'fuel filter', 'injector',
+            'wrong fuel', 'petrol khatam', 'diesel khatam', 'tel khatam',
+            'पेट्रोल खत्म', 'डीजल खत्म', 'पेट्रोल संपले', 'डिझेल संपले',
+            'பெட்ரோல் தீர்ந்தது', 'டீசல் தீர்ந்தது', 'పెట్రోల్ అయిపోయింది', 'డీజిల్ అయిపోయింది',
+            'ಪೆಟ್ರೋಲ್ ಖಾಲಿ', 'ಡೀಸೆಲ್ ಖಾಲಿ', 'പെട്രോൾ തീർന്നു', 'ഡീസൽ തീർന്നു',
+            'পেট্রোল শেষ', 'ডিজেল শেষ',
+        ],
+    },
+    'lockout': {
+        'weight': '50.00',
+        'phrases': [
+            'locked out', 'keys locked', 'key locked inside', 'lost key', 'lost keys',
+            'key broken', 'broken key', 'key stuck', 'chabi andar', 'chabi kho gayi',
+            'चाबी अंदर', 'चाबी खो गई', 'चावी हरवली', 'சாவி தொலைந்தது', 'తాళం చెవి పోయింది',
+            'ಕೀ ಕಳೆದುಹೋಗಿದೆ', 'താക്കോൽ നഷ്ടപ്പെട്ടു', 'চাবি হারিয়ে',
+        ],
+    },
+}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_issue_text(text):
+    return _WHITESPACE_RE.sub(' ', (text or '').casefold()).strip()
+
+
+@dataclass(frozen=True)
+class IssueMatch:
+    categories: tuple
+    phrases: tuple
+    score: Decimal
+
+    def __bool__(self):
+        return bool(self.categories)
+
+
+class IssueMatcher:
+    """
+    Aho-Corasick automaton over every phrase in a fault taxonomy.
+
+    The automaton is compiled once, after which matching a description costs a
+    single pass over its characters regardless of how many phrases the taxonomy
+    holds. Phrases that start or end with an ASCII letter or digit only match
+    at a word boundary on that side, so 'dent' fires neither inside 'accident'
+    nor on 'dentist'.
+    """
+
+    def __init__(self, taxonomy):
+        self.weights = {}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for category, spec in taxonomy.items():
+            self.weights[category] = Decimal(str(spec.get('weight', 0)))
+            for phrase in spec.get('phrases', ()):
+                self._add(normalize_issue_text(phrase), category)
+        self._build_failure_links()
+
+    def _add(self, phrase, category):
+        if not phrase:
+            return
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += ((phrase, category, _is_word_char(phrase[0]), _is_word_char(phrase[-1])),)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0
+                # Inherit the outputs of the suffix state so each position is
+                # reported in one lookup instead of walking the failure chain.
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def match(self, text):
+        text = normalize_issue_text(text)
+        goto, fail, output = self._goto, self._fail, self._output
+        categories = {}
+        phrases = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for phrase, category, needs_word_start, needs_word_end in output[state]:
+                start = index - len(phrase) + 1
+                if needs_word_start and start > 0 and text[start - 1].isalnum():
+                    continue
+                if needs_word_end and index + 1 < len(text) and text[index + 1].isalnum():
+                    continue
+                phrases.append(phrase)
+                categories.setdefault(category, self.weights[category])
+        return IssueMatch(
+            categories=tuple(sorted(categories)),
+            phrases=tuple(phrases),
+            # The heaviest category, not the sum: a description naming several
+            # symptoms of one breakdown is still one job
+            score=max(categories.values(), default=Decimal('0.00')),
+        )
+
+
+def _is_word_char(char):
+    # Only ASCII phrases get boundaries: Indic scripts end words in vowel signs,
+    # which isalnum() does not count
+    return char.isascii() and char.isalnum()
+
+
+@lru_cache(maxsize=1)
+def get_issue_matcher():
+    taxonomy = getattr(settings, 'ISSUE_COMPLEXITY_TAXONOMY', None) or DEFAULT_ISSUE_TAXONOMY
+    return IssueMatcher(taxonomy)
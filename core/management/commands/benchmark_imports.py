@@ -0,0 +1,78 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# SDKs that must only be imported on first use, through core.clients
+LAZY_MODULES = ('google.generativeai', 'googlemaps', 'geopy', 'xhtml2pdf', 'firebase_admin')
+PROJECT_PACKAGES = ('core', 'chatbot', 'vehicle_breakdown_assist')
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what a worker pays at boot (django.setup() plus loading the URLconf) "
+        "in a fresh interpreter with -X importtime. Reports per-module import cost and "
+        "fails if the total exceeds the startup budget or a lazily loaded SDK was imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help="Startup import budget; defaults to STARTUP_IMPORT_BUDGET_MS.")
+        parser.add_argument('--top', type=int, default=15, help="Number of slowest modules to list.")
+        parser.add_argument('--runs', type=int, default=3, help="Take the fastest of this many runs.")
+
+    def _measure(self):
+        code = f"import django; django.setup(); import {settings.ROOT_URLCONF}"
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, env=os.environ.copy(),
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        modules = []
+        for line in result.stderr.splitlines():
+            match = _IMPORTTIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append((name, len(indent) // 2, int(self_us), int(cumulative_us)))
+        return modules
+
+    def handle(self, *args, **options):
+        budget_ms = options['budget_ms']
+        if budget_ms is None:
+            budget_ms = getattr(settings, 'STARTUP_IMPORT_BUDGET_MS', 800)
+
+        runs = [self._measure() for _ in range(max(1, options['runs']))]
+        modules = min(runs, key=lambda run: sum(cumulative for _name, depth, _self, cumulative in run if depth == 0))
+        total_ms = sum(cumulative for _name, depth, _self, cumulative in modules if depth == 0) / 1000
+
+        self.stdout.write("Slowest top-level imports (cumulative):")
+        top_level = sorted((m for m in modules if m[1] == 0), key=lambda m: m[3], reverse=True)
+        for name, _depth, _self_us, cumulative_us in top_level[:options['top']]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        self.stdout.write("Project modules (cumulative):")
+        project = sorted(
+            (m for m in modules if m[0].split('.')[0] in PROJECT_PACKAGES), key=lambda m: m[3], reverse=True,
+        )
+        for name, _depth, _self_us, cumulative_us in project[:options['top']]:
+            self.stdout.write(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        imported = {name for name, _depth, _self_us, _cumulative_us in modules}
+        eager = [name for name in LAZY_MODULES if name in imported]
+        self.stdout.write(f"Total import time: {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+
+        problems = []
+        if eager:
+            problems.append(f"imported at startup instead of on first use: {', '.join(eager)}")
+        if total_ms > budget_ms:
+            problems.append(f"startup imports took {total_ms:.1f} ms, over the {budget_ms:.0f} ms budget")
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("Startup is within budget."))
@@ -0,0 +1,104 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import translation
+
+from core.middleware import LANGUAGE_SESSION_KEY
+from core.models import User
+
+LANGUAGES = ['hi', 'ta', 'en', 'bn']
+CURRENT = 'core.middleware.LanguageMiddleware'
+LEGACY = f'{__name__}.LegacyLanguageMiddleware'
+
+
+class LegacyLanguageMiddleware:
+    """The previous LanguageMiddleware, kept here as the benchmark baseline."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.user.is_authenticated:
+            user_language = request.user.preferred_language
+            if user_language and user_language != translation.get_language():
+                translation.activate(user_language)
+                request.session[LANGUAGE_SESSION_KEY] = user_language
+        elif LANGUAGE_SESSION_KEY in request.session:
+            translation.activate(request.session[LANGUAGE_SESSION_KEY])
+        else:
+            translation.activate(settings.LANGUAGE_CODE)
+        return self.get_response(request)
+
+
+def _session_writes(queries):
+    return sum(
+        'django_session' in query['sql'] and query['sql'].lstrip().upper().startswith(('UPDATE', 'INSERT'))
+        for query in queries
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Count session writes and time per request for users with different preferred "
+        "languages, previous LanguageMiddleware (behind LocaleMiddleware, as in the old "
+        "settings) versus the current one. Creates throwaway users and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=25, help="Requests per user.")
+        parser.add_argument('--path', default=None, help="Page to request (default: the dashboard).")
+
+    def _middleware(self, language_middleware):
+        middleware = [entry for entry in settings.MIDDLEWARE if entry != CURRENT]
+        middleware.insert(middleware.index('django.contrib.sessions.middleware.SessionMiddleware') + 1,
+                          'django.middleware.locale.LocaleMiddleware')
+        middleware.insert(middleware.index('django.contrib.auth.middleware.AuthenticationMiddleware') + 1,
+                          language_middleware)
+        return middleware
+
+    def _run(self, users, path, requests):
+        clients = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            # The real login view stores the language once; force_login does not
+            client.get(path)
+            clients.append(client)
+        writes = 0
+        started = time.perf_counter()
+        # Interleave users, as a worker thread serving many clients would
+        for _ in range(requests):
+            for client in clients:
+                with CaptureQueriesContext(connection) as captured:
+                    client.get(path)
+                writes += _session_writes(captured.captured_queries)
+        total = requests * len(clients)
+        return writes / total, (time.perf_counter() - started) / total
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        users = [
+            User.objects.create(username=f'langbench-{tag}-{index}', preferred_language=LANGUAGES[index % len(LANGUAGES)])
+            for index in range(options['users'])
+        ]
+        path = options['path'] or reverse('core:dashboard')
+        try:
+            for label, language_middleware in (('previous', LEGACY), ('current', CURRENT)):
+                with override_settings(
+                    MIDDLEWARE=self._middleware(language_middleware),
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                ):
+                    writes, seconds = self._run(users, path, options['requests'])
+                self.stdout.write(
+                    f"{label:>8}: {writes:.2f} session writes/request, {seconds * 1000:.1f} ms/request"
+                )
+        finally:
+            User.objects.filter(username__startswith=f'langbench-{tag}-').delete()
+            translation.deactivate()
@@ -0,0 +1,129 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.db.sqlite import configure_sqlite
+from core.models import Mechanic, ServiceRequest, User
+
+
+def _rollback_journal(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=DELETE')
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure write throughput of the update_mechanic_location endpoint with many "
+        "mechanics pinging at once, against the configured database (set DATABASE_URL "
+        "to compare PostgreSQL). On SQLite, --sqlite-journal delete compares against the "
+        "rollback journal. Creates throwaway users and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mechanics', type=int, default=16, help="Concurrent mechanics (threads).")
+        parser.add_argument('--pings', type=int, default=50, help="Location pings per mechanic.")
+        parser.add_argument('--sqlite-journal', choices=['wal', 'delete'], default='wal')
+
+    def _create_fixtures(self, count, tag):
+        customer = User.objects.create(username=f'locbench-{tag}-customer')
+        mechanics = []
+        for index in range(count):
+            user = User.objects.create(username=f'locbench-{tag}-mechanic-{index}', is_mechanic=True)
+            mechanic = Mechanic.objects.create(
+                user=user, specialization='General', experience_years=1, workshop_address='Benchmark',
+                latitude=12.97, longitude=77.59,
+            )
+            # An active job, so each ping also updates the request the user is tracking
+            ServiceRequest.objects.create(
+                user=customer, mechanic=mechanic, status='IN_PROGRESS', vehicle_type='CAR',
+                issue_description='Benchmark', location='Benchmark', latitude=12.98, longitude=77.6,
+            )
+            mechanics.append(mechanic)
+        return mechanics
+
+    def _run(self, mechanics, pings):
+        url = reverse('core:update_mechanic_location')
+        outcomes = Counter()
+        latencies = []
+        lock = threading.Lock()
+        clients = []
+        for mechanic in mechanics:
+            client = Client(raise_request_exception=False)
+            client.force_login(mechanic.user)
+            clients.append(client)
+        barrier = threading.Barrier(len(clients))
+
+        def ping(client, offset):
+            local = Counter()
+            local_latencies = []
+            try:
+                barrier.wait()
+                for index in range(pings):
+                    body = json.dumps({'latitude': 12.97 + offset * 0.001, 'longitude': 77.59 + index * 0.0001})
+                    started = time.perf_counter()
+                    response = client.post(url, body, content_type='application/json')
+                    local_latencies.append(time.perf_counter() - started)
+                    if response.status_code == 200:
+                        local['ok'] += 1
+                    elif response['Content-Type'] == 'application/json':
+                        local[response.json().get('error')] += 1
+                    else:  # e.g. the session lookup failed before the view ran
+                        local[f'HTTP {response.status_code}'] += 1
+            finally:
+                close_old_connections()
+                connection.close()
+            with lock:
+                outcomes.update(local)
+                latencies.extend(local_latencies)
+
+        threads = [threading.Thread(target=ping, args=(client, index)) for index, client in enumerate(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes, latencies, time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        sqlite_delete = connection.vendor == 'sqlite' and options['sqlite_journal'] == 'delete'
+        if sqlite_delete:
+            connection_created.disconnect(dispatch_uid='core_configure_sqlite')
+            connection_created.connect(_rollback_journal, dispatch_uid='locbench_rollback_journal')
+            connection.close()
+
+        try:
+            mechanics = self._create_fixtures(options['mechanics'], tag)
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                outcomes, latencies, elapsed = self._run(mechanics, options['pings'])
+        finally:
+            if sqlite_delete:
+                connection_created.disconnect(dispatch_uid='locbench_rollback_journal')
+                connection_created.connect(configure_sqlite, dispatch_uid='core_configure_sqlite')
+                connection.close()
+            User.objects.filter(username__startswith=f'locbench-{tag}-').delete()
+
+        label = connection.vendor
+        if connection.vendor == 'sqlite':
+            label += f" ({options['sqlite_journal']} journal)"
+        latencies.sort()
+        median = statistics.median(latencies) if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{label}: {outcomes['ok']} location writes in {elapsed:.2f}s = {outcomes['ok'] / elapsed:.0f} writes/s, "
+            f"median {median * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms"
+        )
+        errors = {key: value for key, value in outcomes.items() if key != 'ok'}
+        if errors:
+            self.stdout.write(self.style.WARNING(f"Failed writes: {errors}"))
@@ -0,0 +1,64 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from core.models import Notification, PushDelivery, User
+from core.push import FakeTransport, deliver_pending
+from core.ratelimit import OutboundLimiter, get_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure push throughput (messages/second) of the delivery worker against the "
+        "fake transport, one message per call versus multicast batches. Creates "
+        "throwaway users and notifications and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=2000)
+        parser.add_argument('--latency', type=float, default=0.02, help="Simulated seconds per provider call.")
+        parser.add_argument('--invalid-share', type=float, default=0.05, help="Share of stale device tokens.")
+        parser.add_argument('--batch-sizes', default='1,100,500')
+
+    def _run(self, batch_size, options, invalid_tokens):
+        transport = FakeTransport(invalid_tokens=invalid_tokens, latency=options['latency'], max_batch_size=batch_size)
+        # Measure the transport, not the production FCM rate limit
+        limiter = OutboundLimiter('push-benchmark', get_store(), rate=1e9, burst=1e9, concurrency=1000)
+        totals = [0, 0]
+        started = time.perf_counter()
+        while True:
+            stats = deliver_pending(transport=transport, limit=options['messages'], limiter=limiter)
+            if not stats.batches:
+                break
+            totals[0] += stats.sent
+            totals[1] += stats.invalid
+        return totals, time.perf_counter() - started, len(transport.calls)
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        count = options['messages']
+        invalid_every = int(1 / options['invalid_share']) if options['invalid_share'] else 0
+        tokens = [f'bench-{tag}-{index}' for index in range(count)]
+        invalid_tokens = {token for index, token in enumerate(tokens) if invalid_every and index % invalid_every == 0}
+        users = [
+            User.objects.create(username=f'push-bench-{tag}-{index}', is_mechanic=True, fcm_token=token)
+            for index, token in enumerate(tokens)
+        ]
+        try:
+            for user in users:
+                Notification.create_service_request_notification(user, None)
+            deliveries = PushDelivery.objects.filter(token__startswith=f'bench-{tag}-')
+
+            for batch_size in [int(size) for size in options['batch_sizes'].split(',')]:
+                deliveries.update(status='PENDING', attempts=0, claim='')
+                (sent, invalid), elapsed, calls = self._run(batch_size, options, invalid_tokens)
+                self.stdout.write(
+                    f"batch size {batch_size:>4}: {sent} sent, {invalid} invalid, {calls} provider calls, "
+                    f"{(sent + invalid) / elapsed:8.0f} messages/s"
+                )
+
+            cleared = User.objects.filter(username__startswith=f'push-bench-{tag}-', fcm_token__isnull=True).count()
+            self.stdout.write(f"Device tokens cleared after rejection: {cleared} of {len(invalid_tokens)} stale")
+        finally:
+            User.objects.filter(username__startswith=f'push-bench-{tag}-').delete()
@@ -0,0 +1,117 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core import mail
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.utils import get_random_secret_key
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import User
+
+ENGINES = [
+    ('db', 'django.contrib.sessions.backends.db'),
+    ('cached_db', 'django.contrib.sessions.backends.cached_db'),
+    ('hybrid', 'core.sessions'),
+]
+PASSWORD = 'bench-Passw0rd!'
+
+
+def _session_queries(queries):
+    return sum('django_session' in query['sql'] for query in queries)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the session engines: log users in through the login view, browse the "
+        "dashboard, log out, and run the password reset OTP flow, counting django_session "
+        "queries per request for the db, cached_db and core.sessions (hybrid) engines. "
+        "Creates throwaway users and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=25, help="Dashboard requests per user.")
+
+    def _request(self, stats, client, method, url, **data):
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(client, method)(url, data)
+        if response.status_code >= 400:
+            raise CommandError(f"{method.upper()} {url} returned {response.status_code}")
+        stats['requests'] += 1
+        stats['session_queries'] += _session_queries(captured.captured_queries)
+        return response
+
+    def _otp_flow(self, stats, user):
+        client = Client()
+        mail.outbox = []
+        self._request(stats, client, 'post', reverse('core:password_reset'), email=user.email)
+        if not mail.outbox:
+            raise CommandError("No OTP email was sent")
+        otp = client.session['otp']
+        # The OTP must be in the database, never in the (readable) cookie
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+        stats['otp_in_cookie'] = stats.get('otp_in_cookie', False) or otp in cookie or ':' in cookie
+        response = self._request(stats, client, 'post', reverse('core:otp_verify'), otp=otp)
+        if response.get('Location') != reverse('core:password_reset_new_password'):
+            raise CommandError("OTP was not accepted")
+        response = self._request(
+            stats, client, 'post', reverse('core:password_reset_new_password'),
+            new_password=PASSWORD, confirm_password=PASSWORD,
+        )
+        if response.get('Location') != reverse('core:login'):
+            raise CommandError("Password reset did not complete")
+
+    def _run(self, users, requests):
+        stats = {'requests': 0, 'session_queries': 0}
+        clients = []
+        started = time.perf_counter()
+        for user in users:
+            client = Client()
+            self._request(stats, client, 'post', reverse('core:login'), username=user.username, password=PASSWORD)
+            clients.append(client)
+        dashboard = reverse('core:dashboard')
+        for _ in range(requests):
+            for client in clients:
+                self._request(stats, client, 'get', dashboard)
+        for client in clients:
+            self._request(stats, client, 'get', reverse('core:logout'))
+        self._otp_flow(stats, users[0])
+        stats['seconds'] = time.perf_counter() - started
+        return stats
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+            # core.sessions refuses the development key; these users only live for the run
+            SECRET_KEY=get_random_secret_key(),
+        ):
+            users = []
+            for index in range(options['users']):
+                user = User(username=f'sessbench-{tag}-{index}', email=f'sessbench-{tag}-{index}@example.com')
+                user.set_password(PASSWORD)
+                user.save()
+                users.append(user)
+            try:
+                results = {}
+                for label, engine in ENGINES:
+                    with override_settings(SESSION_ENGINE=engine):
+                        results[label] = self._run(users, options['requests'])
+            finally:
+                User.objects.filter(username__startswith=f'sessbench-{tag}-').delete()
+
+        baseline = results['db']['session_queries'] / results['db']['requests']
+        for label, stats in results.items():
+            per_request = stats['session_queries'] / stats['requests']
+            self.stdout.write(
+                f"{label:>10}: {per_request:.2f} session queries/request "
+                f"({baseline - per_request:+.2f} saved vs db), "
+                f"{stats['seconds'] * 1000 / stats['requests']:.1f} ms/request, "
+                f"OTP kept server-side: {'no' if stats['otp_in_cookie'] else 'yes'}"
+            )
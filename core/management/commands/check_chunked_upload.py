@@ -0,0 +1,145 @@
+import gc
+import hashlib
+import os
+import tempfile
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.models import ChunkedUpload, ServiceRequest, User
+
+REQUEST_FIELDS = {
+    'vehicle_type': 'CAR', 'issue_description': 'Engine will not start', 'location': 'Upload check',
+    'latitude': '12.97', 'longitude': '77.59',
+}
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = (
+        "Upload a generated video through the chunked upload API, with a corrupted chunk, a "
+        "duplicate and a dropped connection on the way, attach it to a new service request and "
+        "compare peak Python memory (tracemalloc, in-process client included) with the one-shot "
+        "multipart POST. Creates a throwaway user and removes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--megabytes', type=int, default=32)
+        parser.add_argument('--chunk-kb', type=int, default=1024)
+
+    def _check(self, label, ok):
+        style = self.style.SUCCESS if ok else self.style.ERROR
+        self.stdout.write(style(f"{'ok' if ok else 'FAIL':>4}  {label}"))
+        if not ok:
+            raise CommandError(f"Chunked upload check failed: {label}")
+
+    def _put(self, client, url, offset, data, checksum=None):
+        checksum = hashlib.sha256(data).hexdigest() if checksum is None else checksum
+        response = client.put(
+            url, data, content_type='application/octet-stream',
+            headers={'Upload-Offset': str(offset), 'Upload-Checksum': f'sha256 {checksum}'},
+        )
+        # Test client responses keep their request (and its body) in reference
+        # cycles; collect them so the peak reflects what the server holds
+        gc.collect()
+        return response
+
+    def _chunked(self, client, path, size, chunk):
+        response = client.post(
+            reverse('core:create_upload'),
+            {'field': 'issue_video', 'filename': 'roadside.mp4', 'size': size, 'sha256': _sha256(path)},
+            content_type='application/json',
+        )
+        self._check("upload session created", response.status_code == 201)
+        url = response.json()['url']
+        with open(path, 'rb') as source:
+            first = source.read(chunk)
+            response = self._put(client, url, 0, first, checksum='0' * 64)
+            self._check(
+                "corrupted chunk rejected, offset unchanged",
+                response.status_code == 400 and client.head(url)['Upload-Offset'] == '0',
+            )
+            self._put(client, url, 0, first)
+            response = self._put(client, url, 0, first)
+            self._check(
+                "duplicate chunk refused with the current offset",
+                response.status_code == 409 and response.json()['offset'] == len(first),
+            )
+
+            # Connection drops halfway; a new client (same session) asks where to resume
+            while source.tell() < size // 2:
+                offset = source.tell()
+                self._put(client, url, offset, source.read(chunk))
+            resumed = Client()
+            resumed.cookies = client.cookies
+            offset = int(resumed.head(url)['Upload-Offset'])
+            self._check("offset survives the interruption", offset == source.tell())
+            while offset < size:
+                data = source.read(chunk)
+                response = self._put(resumed, url, offset, data)
+                offset = response.json()['offset']
+        self._check("upload complete", response.json()['status'] == 'COMPLETE')
+        return response.json()['upload_id']
+
+    def handle(self, *args, **options):
+        size = options['megabytes'] * 1024 * 1024
+        chunk = options['chunk_kb'] * 1024
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create(username=f'upload-{tag}')
+        handle, path = tempfile.mkstemp(suffix='.mp4')
+        created = []
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                for _ in range(size // (1024 * 1024)):
+                    file.write(os.urandom(1024 * 1024))
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], UPLOAD_MAX_CHUNK_BYTES=chunk):
+                client = Client()
+                client.force_login(user)
+
+                tracemalloc.start()
+                with open(path, 'rb') as video:
+                    client.post(reverse('core:create_service_request'), {
+                        **REQUEST_FIELDS, 'issue_video': SimpleUploadedFile('roadside.mp4', video.read()),
+                    })
+                multipart_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                created += ServiceRequest.objects.filter(user=user)
+
+                tracemalloc.start()
+                upload_id = self._chunked(client, path, size, chunk)
+                chunked_peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                upload = ChunkedUpload.objects.get(pk=upload_id)
+                response = client.post(
+                    reverse('core:create_service_request'), {**REQUEST_FIELDS, 'issue_video_upload': upload_id},
+                )
+                self._check("service request created", response.status_code == 302)
+                service_request = ServiceRequest.objects.filter(user=user).latest('created_at')
+                created.append(service_request)
+                self._check("request points at the assembled file", service_request.issue_video.name == upload.name)
+                self._check("assembled file matches the source", _sha256(service_request.issue_video.path) == _sha256(path))
+                self._check("upload session consumed", not ChunkedUpload.objects.filter(pk=upload_id).exists())
+        finally:
+            for service_request in created:
+                if service_request.issue_video:
+                    service_request.issue_video.delete(save=False)
+            User.objects.filter(username=f'upload-{tag}').delete()
+            os.remove(path)
+
+        self.stdout.write(
+            f"{options['megabytes']} MB video, peak Python memory: multipart POST "
+            f"{multipart_peak / 2 ** 20:.1f} MiB, chunked ({options['chunk_kb']} KiB chunks) {chunked_peak / 2 ** 20:.1f} MiB"
+        )
@@ -0,0 +1,149 @@
+import os
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, RequestFactory, override_settings
+from PIL import Image
+
+from core.images import generate_renditions
+from core.media import media_response
+from core.models import Mechanic, Payment, ServiceRequest, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the access-controlled media view: ownership rules for issue videos, payment "
+        "proofs and renditions, Range and conditional requests, and the X-Accel-Redirect / "
+        "X-Sendfile hand-offs. Creates throwaway users and files and removes them afterwards."
+    )
+
+    def _check(self, label, ok):
+        style = self.style.SUCCESS if ok else self.style.ERROR
+        self.stdout.write(style(f"{'ok' if ok else 'FAIL':>4}  {label}"))
+        return ok
+
+    def _client(self, user=None):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        return client
+
+    def _body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        owner = User.objects.create(username=f'media-{tag}-owner')
+        stranger = User.objects.create(username=f'media-{tag}-stranger')
+        staff = User.objects.create(username=f'media-{tag}-staff', is_staff=True)
+        mechanic_user = User.objects.create(username=f'media-{tag}-mechanic', is_mechanic=True)
+        mechanic = Mechanic.objects.create(
+            user=mechanic_user, specialization='General', experience_years=1, workshop_address='Media check',
+        )
+        video = os.urandom(256 * 1024)
+        image = BytesIO()
+        Image.new('RGB', (800, 600), (20, 120, 200)).save(image, 'JPEG')
+        results = []
+        files = []
+        try:
+            service_request = ServiceRequest(
+                user=owner, mechanic=mechanic, vehicle_type='CAR', issue_description='Media check', location='Here',
+            )
+            service_request.issue_video.save(f'check-{tag}.mp4', ContentFile(video), save=False)
+            service_request.issue_image.save(f'check-{tag}.jpg', ContentFile(image.getvalue()), save=False)
+            service_request.save()
+            payment = Payment(service_request=service_request, amount=100)
+            payment.payment_proof.save(f'check-{tag}.jpg', ContentFile(image.getvalue()), save=False)
+            payment.save()
+            # Another user's photo with the same name but another extension
+            png = BytesIO()
+            Image.new('RGB', (800, 600), (200, 40, 40)).save(png, 'PNG')
+            other_request = ServiceRequest(
+                user=stranger, vehicle_type='CAR', issue_description='Media check', location='There',
+            )
+            other_request.issue_image.save(f'check-{tag}.png', ContentFile(png.getvalue()), save=False)
+            other_request.save()
+            files = [
+                service_request.issue_video, service_request.issue_image, payment.payment_proof,
+                other_request.issue_image,
+            ]
+            generate_renditions(service_request.issue_image.storage, service_request.issue_image.name)
+            generate_renditions(other_request.issue_image.storage, other_request.issue_image.name)
+
+            video_url = service_request.issue_video.url
+            thumb_url = service_request.issue_image.get_thumbnail_url('thumb')
+            proof_url = payment.payment_proof.url
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                as_owner, as_mechanic = self._client(owner), self._client(mechanic_user)
+                as_stranger, as_staff = self._client(stranger), self._client(staff)
+
+                response = as_owner.get(video_url)
+                results.append(self._check(
+                    "owner reads the issue video", response.status_code == 200 and self._body(response) == video,
+                ))
+                results.append(self._check("assigned mechanic reads it", as_mechanic.get(video_url).status_code == 200))
+                results.append(self._check("staff reads it", as_staff.get(video_url).status_code == 200))
+                results.append(self._check("other users get 404", as_stranger.get(video_url).status_code == 404))
+                results.append(self._check(
+                    "anonymous visitors are sent to log in", self._client().get(video_url).status_code == 302,
+                ))
+                results.append(self._check("payment proof follows its service request", (
+                    as_mechanic.get(proof_url).status_code, as_stranger.get(proof_url).status_code) == (200, 404)))
+                results.append(self._check("renditions follow their original", thumb_url.endswith('.thumb.webp') and (
+                    as_owner.get(thumb_url).status_code, as_stranger.get(thumb_url).status_code) == (200, 404)))
+                other_thumb_url = other_request.issue_image.get_thumbnail_url('thumb')
+                results.append(self._check("same-named originals keep separate renditions", (
+                    other_thumb_url != thumb_url and as_owner.get(thumb_url).status_code == 200
+                    and (as_owner.get(other_thumb_url).status_code, as_stranger.get(other_thumb_url).status_code)
+                    == (404, 200))))
+                results.append(self._check("partial uploads are never served", as_staff.get(
+                    f'{settings.MEDIA_URL}uploads/partial/{uuid.uuid4()}.part').status_code == 404))
+
+                response = as_owner.get(video_url, headers={'Range': 'bytes=1000-1999'})
+                results.append(self._check("Range: 206 with exactly the requested bytes", (
+                    response.status_code == 206 and self._body(response) == video[1000:2000]
+                    and response['Content-Range'] == f'bytes 1000-1999/{len(video)}')))
+                response = as_owner.get(video_url, headers={'Range': 'bytes=-500'})
+                results.append(self._check(
+                    "suffix Range", response.status_code == 206 and self._body(response) == video[-500:],
+                ))
+                response = as_owner.get(video_url, headers={'Range': f'bytes={len(video)}-'})
+                results.append(self._check("unsatisfiable Range: 416", response.status_code == 416))
+                etag = as_owner.head(video_url)['ETag']
+                response = as_owner.get(video_url, headers={'If-None-Match': etag})
+                results.append(self._check("If-None-Match: 304", response.status_code == 304))
+                response = as_owner.get(video_url, headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+                results.append(self._check(
+                    "stale If-Range: whole file", response.status_code == 200 and self._body(response) == video,
+                ))
+                # The test client rewraps streaming content, so look at the view's own response
+                response = media_response(RequestFactory().get(video_url), service_request.issue_video.name)
+                results.append(self._check(
+                    "streamed from a real file (sendfile-able)", hasattr(response.file_to_stream, 'fileno'),
+                ))
+                response.close()
+
+                with override_settings(MEDIA_SENDFILE='nginx'):
+                    response = as_owner.get(video_url)
+                    results.append(self._check("nginx: X-Accel-Redirect, no body", (
+                        response['X-Accel-Redirect'] == f'/protected-media/{service_request.issue_video.name}'
+                        and not response.content)))
+                    results.append(self._check(
+                        "nginx: still access-controlled", as_stranger.get(video_url).status_code == 404,
+                    ))
+                with override_settings(MEDIA_SENDFILE='xsendfile'):
+                    response = as_owner.get(video_url)
+                    results.append(self._check(
+                        "xsendfile: X-Sendfile path", response['X-Sendfile'] == service_request.issue_video.path,
+                    ))
+        finally:
+            for file in files:
+                file.delete(save=False)
+            User.objects.filter(username__startswith=f'media-{tag}-').delete()
+
+        if not all(results):
+            raise CommandError("Media access check failed")
+        self.stdout.write(self.style.SUCCESS("Media serving behaves as expected."))
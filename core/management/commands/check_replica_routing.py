@@ -0,0 +1,103 @@
+import json
+import sqlite3
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.db.routing import PIN_COOKIE, REPLICA, reset_lag_cache, write_heartbeat
+from core.models import Mechanic, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Check replica routing against two local SQLite databases (DATABASE_URL and "
+        "REPLICA_DATABASE_URL), copying the primary onto the replica to stand in for "
+        "replication: reads go to the replica, a client's own writes pin it to the "
+        "primary, and a lagging replica falls back to the primary."
+    )
+
+    def _replicate(self):
+        # Stand-in for streaming replication: copy the whole primary file over the replica
+        connections[REPLICA].close()
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        target = sqlite3.connect(settings.DATABASES[REPLICA]['NAME'])
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def _served_by(self, client, url):
+        reset_lag_cache()
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"GET {url} returned {response.status_code}")
+        # Only app tables are routed; the session and user lookups always hit the primary
+        reads = {
+            alias: sum('"core_locationhistory"' in query['sql'] for query in captured.captured_queries)
+            for alias, captured in (('default', primary), (REPLICA, replica))
+        }
+        return max(reads, key=reads.get) if any(reads.values()) else None
+
+    def _check(self, label, actual, expected):
+        ok = actual == expected
+        style = self.style.SUCCESS if ok else self.style.ERROR
+        self.stdout.write(style(f"{'ok' if ok else 'FAIL':>4}  {label}: got {actual}, expected {expected}"))
+        return ok
+
+    def handle(self, *args, **options):
+        if REPLICA not in settings.DATABASES:
+            raise CommandError("No replica configured; set REPLICA_DATABASE_URL")
+        if {connections['default'].vendor, connections[REPLICA].vendor} != {'sqlite'}:
+            raise CommandError("Replication is simulated by copying SQLite files; point both URLs at SQLite")
+
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create(username=f'replica-{tag}', is_mechanic=True)
+        mechanic = Mechanic.objects.create(
+            user=user, specialization='General', experience_years=1, workshop_address='Replica check',
+            latitude=12.97, longitude=77.59,
+        )
+        history_url = reverse('core:get_location_history', args=[mechanic.pk])
+        update_url = reverse('core:update_mechanic_location')
+        results = []
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                client = Client()
+                client.force_login(user)
+
+                write_heartbeat()
+                self._replicate()
+                results.append(self._check("fresh replica", self._served_by(client, history_url), REPLICA))
+
+                response = client.post(
+                    update_url, json.dumps({'latitude': 12.98, 'longitude': 77.6}), content_type='application/json',
+                )
+                results.append(self._check("pin cookie set", PIN_COOKIE in response.cookies, True))
+                results.append(self._check("read after own write", self._served_by(client, history_url), 'default'))
+                history = json.loads(client.get(history_url).content)['location_history']
+                results.append(self._check("own write visible", bool(history), True))
+
+                del client.cookies[PIN_COOKIE]
+                write_heartbeat()
+                self._replicate()
+                results.append(self._check("pin expired", self._served_by(client, history_url), REPLICA))
+
+                with override_settings(REPLICA_MAX_LAG_SECONDS=0.5):
+                    write_heartbeat()
+                    time.sleep(1)  # primary moves on, replica does not catch up
+                    results.append(self._check("lagging replica", self._served_by(client, history_url), 'default'))
+        finally:
+            User.objects.filter(username=f'replica-{tag}').delete()
+            reset_lag_cache()
+
+        if not all(results):
+            raise CommandError("Replica routing check failed")
+        self.stdout.write(self.style.SUCCESS("Replica routing behaves as expected."))
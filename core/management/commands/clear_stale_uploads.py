@@ -0,0 +1,17 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.uploads import clear_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Remove chunked uploads (and their files) untouched for UPLOAD_SESSION_TTL_HOURS and never attached."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=None, help="Override UPLOAD_SESSION_TTL_HOURS.")
+
+    def handle(self, *args, **options):
+        older_than = timedelta(hours=options['hours']) if options['hours'] is not None else None
+        removed = clear_stale_uploads(older_than)
+        self.stdout.write(f"Removed {removed} stale upload(s)")
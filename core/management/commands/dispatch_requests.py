@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.dispatch import run_dispatch
+
+
+class Command(BaseCommand):
+    help = "Assign available mechanics to unassigned PENDING service requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--region', nargs=4, type=float, metavar=('MIN_LAT', 'MAX_LAT', 'MIN_LNG', 'MAX_LNG'),
+                            help="Only dispatch requests and mechanics inside this bounding box.")
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Repeat every INTERVAL seconds instead of running once.")
+        parser.add_argument('--dry-run', action='store_true', help="Plan assignments without writing them.")
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            assignments = run_dispatch(region=options['region'], dry_run=options['dry_run'])
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for assignment in assignments:
+                self.stdout.write(
+                    f"Request #{assignment.request_id} -> mechanic #{assignment.mechanic_id} "
+                    f"({assignment.distance_km} km)"
+                )
+            verb = "Planned" if options['dry_run'] else "Assigned"
+            self.stdout.write(self.style.SUCCESS(f"{verb} {len(assignments)} request(s) in {elapsed_ms:.1f} ms"))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
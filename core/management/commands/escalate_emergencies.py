@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.emergency import escalate_due_emergencies
+
+
+class Command(BaseCommand):
+    help = "Widen the search radius of emergency requests nobody has accepted yet, retrying the widest one."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Repeat every INTERVAL seconds instead of running once.")
+
+    def handle(self, *args, **options):
+        while True:
+            escalated = escalate_due_emergencies()
+            if escalated:
+                self.stdout.write(f"Escalated {escalated} emergency request(s)")
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
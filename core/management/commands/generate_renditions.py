@@ -0,0 +1,63 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.images import RenditionImageField, generate_renditions, get_pool, rendition_name, rendition_sizes
+
+
+def _size(storage, name):
+    try:
+        return storage.size(name)
+    except OSError:
+        return 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Write missing renditions of every image stored in a RenditionImageField "
+        "(all of them with --force) using the rendition worker pool, and report the bytes "
+        "a page saves by serving each rendition instead of the original."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rewrite renditions that already exist.")
+
+    def _images(self):
+        for model in apps.get_models():
+            for field in model._meta.get_fields():
+                if not isinstance(field, RenditionImageField):
+                    continue
+                names = model._default_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                for name in names.values_list(field.name, flat=True).distinct():
+                    yield field.storage, name
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        jobs = [
+            (storage, name, get_pool().submit(generate_renditions, storage, name, options['force']))
+            for storage, name in self._images()
+        ]
+        written, failed = 0, 0
+        original_bytes, rendition_bytes = 0, dict.fromkeys(rendition_sizes(), 0)
+        for storage, name, job in jobs:
+            try:
+                written += len(job.result())
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"{name}: {exc}")
+                continue
+            original_bytes += _size(storage, name)
+            for size in rendition_bytes:
+                rendition_bytes[size] += _size(storage, rendition_name(name, size))
+
+        self.stdout.write(
+            f"{len(jobs)} image(s), {written} rendition(s) written, {failed} failed "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        if jobs and original_bytes:
+            for size, total in sorted(rendition_bytes.items(), key=lambda item: item[1]):
+                self.stdout.write(
+                    f"{size:>8} webp: {total / 1024:.1f} KiB vs {original_bytes / 1024:.0f} KiB originals "
+                    f"({total / original_bytes:.1%})"
+                )
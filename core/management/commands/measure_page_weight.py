@@ -0,0 +1,86 @@
+import os
+import re
+import shutil
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.models import Mechanic, User
+
+STATIC_REFERENCE = re.compile(r'(?:href|src)="(/?{}[^"?#]+)"')
+
+
+class Command(BaseCommand):
+    help = (
+        "Collect static files into a temporary STATIC_ROOT, render the login page, the user "
+        "dashboard and the mechanic earnings page with DEBUG off, and total the HTML and the "
+        "local static requests each one makes, as sent to a browser accepting br/gzip. Files "
+        "the app does not serve itself are counted at their source size. Creates throwaway "
+        "users and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-collect', action='store_true', help="Measure without running collectstatic")
+
+    def _body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def _measure(self, client, url):
+        response = client.get(url)
+        html = self._body(response)
+        pattern = STATIC_REFERENCE.pattern.format(re.escape(settings.STATIC_URL.lstrip('/')))
+        references = sorted(set(re.findall(pattern, html.decode())))
+        transferred = original = immutable = 0
+        for reference in references:
+            path = '/' + reference.lstrip('/')
+            response = client.get(path, headers={'Accept-Encoding': 'br, gzip'})
+            if response.status_code == 200:
+                transferred += len(self._body(response))
+                original += len(self._body(client.get(path)))
+                immutable += 'immutable' in response.get('Cache-Control', '')
+            else:
+                source = finders.find(path[len('/' + settings.STATIC_URL.lstrip('/')):])
+                size = os.path.getsize(source) if source else 0
+                transferred += size
+                original += size
+        return len(html), len(references), original, transferred, immutable
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        user = User.objects.create(username=f'weight-{tag}-user')
+        mechanic_user = User.objects.create(username=f'weight-{tag}-mechanic', is_mechanic=True)
+        Mechanic.objects.create(
+            user=mechanic_user, specialization='General', experience_years=1, workshop_address='Page weight',
+        )
+        static_root = tempfile.mkdtemp()
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'], DEBUG=False, STATIC_ROOT=static_root,
+            ):
+                if not options['no_collect']:
+                    call_command('collectstatic', interactive=False, verbosity=0)
+                anonymous, as_user, as_mechanic = Client(), Client(), Client()
+                as_user.force_login(user)
+                as_mechanic.force_login(mechanic_user)
+                pages = [
+                    ('login', anonymous, reverse('core:login')),
+                    ('user dashboard', as_user, reverse('core:dashboard')),
+                    ('mechanic earnings', as_mechanic, reverse('core:earnings')),
+                ]
+                self.stdout.write(
+                    f"{'page':<20}{'HTML':>9}{'static requests':>17}{'static bytes':>14}{'sent':>9}{'immutable':>11}"
+                )
+                for label, client, url in pages:
+                    html, requests, original, transferred, immutable = self._measure(client, url)
+                    self.stdout.write(
+                        f"{label:<20}{html:>9}{requests:>17}{original:>14}{transferred:>9}{immutable:>11}"
+                    )
+        finally:
+            shutil.rmtree(static_root, ignore_errors=True)
+            User.objects.filter(username__startswith=f'weight-{tag}-').delete()
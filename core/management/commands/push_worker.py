@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.push import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Send queued push notifications in multicast batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Repeat every INTERVAL seconds instead of running once.")
+        parser.add_argument('--limit', type=int, default=None, help="Deliveries claimed per round.")
+
+    def handle(self, *args, **options):
+        while True:
+            stats = deliver_pending(limit=options['limit'])
+            if stats.batches:
+                self.stdout.write(
+                    f"Sent {stats.sent}, invalid {stats.invalid}, retrying {stats.retried}, "
+                    f"failed {stats.failed} in {stats.batches} batch(es)"
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
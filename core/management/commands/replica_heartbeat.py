@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.db.routing import write_heartbeat
+
+
+class Command(BaseCommand):
+    help = (
+        "Keep rewriting the replication heartbeat on the primary. The replica router "
+        "measures replica lag from how old the replicated copy of this row is."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds between heartbeats; 0 writes one and exits.")
+
+    def handle(self, *args, **options):
+        while True:
+            write_heartbeat()
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
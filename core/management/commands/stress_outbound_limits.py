@@ -0,0 +1,67 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ratelimit import LimiterStore, OutboundLimiter, RateLimited
+
+
+def _worker(store_path, concurrency, wait, hold, calls, results):
+    limiter = OutboundLimiter(
+        'stress', LimiterStore(store_path), rate=1000, burst=1000, concurrency=concurrency, wait=wait, lease=30,
+    )
+    outcome = {'ok': 0, 'limited': 0, 'peak': 0}
+    for _ in range(calls):
+        try:
+            with limiter.limit(os.getpid()):
+                outcome['peak'] = max(outcome['peak'], limiter.active())
+                time.sleep(hold)
+            outcome['ok'] += 1
+        except RateLimited:
+            outcome['limited'] += 1
+    results.put(outcome)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run many processes against one outbound concurrency cap (in a throwaway "
+        "limiter store) and check that no more than the cap ever run at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=16)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--calls', type=int, default=5, help="Calls per process.")
+        parser.add_argument('--hold', type=float, default=0.05, help="Seconds each call holds its slot.")
+        parser.add_argument('--wait', type=float, default=0.5, help="Seconds a caller waits for a slot.")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            store_path = os.path.join(directory, 'limits.sqlite3')
+            results = multiprocessing.Queue()
+            workers = [
+                multiprocessing.Process(target=_worker, args=(
+                    store_path, options['concurrency'], options['wait'], options['hold'], options['calls'], results,
+                ))
+                for _ in range(options['processes'])
+            ]
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            outcomes = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+
+        ok = sum(outcome['ok'] for outcome in outcomes)
+        limited = sum(outcome['limited'] for outcome in outcomes)
+        peak = max(outcome['peak'] for outcome in outcomes)
+        self.stdout.write(
+            f"{ok} calls ran, {limited} got retry-after, peak concurrency {peak}/{options['concurrency']} "
+            f"in {elapsed:.2f}s"
+        )
+        if peak > options['concurrency']:
+            raise CommandError("Concurrency cap was exceeded")
+        self.stdout.write(self.style.SUCCESS("Concurrency cap held across processes."))
@@ -0,0 +1,181 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from .images import rendition_original
+from .models import Mechanic, Payment, ServiceRequest, User, Vehicle
+
+# Access-controlled media (served at MEDIA_URL by core.media_views). Every
+# upload directory maps to the model that owns its files and a rule for who
+# may read them; anything else under MEDIA_ROOT, such as partial chunked
+# uploads, is never served.
+#
+# The bytes themselves go out one of three ways (MEDIA_SENDFILE):
+#   'nginx'     X-Accel-Redirect to MEDIA_ACCEL_REDIRECT_PREFIX, an
+#               `internal` nginx location aliased to MEDIA_ROOT
+#   'xsendfile' X-Sendfile with the absolute path (Apache mod_xsendfile,
+#               lighttpd)
+#   None        FileResponse from Python. Range and conditional requests
+#               are answered here. The WSGI server's file_wrapper can
+#               sendfile() the bytes (gunicorn does), so Python never
+#               copies them.
+# With a front-end server, the server answers Range and conditional
+# requests itself.
+
+
+def _is_party(user, service_request):
+    return user.id == service_request.user_id or (
+        service_request.mechanic is not None and user.id == service_request.mechanic.user_id
+    )
+
+
+def _vehicle_reader(user, vehicle):
+    return user.id == vehicle.user_id or vehicle.service_requests.filter(mechanic__user=user).exists()
+
+
+# Directory -> (model, field, select_related, may the user read it?)
+MEDIA_RULES = {
+    'issue_images/': (ServiceRequest, 'issue_image', ['mechanic'], _is_party),
+    'issue_videos/': (ServiceRequest, 'issue_video', ['mechanic'], _is_party),
+    'issue_files/': (ServiceRequest, 'issue_file', ['mechanic'], _is_party),
+    'payment_proofs/': (
+        Payment, 'payment_proof', ['service_request__mechanic'],
+        lambda user, payment: _is_party(user, payment.service_request),
+    ),
+    # Avatars appear next to requests, reviews and chats of other users
+    'profile_pics/': (User, 'profile_picture', [], lambda user, owner: True),
+    'id_proofs/': (User, 'id_proof_image', [], lambda user, owner: user.id == owner.id),
+    'mechanic_id_proofs/': (
+        Mechanic, 'mechanic_id_proof_image', [], lambda user, mechanic: user.id == mechanic.user_id,
+    ),
+    'vehicle_images/': (Vehicle, 'image', [], _vehicle_reader),
+}
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _owner(model, field, related, name):
+    objects = model._default_manager.select_related(*related)
+    return objects.filter(**{field: name}).first()
+
+
+def can_read(user, name):
+    """Whether `user` may read the media file `name` (a path relative to MEDIA_ROOT)."""
+    if not user.is_authenticated or '..' in name.split('/'):
+        return False
+    # A rendition (core.images) is readable by whoever may read its original
+    original = rendition_original(name)
+    if original is not None:
+        name = original
+    directory = name.split('/', 1)[0] + '/'
+    if directory not in MEDIA_RULES:
+        return False
+    model, field, related, rule = MEDIA_RULES[directory]
+    owner = _owner(model, field, related, name)
+    if owner is None:
+        return False
+    return user.is_staff or rule(user, owner)
+
+
+class _FileRange:
+    """The bytes [start, start + length) of an open file, for FileResponse."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        # Lets sendfile() start at the current offset and stop at Content-Length
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _byte_range(header, size):
+    """(start, end) for a single-range header; None to send it all; False if unsatisfiable."""
+    match = RANGE.match(header.replace(' ', ''))
+    if match is None:
+        # Malformed or multiple ranges: a full response is a valid answer
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def media_response(request, name):
+    """Response that delivers MEDIA_ROOT/`name`, which the caller has authorised."""
+    path = default_storage.path(name)
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    content_type, encoding = mimetypes.guess_type(path)
+    if content_type is None or encoding:
+        # e.g. a .tar.gz is sent as stored, never as Content-Encoding
+        content_type = 'application/octet-stream'
+    backend = getattr(settings, 'MEDIA_SENDFILE', None)
+
+    if backend in ('nginx', 'xsendfile'):
+        response = HttpResponse(content_type=content_type)
+        if backend == 'nginx':
+            prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix + quote(name)
+        else:
+            response['X-Sendfile'] = path
+    else:
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+        if conditional is not None:
+            return conditional
+
+        byte_range = None
+        if 'Range' in request.headers:
+            if_range = request.headers.get('If-Range')
+            # A Range for another version of the file is ignored, and the whole file sent
+            if not if_range or if_range == etag or parse_http_date_safe(if_range) == int(stat.st_mtime):
+                byte_range = _byte_range(request.headers['Range'], stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+        start, end = byte_range or (0, stat.st_size - 1)
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+        else:
+            response = FileResponse(_FileRange(open(path, 'rb'), start, end - start + 1), content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        if byte_range:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+
+    response['Cache-Control'] = 'private, max-age=3600'
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -0,0 +1,15 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+
+from .media import can_read, media_response
+
+
+@login_required
+def serve_media(request, name):
+    # Files the user may not read look the same as files that do not exist
+    if request.method not in ('GET', 'HEAD') or not can_read(request.user, name):
+        raise Http404("Media not found")
+    response = media_response(request, name)
+    if response is None:
+        raise Http404("Media not found")
+    return response
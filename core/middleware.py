@@ -1,25 +1,58 @@
-from django.utils import translation
+from pathlib import Path
+
 from django.conf import settings
+from django.utils import translation
+
+# Session key the language is remembered under (Django dropped its own
+# translation.LANGUAGE_SESSION_KEY constant in 4.0)
+LANGUAGE_SESSION_KEY = 'django_language'
+
+
+def project_languages():
+    """Language codes that have a compiled catalog under LOCALE_PATHS."""
+    codes = {settings.LANGUAGE_CODE}
+    for locale_path in settings.LOCALE_PATHS:
+        codes.update(path.parent.parent.name for path in Path(locale_path).glob('*/LC_MESSAGES/django.mo'))
+    return sorted(codes)
+
+
+def remember_language(request, language):
+    """Store `language` in the session, only if it differs from what is stored."""
+    if request.session.get(LANGUAGE_SESSION_KEY) != language:
+        request.session[LANGUAGE_SESSION_KEY] = language
+
 
 class LanguageMiddleware:
+    """
+    Activate the signed-in user's preferred_language for the request (the
+    user object is already loaded by AuthenticationMiddleware, so this costs
+    no query); anonymous visitors get the language remembered in their
+    session, if they have one, or LANGUAGE_CODE. The session is written only
+    when the remembered language actually changes, so ordinary requests
+    leave it clean and SessionMiddleware skips the UPDATE.
+
+    Must come after AuthenticationMiddleware.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
+        # Django keeps one parsed catalog per language per process; load the
+        # project's now so no request pays for parsing the .mo files
+        for language in project_languages():
+            with translation.override(language):
+                translation.gettext('')
 
     def __call__(self, request):
         if request.user.is_authenticated:
-            # Get the user's preferred language from their profile
-            user_language = request.user.preferred_language
-            
-            # If the user has a preferred language and it's different from the current active language
-            if user_language and user_language != translation.get_language():
-                translation.activate(user_language)
-                request.session[translation.LANGUAGE_SESSION_KEY] = user_language
+            language = request.user.preferred_language or settings.LANGUAGE_CODE
+            remember_language(request, language)
+        elif settings.SESSION_COOKIE_NAME in request.COOKIES:
+            language = request.session.get(LANGUAGE_SESSION_KEY, settings.LANGUAGE_CODE)
         else:
-            # If user is not authenticated, use the language from the session or default
-            if translation.LANGUAGE_SESSION_KEY in request.session:
-                translation.activate(request.session[translation.LANGUAGE_SESSION_KEY])
-            else:
-                translation.activate(settings.LANGUAGE_CODE) # Fallback to default
+            language = settings.LANGUAGE_CODE
 
+        translation.activate(language)
+        request.LANGUAGE_CODE = translation.get_language()
         response = self.get_response(request)
+        response.headers.setdefault('Content-Language', request.LANGUAGE_CODE)
         return response
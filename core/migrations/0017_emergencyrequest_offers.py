@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:03
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_mechanic_mechanic_id_proof_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('SERVICE_REQUEST', 'Service Request'), ('STATUS_UPDATE', 'Status Update'), ('PAYMENT', 'Payment'), ('REVIEW', 'Review'), ('EMERGENCY', 'Emergency')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='EmergencyRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DISPATCHED', 'Dispatched'), ('RESOLVED', 'Resolved'), ('CANCELLED', 'Cancelled')], default='PENDING', max_length=20)),
+                ('ring', models.PositiveSmallIntegerField(default=0, help_text='Index of the search radius ring currently being offered')),
+                ('ring_opened_at', models.DateTimeField(blank=True, null=True)),
+                ('first_offer_latency_ms', models.FloatField(blank=True, help_text='Milliseconds from creation to the first mechanic offer', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('accepted_at', models.DateTimeField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('mechanic', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_emergency_requests', to='core.mechanic')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='emergency_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EmergencyOffer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('distance_km', models.FloatField()),
+                ('ring', models.PositiveSmallIntegerField(default=0)),
+                ('offered_at', models.DateTimeField(auto_now_add=True)),
+                ('emergency_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers', to='core.emergencyrequest')),
+                ('mechanic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='emergency_offers', to='core.mechanic')),
+            ],
+            options={
+                'ordering': ['distance_km'],
+                'unique_together': {('emergency_request', 'mechanic')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_emergencyrequest_offers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mechanic',
+            name='service_radius_km',
+            field=models.FloatField(default=25.0, help_text='Only pending requests within this distance are shown'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['status', 'mechanic', 'created_at'], name='sr_status_mechanic_created'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['status', 'mechanic', 'latitude', 'longitude'], name='sr_status_mechanic_coords'),
+        ),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+# Texts of the parameterless templates when this migration was written; copied
+# so that later edits to core.notification_templates cannot change what it does
+TEMPLATES = {
+    'service_request.mechanic': (
+        'New Request Received',
+        'A new service request is available near your area.',
+    ),
+    'service_request.user': (
+        'Request Created Successfully',
+        'Your service request has been created successfully.',
+    ),
+    'status.PENDING': (
+        'Request Under Review',
+        'Your request is being reviewed by our team.',
+    ),
+    'status.ACCEPTED': (
+        'Mechanic Accepted Request',
+        'A mechanic has accepted your request! They will contact you soon.',
+    ),
+    'status.IN_PROGRESS': (
+        'Mechanic On The Way',
+        'Your assigned mechanic is en route to your location.',
+    ),
+    'status.COMPLETED': (
+        'Service Completed Successfully',
+        'Your service has been completed successfully. Please provide feedback.',
+    ),
+    'status.CANCELLED': (
+        'Request Cancelled',
+        'Your service request has been cancelled.',
+    ),
+    'payment.mechanic.PAID': (
+        'Payment Received Successfully',
+        'Payment for your last service has been credited to your wallet.',
+    ),
+    'payment.mechanic.FAILED': (
+        'Payment Failed',
+        'User’s payment for a completed service has failed.',
+    ),
+    'payment.user.PAID': (
+        'Payment Successful',
+        'Your payment was processed securely.',
+    ),
+    'payment.user.FAILED': (
+        'Payment Failed',
+        'Payment failed. Please try again or use another method.',
+    ),
+    'review.mechanic': (
+        'User Feedback Received',
+        'You’ve received feedback from a recent service.',
+    ),
+    'profile_updated.mechanic': (
+        'Profile Updated Successfully',
+        'Your profile information has been updated.',
+    ),
+    'profile_updated.user': (
+        'Profile Updated Successfully',
+        'Your profile details have been updated.',
+    ),
+    'password_changed.mechanic': (
+        'Password Changed Successfully',
+        'Your account password has been updated.',
+    ),
+    'password_changed.user': (
+        'Password Changed Successfully',
+        'Your password has been updated for account security.',
+    ),
+    'logout': (
+        'Logout Successful',
+        'You’ve logged out safely. See you again soon!',
+    ),
+    'feedback_submitted': (
+        'Feedback Submitted',
+        'Thanks for your valuable feedback!',
+    ),
+    'invoice.mechanic': (
+        'Invoice Generated',
+        'Invoice for this service has been generated and sent to the user.',
+    ),
+    'invoice.user': (
+        'Invoice Generated',
+        'Invoice generated for your completed service. Check your email.',
+    ),
+    'rating_updated': (
+        'Rating Updated',
+        'Your average rating has been updated.',
+    ),
+}
+
+
+def compact_existing_notifications(apps, schema_editor):
+    # Rows whose text exactly matches a parameterless template keep only the key
+    Notification = apps.get_model('core', 'Notification')
+    for template_key, (title, message) in TEMPLATES.items():
+        Notification.objects.filter(template_key='', title=title, message=message).update(
+            template_key=template_key, title='', message='',
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_push_delivery_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='params',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='template_key',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='title',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(compact_existing_notifications, migrations.RunPython.noop),
+    ]
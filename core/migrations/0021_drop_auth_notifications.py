@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:05
+
+from django.db import migrations
+from django.db.models import Q
+
+# Copied from core.notification_templates when this migration was written, so
+# later edits there cannot change which rows it drops
+WELCOME_MESSAGES = [
+    "Welcome back to MechResQ! Ready to assist stranded users.",
+    "Welcome back! We’re ready to assist you.",
+]
+LOGOUT_TITLE = "Logout Successful"
+LOGOUT_MESSAGE = "You’ve logged out safely. See you again soon!"
+
+
+def drop_auth_notifications(apps, schema_editor):
+    # Welcome/logout notices are now session messages; the stored copies
+    # (keyed rows, and free-text rows from before template keys) are dropped
+    Notification = apps.get_model('core', 'Notification')
+    Notification.objects.filter(
+        Q(template_key__in=['welcome.mechanic', 'welcome.user', 'logout'])
+        | Q(template_key='', title__startswith='Welcome ', message__in=WELCOME_MESSAGES)
+        | Q(template_key='', title=LOGOUT_TITLE, message=LOGOUT_MESSAGE)
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_notification_templates'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_auth_notifications, migrations.RunPython.noop),
+    ]
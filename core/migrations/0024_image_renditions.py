@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:44
+
+import core.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_replication_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mechanic',
+            name='mechanic_id_proof_image',
+            field=core.images.RenditionImageField(blank=True, null=True, upload_to='mechanic_id_proofs/'),
+        ),
+        migrations.AlterField(
+            model_name='servicerequest',
+            name='issue_image',
+            field=core.images.RenditionImageField(blank=True, null=True, upload_to='issue_images/'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id_proof_image',
+            field=core.images.RenditionImageField(blank=True, null=True, upload_to='id_proofs/'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=core.images.RenditionImageField(blank=True, null=True, upload_to='profile_pics/'),
+        ),
+        migrations.AlterField(
+            model_name='vehicle',
+            name='image',
+            field=core.images.RenditionImageField(blank=True, null=True, upload_to='vehicle_images/'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_chunked_upload'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='servicerequest',
+            name='sr_unassigned_status_created',
+        ),
+    ]
@@ -1,10 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
-from django.utils import timezone
+from django.utils import timezone, translation
 from decimal import Decimal
+import uuid
 from django.conf import settings # Import settings
-from geopy.distance import geodesic # Import geodesic for distance calculation
+from .images import RenditionImageField
+from .issue_matcher import get_issue_matcher
+from .notification_templates import NOTIFICATION_TEMPLATES, render_notification
 
 # Define language choices based on settings.LANGUAGES
 LANGUAGE_CHOICES = settings.LANGUAGES
@@ -15,200 +18,119 @@ class Notification(models.Model):
         ('STATUS_UPDATE', 'Status Update'),
         ('PAYMENT', 'Payment'),
         ('REVIEW', 'Review'),
+        ('EMERGENCY', 'Emergency'),
     ]
 
     recipient = models.ForeignKey('User', on_delete=models.CASCADE, related_name='notifications')
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
-    title = models.CharField(max_length=255)
-    message = models.TextField()
+    # Key into core.notification_templates plus its format params; the text is
+    # rendered when shown, in the reader's language
+    template_key = models.CharField(max_length=40, blank=True, default='')
+    params = models.JSONField(blank=True, default=dict)
+    # Pre-rendered English text, only set on rows created before templates
+    title = models.CharField(max_length=255, blank=True, default='')
+    message = models.TextField(blank=True, default='')
     read = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread badge count on every page
+            models.Index(fields=['recipient', 'read'], name='notif_recipient_read'),
+        ]
 
     def __str__(self):
-        return f"{self.notification_type} - {self.title}"
+        return f"{self.notification_type} - {self.display_title}"
+
+    def render(self, language=None):
+        """(title, message) in `language`, or in the active language when None."""
+        if not self.template_key:
+            return self.title, self.message
+        if language:
+            with translation.override(language):
+                return render_notification(self.template_key, self.params)
+        return render_notification(self.template_key, self.params)
+
+    @property
+    def display_title(self):
+        return self.render()[0]
+
+    @property
+    def display_message(self):
+        return self.render()[1]
 
     @classmethod
-    def create_service_request_notification(cls, recipient, service_request):
-        if getattr(recipient, 'is_mechanic', False):
-            title = "New Request Received"
-            message = "A new service request is available near your area."
-        else:
-            title = "Request Created Successfully"
-            message = "Your service request has been created successfully."
+    def _create_from_template(cls, recipient, notification_type, template_key, **params):
         return cls.objects.create(
             recipient=recipient,
-            notification_type='SERVICE_REQUEST',
-            title=title,
-            message=message
+            notification_type=notification_type,
+            template_key=template_key,
+            params=params,
         )
 
+    @staticmethod
+    def _role(recipient):
+        return 'mechanic' if getattr(recipient, 'is_mechanic', False) else 'user'
+
+    @classmethod
+    def create_service_request_notification(cls, recipient, service_request):
+        return cls._create_from_template(recipient, 'SERVICE_REQUEST', f'service_request.{cls._role(recipient)}')
+
     @classmethod
     def create_status_update_notification(cls, recipient, service_request):
         status = service_request.status
-        if status == 'PENDING':
-            title = "Request Under Review"
-            message = "Your request is being reviewed by our team."
-        elif status == 'ACCEPTED':
-            title = "Mechanic Accepted Request"
-            message = "A mechanic has accepted your request! They will contact you soon."
-        elif status == 'IN_PROGRESS':
-            title = "Mechanic On The Way"
-            message = "Your assigned mechanic is en route to your location."
-        elif status == 'COMPLETED':
-            title = "Service Completed Successfully"
-            message = "Your service has been completed successfully. Please provide feedback."
-        elif status == 'CANCELLED':
-            title = "Request Cancelled"
-            message = "Your service request has been cancelled."
-        else:
-            title = f"Status Update for Request #{service_request.id}"
-            message = f"Your service request status has been updated to {service_request.status}."
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='STATUS_UPDATE',
-            title=title,
-            message=message
+        if f'status.{status}' in NOTIFICATION_TEMPLATES:
+            return cls._create_from_template(recipient, 'STATUS_UPDATE', f'status.{status}')
+        return cls._create_from_template(
+            recipient, 'STATUS_UPDATE', 'status.other', request_id=service_request.id, status=status,
         )
 
     @classmethod
     def create_payment_notification(cls, recipient, payment):
-        status = payment.payment_status
-        if getattr(recipient, 'is_mechanic', False):
-            if status == 'PAID':
-                title = "Payment Received Successfully"
-                message = "Payment for your last service has been credited to your wallet."
-            elif status == 'FAILED':
-                title = "Payment Failed"
-                message = "User’s payment for a completed service has failed."
-            else:
-                title = f"Payment Update for Request #{payment.service_request.id}"
-                message = "Payment status has been updated."
-        else:
-            if status == 'PAID':
-                title = "Payment Successful"
-                message = "Your payment was processed securely."
-            elif status == 'FAILED':
-                title = "Payment Failed"
-                message = "Payment failed. Please try again or use another method."
-            else:
-                title = f"Payment Update for Request #{payment.service_request.id}"
-                message = "Payment status has been updated."
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='PAYMENT',
-            title=title,
-            message=message
-        )
+        key = f'payment.{cls._role(recipient)}.{payment.payment_status}'
+        if key in NOTIFICATION_TEMPLATES:
+            return cls._create_from_template(recipient, 'PAYMENT', key)
+        return cls._create_from_template(recipient, 'PAYMENT', 'payment.other', request_id=payment.service_request.id)
 
     @classmethod
     def create_review_notification(cls, recipient, review):
         if getattr(recipient, 'is_mechanic', False):
-            title = "User Feedback Received"
-            message = "You’ve received feedback from a recent service."
-        else:
-            title = f"New Review for Request #{review.service_request.id}"
-            message = f"You received a {review.rating}-star review."
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='REVIEW',
-            title=title,
-            message=message
+            return cls._create_from_template(recipient, 'REVIEW', 'review.mechanic')
+        return cls._create_from_template(
+            recipient, 'REVIEW', 'review.user', request_id=review.service_request.id, rating=review.rating,
         )
 
     @classmethod
     def create_profile_updated_notification(cls, recipient):
-        if getattr(recipient, 'is_mechanic', False):
-            title = "Profile Updated Successfully"
-            message = "Your profile information has been updated."
-        else:
-            title = "Profile Updated Successfully"
-            message = "Your profile details have been updated."
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='STATUS_UPDATE',
-            title=title,
-            message=message
-        )
+        return cls._create_from_template(recipient, 'STATUS_UPDATE', f'profile_updated.{cls._role(recipient)}')
 
     @classmethod
     def create_password_changed_notification(cls, recipient):
-        if getattr(recipient, 'is_mechanic', False):
-            title = "Password Changed Successfully"
-            message = "Your account password has been updated."
-        else:
-            title = "Password Changed Successfully"
-            message = "Your password has been updated for account security."
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='STATUS_UPDATE',
-            title=title,
-            message=message
-        )
+        return cls._create_from_template(recipient, 'STATUS_UPDATE', f'password_changed.{cls._role(recipient)}')
 
     @classmethod
-    def create_welcome_notification(cls, recipient):
-        if getattr(recipient, 'is_mechanic', False):
-            title = f"Welcome {recipient.get_full_name()}!"
-            message = "Welcome back to MechResQ! Ready to assist stranded users."
-        else:
-            title = f"Welcome {recipient.get_full_name()}!"
-            message = "Welcome back! We’re ready to assist you."
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='STATUS_UPDATE',
-            title=title,
-            message=message
-        )
+    def create_feedback_submitted_notification(cls, recipient):
+        return cls._create_from_template(recipient, 'REVIEW', 'feedback_submitted')
 
     @classmethod
-    def create_logout_notification(cls, recipient):
-        title = "Logout Successful"
-        message = "You’ve logged out safely. See you again soon!"
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='STATUS_UPDATE',
-            title=title,
-            message=message
-        )
+    def create_invoice_generated_notification(cls, recipient, payment):
+        return cls._create_from_template(recipient, 'PAYMENT', f'invoice.{cls._role(recipient)}')
 
     @classmethod
-    def create_feedback_submitted_notification(cls, recipient):
-        title = "Feedback Submitted"
-        message = "Thanks for your valuable feedback!"
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='REVIEW',
-            title=title,
-            message=message
-        )
+    def create_rating_updated_notification(cls, mechanic):
+        return cls._create_from_template(mechanic.user, 'REVIEW', 'rating_updated')
 
     @classmethod
-    def create_invoice_generated_notification(cls, recipient, payment):
-        if getattr(recipient, 'is_mechanic', False):
-            title = "Invoice Generated"
-            message = "Invoice for this service has been generated and sent to the user."
-        else:
-            title = "Invoice Generated"
-            message = "Invoice generated for your completed service. Check your email."
-        return cls.objects.create(
-            recipient=recipient,
-            notification_type='PAYMENT',
-            title=title,
-            message=message
-        )
+    def create_emergency_offer_notification(cls, recipient, offer):
+        return cls._create_from_template(recipient, 'EMERGENCY', 'emergency.offer', distance_km=round(offer.distance_km, 1))
 
     @classmethod
-    def create_rating_updated_notification(cls, mechanic):
-        title = "Rating Updated"
-        message = "Your average rating has been updated."
-        return cls.objects.create(
-            recipient=mechanic.user,
-            notification_type='REVIEW',
-            title=title,
-            message=message
+    def create_emergency_accepted_notification(cls, recipient, emergency_request):
+        mechanic_user = emergency_request.mechanic.user
+        return cls._create_from_template(
+            recipient, 'EMERGENCY', 'emergency.accepted',
+            mechanic_name=mechanic_user.get_full_name() or mechanic_user.username,
         )
 
 class User(AbstractUser):
@@ -219,7 +141,7 @@ class User(AbstractUser):
     )
     phone_number = models.CharField(validators=[phone_regex], max_length=17, blank=True)
     address = models.TextField(blank=True)
-    profile_picture = models.ImageField(
+    profile_picture = RenditionImageField(
         upload_to='profile_pics/', 
         null=True, 
         blank=True
@@ -235,7 +157,7 @@ class User(AbstractUser):
     
     id_proof_type = models.CharField(max_length=20, choices=ID_PROOF_CHOICES, blank=True, null=True)
     id_proof_number = models.CharField(max_length=50, blank=True, null=True)
-    id_proof_image = models.ImageField(upload_to='id_proofs/', null=True, blank=True)
+    id_proof_image = RenditionImageField(upload_to='id_proofs/', null=True, blank=True)
 
     def get_profile_picture_url(self):
         if self.profile_picture and hasattr(self.profile_picture, 'url'):
@@ -259,11 +181,12 @@ class Mechanic(models.Model):
     latitude = models.FloatField(null=True, blank=True)
     mechanic_id_proof_type = models.CharField(max_length=20, choices=ID_PROOF_CHOICES, blank=True, null=True)
     mechanic_id_proof_number = models.CharField(max_length=50, blank=True, null=True)
-    mechanic_id_proof_image = models.ImageField(upload_to='mechanic_id_proofs/', null=True, blank=True)
+    mechanic_id_proof_image = RenditionImageField(upload_to='mechanic_id_proofs/', null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
     rating = models.FloatField(default=0.0)
     base_fee = models.DecimalField(max_digits=10, decimal_places=2, default=50.00)
     preferred_language = models.CharField(max_length=10, choices=LANGUAGE_CHOICES, default='en') # New field
+    service_radius_km = models.FloatField(default=25.0, help_text="Only pending requests within this distance are shown")
 
     def __str__(self):
         return f"{self.user.username} - {self.specialization}"
@@ -282,7 +205,7 @@ class ServiceRequest(models.Model):
     vehicle = models.ForeignKey('Vehicle', on_delete=models.SET_NULL, null=True, related_name='service_requests')
     vehicle_type = models.CharField(max_length=50)
     issue_description = models.TextField()
-    issue_image = models.ImageField(upload_to='issue_images/', null=True, blank=True)
+    issue_image = RenditionImageField(upload_to='issue_images/', null=True, blank=True)
     issue_video = models.FileField(upload_to='issue_videos/', null=True, blank=True)
     issue_file = models.FileField(upload_to='issue_files/', null=True, blank=True) # New field for general file uploads
     location = models.TextField()
@@ -301,6 +224,18 @@ class ServiceRequest(models.Model):
     final_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     notes = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Requests by status and assignee (unassigned PENDING ones included), oldest first ...
+            models.Index(fields=['status', 'mechanic', 'created_at'], name='sr_status_mechanic_created'),
+            # ... and the same filter narrowed to a lat/lng bounding box (pending feed, dispatch)
+            models.Index(fields=['status', 'mechanic', 'latitude', 'longitude'], name='sr_status_mechanic_coords'),
+            # Mechanic dashboard and history: per-mechanic counts by status
+            models.Index(fields=['mechanic', 'status'], name='sr_mechanic_status'),
+            # User dashboard and history, newest first
+            models.Index(fields=['user', '-created_at'], name='sr_user_created'),
+        ]
+
     def save(self, *args, **kwargs):
         if self.status == 'COMPLETED' and not self.completed_at:
             self.completed_at = timezone.now()
@@ -310,32 +245,35 @@ class ServiceRequest(models.Model):
         if self.status != 'COMPLETED':
             self.status = 'COMPLETED'
             self.completed_at = timezone.now()
-            
-            # Calculate payment details preferring final or estimated cost
-            base_amount = (
-                self.final_cost if self.final_cost is not None
-                else (self.estimated_cost if self.estimated_cost is not None else self.calculate_service_charge())
-            )
-            service_charge = Decimal(base_amount)
-            tax = self.calculate_tax(service_charge)
-            total_amount = service_charge + tax
-            mechanic_share = self.calculate_mechanic_share(service_charge)
-            platform_fee = service_charge - mechanic_share
-
-            # Create or update payment record to avoid duplication
-            Payment.objects.update_or_create(
-                service_request=self,
-                defaults={
-                    'amount': service_charge,
-                    'service_charge': service_charge,
-                    'tax': tax,
-                    'total_amount': total_amount,
-                    'mechanic_share': mechanic_share,
-                    'platform_fee': platform_fee,
-                }
-            )
+            self.create_completion_payment()
             self.save()
 
+    def create_completion_payment(self):
+        # Calculate payment details preferring final or estimated cost
+        base_amount = (
+            self.final_cost if self.final_cost is not None
+            else (self.estimated_cost if self.estimated_cost is not None else self.calculate_service_charge())
+        )
+        service_charge = Decimal(base_amount)
+        tax = self.calculate_tax(service_charge)
+        total_amount = service_charge + tax
+        mechanic_share = self.calculate_mechanic_share(service_charge)
+        platform_fee = service_charge - mechanic_share
+
+        # Create or update payment record to avoid duplication
+        payment, _ = Payment.objects.update_or_create(
+            service_request=self,
+            defaults={
+                'amount': service_charge,
+                'service_charge': service_charge,
+                'tax': tax,
+                'total_amount': total_amount,
+                'mechanic_share': mechanic_share,
+                'platform_fee': platform_fee,
+            }
+        )
+        return payment
+
     def calculate_service_charge(self):
         base_charge = Decimal('500.00')  # Minimum service charge
 
@@ -343,6 +281,8 @@ class ServiceRequest(models.Model):
         distance_fee = Decimal('0.00')
         # Only calculate distance if both user and mechanic locations are available
         if all([self.latitude, self.longitude, self.mechanic_latitude, self.mechanic_longitude]):
+            # geopy is slow to import; only pay for it when a price is computed
+            from geopy.distance import geodesic
             user_location = (self.latitude, self.longitude)
             mechanic_location = (self.mechanic_latitude, self.mechanic_longitude)
             distance = geodesic(user_location, mechanic_location).km
@@ -361,10 +301,9 @@ class ServiceRequest(models.Model):
             elif description_length > 20:
                 problem_fee = Decimal('100.00') # Moderately complex issue
             
-            # Example: keyword-based complexity
-            keywords = ['engine failure', 'transmission', 'major repair', 'electrical fault']
-            if any(keyword in self.issue_description.lower() for keyword in keywords):
-                problem_fee += Decimal('300.00') # Additional charge for specific keywords
+            # Keyword-based complexity: one pass over the description with the
+            # compiled fault taxonomy; the heaviest matched category is added
+            problem_fee += get_issue_matcher().match(self.issue_description).score
         
         self.problem_complexity_fee = problem_fee # Store calculated problem fee
 
@@ -426,6 +365,10 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Pending cash confirmations and earnings filters
+            models.Index(fields=['payment_status', 'payment_method'], name='payment_status_method'),
+        ]
 
 class Vehicle(models.Model):
     VEHICLE_TYPES = [
@@ -447,7 +390,7 @@ class Vehicle(models.Model):
     model = models.CharField(max_length=50)
     year = models.IntegerField()
     license_plate = models.CharField(max_length=20, unique=True)
-    image = models.ImageField(upload_to='vehicle_images/', null=True, blank=True)
+    image = RenditionImageField(upload_to='vehicle_images/', null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     mileage = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -479,3 +422,123 @@ class LocationHistory(models.Model):
 
     def __str__(self):
         return f"{self.mechanic.user.username} at {self.timestamp}"
+
+
+class EmergencyRequest(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('DISPATCHED', 'Dispatched'),
+        ('RESOLVED', 'Resolved'),
+        ('CANCELLED', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='emergency_requests')
+    mechanic = models.ForeignKey(Mechanic, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_emergency_requests')
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    ring = models.PositiveSmallIntegerField(default=0, help_text="Index of the search radius ring currently being offered")
+    ring_opened_at = models.DateTimeField(null=True, blank=True)
+    first_offer_latency_ms = models.FloatField(null=True, blank=True, help_text="Milliseconds from creation to the first mechanic offer")
+    created_at = models.DateTimeField(auto_now_add=True)
+    accepted_at = models.DateTimeField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Emergency #{self.id} - {self.status}"
+
+
+class EmergencyOffer(models.Model):
+    emergency_request = models.ForeignKey(EmergencyRequest, on_delete=models.CASCADE, related_name='offers')
+    mechanic = models.ForeignKey(Mechanic, on_delete=models.CASCADE, related_name='emergency_offers')
+    distance_km = models.FloatField()
+    ring = models.PositiveSmallIntegerField(default=0)
+    offered_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['distance_km']
+        unique_together = ('emergency_request', 'mechanic')
+
+    def __str__(self):
+        return f"Emergency #{self.emergency_request_id} offered to {self.mechanic_id}"
+
+
+class PushDelivery(models.Model):
+    """One queued push for a Notification, sent in multicast batches by core.push."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='push_deliveries')
+    # Token at enqueue time, so a rejected token can be cleared only if the user still has it
+    token = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim = models.CharField(max_length=32, blank=True, default='')
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='push_due'),
+        ]
+
+    def __str__(self):
+        return f"Push for notification #{self.notification_id} ({self.status})"
+
+
+class ReplicationHeartbeat(models.Model):
+    """
+    Single row the replica_heartbeat command rewrites on the primary every
+    second. Reading it back from the replica tells how far replication lags.
+    """
+    beat_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Heartbeat at {self.beat_at}"
+
+
+class ChunkedUpload(models.Model):
+    """
+    A resumable upload of a service request's issue video or file, written
+    chunk by chunk into MEDIA_ROOT by core.uploads. Once complete, `name` is
+    the stored file a new ServiceRequest can point at.
+    """
+    FIELD_CHOICES = [
+        ('issue_video', 'Issue video'),
+        ('issue_file', 'Issue file'),
+    ]
+    STATUS_CHOICES = [
+        ('UPLOADING', 'Uploading'),
+        ('COMPLETE', 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    # Bytes received so far; the next chunk must start here
+    offset = models.BigIntegerField(default=0)
+    # SHA-256 of the whole file, if the client declared one
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='UPLOADING')
+    name = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def partial_name(self):
+        return f'uploads/partial/{self.pk}.part'
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size} bytes, {self.status})"
@@ -0,0 +1,13 @@
+from django.contrib import messages
+
+from .notification_templates import render_notification
+
+# Transient notices (welcome, logout) go through the messages framework
+# instead of the Notification table: they are shown once on the next page
+# and never stored. The text comes from the same templates as stored
+# notifications, rendered in the active language.
+
+
+def add_notice(request, template_key, level=messages.SUCCESS, **params):
+    title, message = render_notification(template_key, params)
+    messages.add_message(request, level, f"{title} — {message}")
@@ -0,0 +1,127 @@
+from django.utils.translation import gettext, gettext_noop
+
+# Notification texts, keyed by Notification.template_key. Rows store only the
+# key and a small params dict; the text is looked up in the active language's
+# catalog (locale/) and formatted with the params when it is displayed or
+# pushed. Placeholders use %-style names so translators can reorder them.
+NOTIFICATION_TEMPLATES = {
+    'service_request.mechanic': (
+        gettext_noop("New Request Received"),
+        gettext_noop("A new service request is available near your area."),
+    ),
+    'service_request.user': (
+        gettext_noop("Request Created Successfully"),
+        gettext_noop("Your service request has been created successfully."),
+    ),
+    'status.PENDING': (
+        gettext_noop("Request Under Review"),
+        gettext_noop("Your request is being reviewed by our team."),
+    ),
+    'status.ACCEPTED': (
+        gettext_noop("Mechanic Accepted Request"),
+        gettext_noop("A mechanic has accepted your request! They will contact you soon."),
+    ),
+    'status.IN_PROGRESS': (
+        gettext_noop("Mechanic On The Way"),
+        gettext_noop("Your assigned mechanic is en route to your location."),
+    ),
+    'status.COMPLETED': (
+        gettext_noop("Service Completed Successfully"),
+        gettext_noop("Your service has been completed successfully. Please provide feedback."),
+    ),
+    'status.CANCELLED': (
+        gettext_noop("Request Cancelled"),
+        gettext_noop("Your service request has been cancelled."),
+    ),
+    'status.other': (
+        gettext_noop("Status Update for Request #%(request_id)s"),
+        gettext_noop("Your service request status has been updated to %(status)s."),
+    ),
+    'payment.mechanic.PAID': (
+        gettext_noop("Payment Received Successfully"),
+        gettext_noop("Payment for your last service has been credited to your wallet."),
+    ),
+    'payment.mechanic.FAILED': (
+        gettext_noop("Payment Failed"),
+        gettext_noop("User’s payment for a completed service has failed."),
+    ),
+    'payment.user.PAID': (
+        gettext_noop("Payment Successful"),
+        gettext_noop("Your payment was processed securely."),
+    ),
+    'payment.user.FAILED': (
+        gettext_noop("Payment Failed"),
+        gettext_noop("Payment failed. Please try again or use another method."),
+    ),
+    'payment.other': (
+        gettext_noop("Payment Update for Request #%(request_id)s"),
+        gettext_noop("Payment status has been updated."),
+    ),
+    'review.mechanic': (
+        gettext_noop("User Feedback Received"),
+        gettext_noop("You’ve received feedback from a recent service."),
+    ),
+    'review.user': (
+        gettext_noop("New Review for Request #%(request_id)s"),
+        gettext_noop("You received a %(rating)s-star review."),
+    ),
+    'profile_updated.mechanic': (
+        gettext_noop("Profile Updated Successfully"),
+        gettext_noop("Your profile information has been updated."),
+    ),
+    'profile_updated.user': (
+        gettext_noop("Profile Updated Successfully"),
+        gettext_noop("Your profile details have been updated."),
+    ),
+    'password_changed.mechanic': (
+        gettext_noop("Password Changed Successfully"),
+        gettext_noop("Your account password has been updated."),
+    ),
+    'password_changed.user': (
+        gettext_noop("Password Changed Successfully"),
+        gettext_noop("Your password has been updated for account security."),
+    ),
+    'welcome.mechanic': (
+        gettext_noop("Welcome %(name)s!"),
+        gettext_noop("Welcome back to MechResQ! Ready to assist stranded users."),
+    ),
+    'welcome.user': (
+        gettext_noop("Welcome %(name)s!"),
+        gettext_noop("Welcome back! We’re ready to assist you."),
+    ),
+    'logout': (
+        gettext_noop("Logout Successful"),
+        gettext_noop("You’ve logged out safely. See you again soon!"),
+    ),
+    'feedback_submitted': (
+        gettext_noop("Feedback Submitted"),
+        gettext_noop("Thanks for your valuable feedback!"),
+    ),
+    'invoice.mechanic': (
+        gettext_noop("Invoice Generated"),
+        gettext_noop("Invoice for this service has been generated and sent to the user."),
+    ),
+    'invoice.user': (
+        gettext_noop("Invoice Generated"),
+        gettext_noop("Invoice generated for your completed service. Check your email."),
+    ),
+    'rating_updated': (
+        gettext_noop("Rating Updated"),
+        gettext_noop("Your average rating has been updated."),
+    ),
+    'emergency.offer': (
+        gettext_noop("Emergency Assistance Needed"),
+        gettext_noop("A stranded user is %(distance_km).1f km away. Accept quickly to take the job."),
+    ),
+    'emergency.accepted': (
+        gettext_noop("Help Is On The Way"),
+        gettext_noop("%(mechanic_name)s accepted your emergency request."),
+    ),
+}
+
+
+def render_notification(template_key, params):
+    """(title, message) for a template in the active language."""
+    title, message = NOTIFICATION_TEMPLATES[template_key]
+    params = params or {}
+    return gettext(title) % params, gettext(message) % params
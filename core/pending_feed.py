@@ -0,0 +1,105 @@
+from collections import namedtuple
+from math import cos, radians
+
+from django.core import signing
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+from django.utils.dateparse import parse_datetime
+
+from .geo import EARTH_RADIUS_KM, bounding_box
+from .models import ServiceRequest
+
+PendingFeedPage = namedtuple('PendingFeedPage', 'items next_cursor total')
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+_CURSOR_SALT = 'core.pending_feed'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def distance_km_expression(lat, lng):
+    """Haversine distance in km from (lat, lng) to each row's latitude/longitude, computed by the database."""
+    row_lat = Radians(F('latitude'))
+    half_dlat = (row_lat - Value(radians(lat))) / 2
+    half_dlng = (Radians(F('longitude')) - Value(radians(lng))) / 2
+    a = Power(Sin(half_dlat), 2) + Value(cos(radians(lat))) * Cos(row_lat) * Power(Sin(half_dlng), 2)
+    return ExpressionWrapper(2 * EARTH_RADIUS_KM * ASin(Sqrt(a)), output_field=FloatField())
+
+
+def _sort_key(service_request):
+    # Nearest first; among equally distant requests the one waiting longest
+    # comes first, and the id keeps the order total for cursor paging.
+    return (service_request.mechanic_distance_km, service_request.created_at.isoformat(), service_request.id)
+
+
+def encode_cursor(service_request):
+    return signing.dumps(list(_sort_key(service_request)), salt=_CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    try:
+        distance_km, created_at, request_id = signing.loads(cursor, salt=_CURSOR_SALT)
+        created_at = parse_datetime(created_at)
+    except (signing.BadSignature, TypeError, ValueError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    if created_at is None:
+        raise InvalidCursor("Invalid cursor")
+    return (distance_km, created_at, request_id)
+
+
+def pending_feed(mechanic, cursor=None, limit=DEFAULT_PAGE_SIZE, since=None):
+    """
+    Unassigned PENDING requests inside the mechanic's service radius.
+
+    The (status, mechanic, latitude, longitude) index narrows the query to
+    the radius' bounding box; the database computes the exact distance,
+    drops anything outside the circle, orders by distance then age and
+    seeks past `cursor` (the opaque token from the previous page), so each
+    page reads `limit` rows however many requests are waiting. `since`
+    limits the items to requests created after that datetime so a
+    dashboard can poll for new arrivals only; `total` always counts the
+    whole feed. Each returned request carries `distance_from_mechanic_km`.
+    """
+    if mechanic.latitude is None or mechanic.longitude is None:
+        return PendingFeedPage([], None, 0)
+
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    radius_km = mechanic.service_radius_km
+    min_lat, max_lat, min_lng, max_lng = bounding_box(mechanic.latitude, mechanic.longitude, radius_km)
+    in_range = ServiceRequest.objects.filter(
+        status='PENDING',
+        mechanic__isnull=True,
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    ).annotate(
+        mechanic_distance_km=distance_km_expression(mechanic.latitude, mechanic.longitude),
+    ).filter(mechanic_distance_km__lte=radius_km)
+
+    page = in_range
+    if since is not None:
+        page = page.filter(created_at__gt=since)
+    if cursor:
+        distance_km, created_at, request_id = decode_cursor(cursor)
+        page = page.filter(
+            Q(mechanic_distance_km__gt=distance_km)
+            | Q(mechanic_distance_km=distance_km, created_at__gt=created_at)
+            | Q(mechanic_distance_km=distance_km, created_at=created_at, id__gt=request_id)
+        )
+    items = list(page.select_related('user').order_by('mechanic_distance_km', 'created_at', 'id')[:limit + 1])
+    for service_request in items:
+        service_request.distance_from_mechanic_km = round(service_request.mechanic_distance_km, 2)
+
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return PendingFeedPage(items[:limit], next_cursor, in_range.count())
+
+
+def parse_since(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError("Invalid 'since' timestamp")
+    return parsed
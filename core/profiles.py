@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.db.models import Avg, Count
+
+from .cache import CacheAside
+from .models import Mechanic, Review, ServiceRequest
+
+# Public mechanic profile shown when a map marker is clicked. It is cached
+# per mechanic and invalidated when the mechanic, one of their reviews, or
+# the account behind the mechanic or a reviewer changes; location pings
+# (latitude/longitude-only saves) and login bookkeeping leave it alone.
+
+LOCATION_FIELDS = frozenset({'latitude', 'longitude'})
+# User fields the cached profile shows: the mechanic's and reviewers' names
+NAME_FIELDS = frozenset({'first_name', 'last_name', 'username'})
+
+
+def build_mechanic_details(mechanic_id):
+    mechanic = Mechanic.objects.select_related('user').get(pk=mechanic_id)
+    reviews = Review.objects.filter(service_request__mechanic_id=mechanic_id)
+    # Aggregate ratings across all reviews for this mechanic
+    agg = reviews.aggregate(average=Avg('rating'), total=Count('id'))
+    recent_reviews = []
+    for review in reviews.select_related('service_request__user').order_by('-created_at')[:5]:
+        reviewer = review.service_request.user
+        recent_reviews.append({
+            'rating': review.rating,
+            'comment': review.comment,
+            'created_at': review.created_at.strftime('%Y-%m-%d %H:%M'),
+            'reviewer': reviewer.get_full_name() or reviewer.username,
+        })
+
+    return {
+        'id': mechanic.id,
+        'name': mechanic.user.get_full_name() or mechanic.user.username,
+        'specialization': mechanic.specialization,
+        'experience_years': mechanic.experience_years,
+        'workshop_address': mechanic.workshop_address,
+        'available': mechanic.available,
+        'rating': float(mechanic.rating or 0),
+        'average_rating': float(round(agg['average'] or 0, 2)),
+        'total_reviews': agg['total'] or 0,
+        'base_fee': float(mechanic.base_fee),
+        'preferred_language': mechanic.preferred_language,
+        'recent_reviews': recent_reviews,
+    }
+
+
+mechanic_details_cache = CacheAside(
+    'mechanic-details', build_mechanic_details,
+    ttl=getattr(settings, 'MECHANIC_DETAILS_CACHE_TTL_SECONDS', 300),
+)
+
+
+def mechanic_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= LOCATION_FIELDS:
+        return
+    mechanic_details_cache.invalidate(instance.pk)
+
+
+def review_changed(sender, instance, **kwargs):
+    mechanic_id = ServiceRequest.objects.filter(pk=instance.service_request_id).values_list(
+        'mechanic_id', flat=True,
+    ).first()
+    mechanic_details_cache.invalidate(mechanic_id)
+
+
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & NAME_FIELDS:
+        return
+    mechanic_ids = set(Review.objects.filter(service_request__user=instance).values_list(
+        'service_request__mechanic_id', flat=True,
+    ))
+    if instance.is_mechanic:
+        mechanic_ids.update(Mechanic.objects.filter(user=instance).values_list('pk', flat=True))
+    mechanic_details_cache.invalidate(*mechanic_ids)
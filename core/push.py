@@ -0,0 +1,207 @@
+import random
+import time
+import uuid
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .clients import clients
+from .models import PushDelivery, User
+from .ratelimit import get_limiter, RateLimited
+
+# Push delivery pipeline. Creating a Notification for a user with an FCM
+# token queues a PushDelivery row; `deliver_pending` (run by the push_worker
+# command) claims due rows, groups identical messages and sends each group
+# as one multicast call of up to `max_batch_size` tokens. Tokens the
+# provider rejects as invalid are cleared from User.fcm_token; transient
+# failures are retried with exponential backoff.
+
+SENT, INVALID, RETRY = 'sent', 'invalid', 'retry'
+PushResult = namedtuple('PushResult', 'outcome error')
+PushStats = namedtuple('PushStats', 'sent invalid retried failed batches')
+
+
+class FirebaseTransport:
+    """Firebase Cloud Messaging via firebase-admin's send_each_for_multicast."""
+    max_batch_size = 500
+
+    def send_multicast(self, tokens, title, body, data):
+        if clients.get('firebase') is None:
+            raise RuntimeError("Firebase Admin SDK not initialized")
+        from firebase_admin import exceptions, messaging
+
+        response = messaging.send_each_for_multicast(messaging.MulticastMessage(
+            tokens=list(tokens),
+            notification=messaging.Notification(title=title, body=body),
+            data=data,
+        ))
+        results = []
+        for item in response.responses:
+            if item.success:
+                results.append(PushResult(SENT, ''))
+            elif isinstance(item.exception, (
+                messaging.UnregisteredError, messaging.SenderIdMismatchError, exceptions.InvalidArgumentError,
+            )):
+                results.append(PushResult(INVALID, str(item.exception)))
+            else:
+                results.append(PushResult(RETRY, str(item.exception)))
+        return results
+
+
+class FakeTransport:
+    """
+    Local stand-in for FCM, for tests and benchmarks.
+
+    Tokens in `invalid_tokens` are rejected as unregistered, a seeded
+    `transient_failure_rate` share of the rest fail retryably, and every call
+    sleeps `latency` seconds to model the provider round-trip.
+    """
+
+    def __init__(self, invalid_tokens=(), transient_failure_rate=0.0, latency=0.0, max_batch_size=500, seed=0):
+        self.invalid_tokens = set(invalid_tokens)
+        self.transient_failure_rate = transient_failure_rate
+        self.latency = latency
+        self.max_batch_size = max_batch_size
+        self._random = random.Random(seed)
+        self.calls = []
+
+    def send_multicast(self, tokens, title, body, data):
+        self.calls.append((list(tokens), title, body, dict(data)))
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        for token in tokens:
+            if token in self.invalid_tokens:
+                results.append(PushResult(INVALID, 'Requested entity was not found.'))
+            elif self._random.random() < self.transient_failure_rate:
+                results.append(PushResult(RETRY, 'Internal error'))
+            else:
+                results.append(PushResult(SENT, ''))
+        return results
+
+
+_transport = None
+
+
+def get_transport():
+    """Return the configured push transport (PUSH_TRANSPORT), built once per process."""
+    global _transport
+    if _transport is None:
+        _transport = import_string(getattr(settings, 'PUSH_TRANSPORT', 'core.push.FirebaseTransport'))()
+    return _transport
+
+
+def notification_created(sender, instance, created, **kwargs):
+    """post_save receiver on Notification: queue a push if the recipient has a device token."""
+    if not created:
+        return
+    token = instance.recipient.fcm_token
+    if token:
+        PushDelivery.objects.create(notification=instance, token=token)
+
+
+def _backoff(attempts):
+    base = getattr(settings, 'PUSH_BACKOFF_SECONDS', 30)
+    delay = min(base * 2 ** (attempts - 1), getattr(settings, 'PUSH_MAX_BACKOFF_SECONDS', 3600))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim(limit):
+    now = timezone.now()
+    # Rows a crashed worker left mid-send go back in the queue
+    stale_before = now - timedelta(seconds=getattr(settings, 'PUSH_CLAIM_TIMEOUT_SECONDS', 300))
+    PushDelivery.objects.filter(status='SENDING', claimed_at__lt=stale_before).update(status='PENDING', claim='')
+
+    due = list(
+        PushDelivery.objects.filter(status='PENDING', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit]
+    )
+    if not due:
+        return []
+    claim = uuid.uuid4().hex
+    # Conditional on PENDING, so concurrent workers never claim the same row
+    PushDelivery.objects.filter(id__in=due, status='PENDING').update(status='SENDING', claim=claim, claimed_at=now)
+    return list(
+        PushDelivery.objects.filter(claim=claim, status='SENDING').select_related('notification__recipient')
+    )
+
+
+def _record(deliveries, results, counts):
+    now = timezone.now()
+    sent, invalid, retry = [], [], []
+    for delivery, result in zip(deliveries, results):
+        {SENT: sent, INVALID: invalid}.get(result.outcome, retry).append((delivery, result))
+
+    if sent:
+        PushDelivery.objects.filter(id__in=[d.id for d, _r in sent]).update(status='SENT', sent_at=now, claim='')
+    if invalid:
+        PushDelivery.objects.filter(id__in=[d.id for d, _r in invalid]).update(
+            status='FAILED', claim='', last_error=invalid[0][1].error[:255],
+        )
+        # Only clear tokens users still have; they may have registered a new one since
+        User.objects.filter(fcm_token__in={d.token for d, _r in invalid}).update(fcm_token=None)
+
+    max_attempts = getattr(settings, 'PUSH_MAX_ATTEMPTS', 5)
+    for delivery, result in retry:
+        delivery.attempts += 1
+        delivery.claim = ''
+        delivery.last_error = result.error[:255]
+        if delivery.attempts >= max_attempts:
+            delivery.status = 'FAILED'
+            counts['failed'] += 1
+        else:
+            delivery.status = 'PENDING'
+            delivery.next_attempt_at = now + _backoff(delivery.attempts)
+            counts['retried'] += 1
+    if retry:
+        PushDelivery.objects.bulk_update(
+            [delivery for delivery, _r in retry], ['attempts', 'claim', 'last_error', 'status', 'next_attempt_at'],
+        )
+
+    counts['sent'] += len(sent)
+    counts['invalid'] += len(invalid)
+
+
+def deliver_pending(transport=None, limit=None, limiter=None):
+    """
+    Send one round of due pushes and record the outcomes. Returns PushStats
+    for the round; call repeatedly (push_worker) to drain the queue.
+    """
+    transport = transport or get_transport()
+    limiter = limiter or get_limiter('fcm')
+    batch_size = transport.max_batch_size
+    limit = limit or getattr(settings, 'PUSH_CLAIM_LIMIT', 2000)
+    deliveries = _claim(limit)
+
+    groups = defaultdict(list)
+    for delivery in deliveries:
+        notification = delivery.notification
+        # Rendered in the recipient's language, so identical texts still batch together
+        title, body = notification.render(notification.recipient.preferred_language)
+        groups[(title, body, notification.notification_type)].append(delivery)
+
+    counts = defaultdict(int)
+    for (title, body, notification_type), group in groups.items():
+        for start in range(0, len(group), batch_size):
+            chunk = group[start:start + batch_size]
+            try:
+                with limiter.limit():
+                    results = transport.send_multicast(
+                        [delivery.token for delivery in chunk], title, body, {'type': notification_type},
+                    )
+            except RateLimited as exc:
+                # Not the provider's fault: put the rows back without spending an attempt
+                PushDelivery.objects.filter(id__in=[d.id for d in chunk]).update(
+                    status='PENDING', claim='', next_attempt_at=timezone.now() + timedelta(seconds=exc.retry_after),
+                )
+                counts['retried'] += len(chunk)
+                continue
+            except Exception as exc:
+                results = [PushResult(RETRY, str(exc))] * len(chunk)
+            counts['batches'] += 1
+            _record(chunk, results, counts)
+
+    return PushStats(counts['sent'], counts['invalid'], counts['retried'], counts['failed'], counts['batches'])
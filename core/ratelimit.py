@@ -0,0 +1,168 @@
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+
+# Rate and concurrency limits for outbound integrations (Gemini, geocoding,
+# FCM). State lives in a small SQLite file shared by every worker process on
+# the host, and each check is one short BEGIN IMMEDIATE transaction, so the
+# limits hold across processes without a separate server. Deployments that
+# span several hosts would need a networked store instead.
+
+DEFAULT_LIMITS = {
+    'gemini': {'rate': 0.2, 'burst': 5, 'concurrency': 8, 'wait': 2.0, 'lease': 60},
+    'geocoding': {'rate': 1.0, 'burst': 1, 'concurrency': 1, 'wait': 1.0, 'lease': 15},
+    'fcm': {'rate': 50.0, 'burst': 100, 'concurrency': 16, 'wait': 1.0, 'lease': 30},
+}
+_POLL_SECONDS = 0.05
+
+
+class RateLimited(Exception):
+    def __init__(self, name, reason, retry_after):
+        self.name = name
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{name} {reason} limit reached, retry after {retry_after:.1f}s")
+
+    @property
+    def retry_after_seconds(self):
+        """Whole seconds for the Retry-After header."""
+        return max(1, math.ceil(self.retry_after))
+
+
+class LimiterStore:
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._initialized = False
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            if not self._initialized:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL, updated REAL)'
+                )
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS leases (id TEXT PRIMARY KEY, name TEXT, expires REAL)'
+                )
+                connection.execute('CREATE INDEX IF NOT EXISTS leases_name ON leases (name, expires)')
+                self._initialized = True
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+
+class OutboundLimiter:
+    """
+    Token bucket per caller key plus a cap on concurrent calls for one integration.
+
+    The bucket refills at `rate` tokens per second up to `burst`; each call
+    takes one token. At most `concurrency` calls hold a lease at once across
+    all processes; a caller waits up to `wait` seconds for a free lease. Leases
+    expire after `lease` seconds so a crashed worker cannot leak capacity.
+    """
+
+    def __init__(self, name, store, rate, burst, concurrency, wait=0.0, lease=60, clock=time.time):
+        self.name = name
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.wait = wait
+        self.lease_seconds = lease
+        self._clock = clock
+
+    def take_token(self, key):
+        bucket_key = f'{self.name}:{key}'
+        with self.store.transaction() as connection:
+            now = self._clock()
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (bucket_key,)).fetchone()
+            tokens = self.burst if row is None else min(self.burst, row[0] + (now - row[1]) * self.rate)
+            if tokens < 1:
+                raise RateLimited(self.name, 'per-user', (1 - tokens) / self.rate)
+            connection.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (bucket_key, tokens - 1, now),
+            )
+
+    def _try_lease(self):
+        with self.store.transaction() as connection:
+            now = self._clock()
+            connection.execute('DELETE FROM leases WHERE name = ? AND expires <= ?', (self.name, now))
+            active, soonest = connection.execute(
+                'SELECT COUNT(*), MIN(expires) FROM leases WHERE name = ?', (self.name,)
+            ).fetchone()
+            if active >= self.concurrency:
+                return None, soonest - now
+            lease_id = uuid.uuid4().hex
+            connection.execute(
+                'INSERT INTO leases (id, name, expires) VALUES (?, ?, ?)',
+                (lease_id, self.name, now + self.lease_seconds),
+            )
+            return lease_id, 0
+
+    def acquire(self, key=None):
+        """
+        Take a token for `key` (None shares one bucket between all callers)
+        and a concurrency lease. Returns the lease id to pass to `release`;
+        raises RateLimited when either limit is exhausted.
+        """
+        self.take_token('global' if key is None else key)
+        deadline = time.monotonic() + self.wait
+        while True:
+            lease_id, retry_after = self._try_lease()
+            if lease_id is not None:
+                return lease_id
+            if time.monotonic() >= deadline:
+                # Calls usually finish well before their lease runs out
+                raise RateLimited(self.name, 'concurrency', min(retry_after, max(self.wait, 1)))
+            time.sleep(_POLL_SECONDS)
+
+    def release(self, lease_id):
+        with self.store.transaction() as connection:
+            connection.execute('DELETE FROM leases WHERE id = ?', (lease_id,))
+
+    def active(self):
+        with self.store.transaction() as connection:
+            return connection.execute(
+                'SELECT COUNT(*) FROM leases WHERE name = ? AND expires > ?', (self.name, self._clock())
+            ).fetchone()[0]
+
+    @contextmanager
+    def limit(self, key=None):
+        lease_id = self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(lease_id)
+
+
+@lru_cache(maxsize=1)
+def get_store():
+    return LimiterStore(getattr(settings, 'OUTBOUND_LIMIT_STORE', settings.BASE_DIR / 'outbound_limits.sqlite3'))
+
+
+@lru_cache(maxsize=None)
+def get_limiter(name):
+    """Limiter for integration `name`, configured by OUTBOUND_LIMITS[name] over DEFAULT_LIMITS."""
+    config = dict(DEFAULT_LIMITS.get(name, {}))
+    config.update(getattr(settings, 'OUTBOUND_LIMITS', {}).get(name, {}))
+    return OutboundLimiter(name, get_store(), **config)
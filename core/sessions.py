@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+
+# Hybrid session engine, opt-in with SESSION_ENGINE = "core.sessions".
+#
+# A session whose signed payload fits in SESSION_COOKIE_MAX_BYTES lives in
+# the session cookie itself, like Django's signed_cookies engine, so
+# requests load it without touching the database or the cache. Larger
+# sessions, and any holding one of SESSION_SERVER_ONLY_KEYS (values the
+# client must never see, such as the password reset OTP), are stored
+# server-side by the cached_db engine: write-through cache in front of the
+# django_session table.
+#
+# Signed cookies hold readable (not encrypted) data and cannot be revoked
+# server-side before they expire; logging out replaces the cookie, and a
+# password change still invalidates it through the session auth hash. Anyone
+# holding SECRET_KEY can forge them, so the engine refuses to run with
+# Django's generated development key.
+#
+# Migrating from the db/cached_db engines needs no data step: cookies that
+# carry a database key keep loading from the table and move into the cookie
+# (deleting their row) the next time they are saved. `clearsessions` keeps
+# expiring the rows that remain.
+
+SALT = 'core.sessions'
+
+
+def _in_cookie(session_key):
+    # Signed payloads contain ':' separators; database keys are [a-z0-9] only
+    return bool(session_key) and ':' in session_key
+
+
+class SessionStore(cached_db.SessionStore):
+    def __init__(self, session_key=None):
+        if settings.SECRET_KEY.startswith('django-insecure-'):
+            raise ImproperlyConfigured(
+                "core.sessions signs sessions with SECRET_KEY; set a private SECRET_KEY "
+                "or use another SESSION_ENGINE."
+            )
+        super().__init__(session_key)
+
+    def _signed_payload(self, data):
+        """The signed cookie value for `data`, or None if it must be kept server-side."""
+        if set(getattr(settings, 'SESSION_SERVER_ONLY_KEYS', ())) & data.keys():
+            return None
+        payload = signing.dumps(data, compress=True, salt=SALT, serializer=self.serializer)
+        if len(payload) > getattr(settings, 'SESSION_COOKIE_MAX_BYTES', 2048):
+            return None
+        return payload
+
+    def load(self):
+        if not _in_cookie(self.session_key):
+            return super().load()
+        try:
+            return signing.loads(
+                self.session_key, salt=SALT, serializer=self.serializer, max_age=self.get_session_cookie_age(),
+            )
+        except Exception:
+            # Tampered, expired or unreadable: start an empty session
+            self._session_key = None
+            self.modified = True
+            return {}
+
+    def exists(self, session_key):
+        if _in_cookie(session_key):
+            return False
+        return super().exists(session_key)
+
+    def create(self):
+        # Where the data goes is decided when it is saved
+        self._session_key = None
+        self.modified = True
+
+    def save(self, must_create=False):
+        previous_key = self.session_key
+        payload = self._signed_payload(self._get_session(no_load=must_create))
+        if payload is not None:
+            self._session_key = payload
+            if previous_key and not _in_cookie(previous_key):
+                # Moved into the cookie; drop the server-side copy
+                super().delete(previous_key)
+            return
+        if not previous_key or _in_cookie(previous_key):
+            # Needs a database key first; cached_db.create() comes back here
+            return super().create()
+        return super().save(must_create)
+
+    def delete(self, session_key=None):
+        key = self.session_key if session_key is None else session_key
+        if _in_cookie(key):
+            return
+        super().delete(session_key)
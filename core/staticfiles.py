@@ -0,0 +1,198 @@
+import gzip
+import mimetypes
+import os
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.finders import BaseFinder
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.checks import Error
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # optional; without it only .gz variants are written
+    brotli = None
+
+# Static asset pipeline:
+#
+# 1. BundleFinder serves each STATIC_BUNDLES entry, the concatenation of
+#    its sources in order. Page families link one bundle for their shared
+#    CSS ("css/bundles/app.css"), so runserver and collectstatic see it
+#    like any other static file.
+# 2. CompressedManifestStaticFilesStorage (STORAGES["staticfiles"]) hashes
+#    every file name at collectstatic time (app.css -> app.3f2a1c9e.css),
+#    then writes .gz and, when the brotli package is installed, .br copies
+#    of the hashed text files.
+# 3. StaticFilesMiddleware serves STATIC_ROOT itself: the smallest
+#    precompressed variant the client accepts, with year-long immutable
+#    caching for hashed names. Nothing is compressed per request.
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.json', '.map', '.xml', '.html')
+MIN_COMPRESS_BYTES = 256
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class BundleFinder(BaseFinder):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.bundles = getattr(settings, 'STATIC_BUNDLES', {})
+        self.storage = FileSystemStorage(location=settings.STATIC_BUNDLES_BUILD_DIR)
+
+    def check(self, **kwargs):
+        errors = []
+        for bundle, sources in self.bundles.items():
+            for source in sources:
+                if self._source_path(source) is None:
+                    errors.append(Error(f"Static bundle {bundle!r} source {source!r} was not found.", id='core.E001'))
+        return errors
+
+    def _source_path(self, source):
+        for finder in finders.get_finders():
+            if not isinstance(finder, BundleFinder):
+                path = finder.find(source)
+                if path:
+                    return path
+        return None
+
+    def _build(self, bundle):
+        """Write the bundle into the build directory unless it is newer than all its sources."""
+        sources = [(source, self._source_path(source)) for source in self.bundles[bundle]]
+        missing = [source for source, path in sources if path is None]
+        if missing:
+            raise FileNotFoundError(f"Static bundle {bundle} is missing {', '.join(missing)}")
+        target = self.storage.path(bundle)
+        newest = max(os.path.getmtime(path) for _source, path in sources)
+        if not os.path.exists(target) or os.path.getmtime(target) < newest:
+            parts = []
+            for source, path in sources:
+                with open(path, encoding='utf-8') as file:
+                    parts.append(f'/* {source} */\n{file.read().rstrip()}\n')
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Written beside the target and swapped in, so readers never see half a bundle
+            with open(target + '.tmp', 'w', encoding='utf-8') as file:
+                file.write('\n'.join(parts))
+            os.replace(target + '.tmp', target)
+        return target
+
+    def find(self, path, all=False):
+        if path not in self.bundles:
+            return [] if all else None
+        target = self._build(path)
+        return [target] if all else target
+
+    def list(self, ignore_patterns):
+        for bundle in self.bundles:
+            self._build(bundle)
+            yield bundle, self.storage
+
+
+def compress(content):
+    """{suffix: bytes} of the precompressed variants worth keeping for `content`."""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content, quality=11)
+    # Only keep a variant that saves a meaningful amount
+    return {suffix: data for suffix, data in variants.items() if len(data) < len(content) * 0.95}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+                continue
+            with self.open(name) as file:
+                content = file.read()
+            if len(content) < MIN_COMPRESS_BYTES:
+                continue
+            for suffix, data in compress(content).items():
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(data))
+                yield name, name + suffix, True
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serve collected files under STATIC_URL from STATIC_ROOT, preferring the
+    .br or .gz copy collectstatic wrote; requests for files that were not
+    collected fall through. Off under DEBUG, where runserver serves the
+    sources through the finders and collected copies would be stale. Goes
+    first in MIDDLEWARE, right after SecurityMiddleware, so static requests
+    skip sessions and authentication.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.root = str(settings.STATIC_ROOT) if settings.STATIC_ROOT and not settings.DEBUG else None
+        hashed_files = getattr(staticfiles_storage, 'hashed_files', {})
+        self.hashed = set(hashed_files.values()) - set(hashed_files)
+
+    def __call__(self, request):
+        if self.root is None or request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return self.get_response(request)
+        name = posixpath.normpath(request.path[len(self.prefix):]).lstrip('/')
+        try:
+            path = safe_join(self.root, name)
+        except ValueError:
+            return self.get_response(request)
+        if not os.path.isfile(path):
+            return self.get_response(request)
+        return self.serve(request, name, path)
+
+    def serve(self, request, name, path):
+        content_type, encoding = mimetypes.guess_type(path)
+        if encoding:
+            content_type = None
+        content_type = content_type or 'application/octet-stream'
+
+        served, content_encoding = path, None
+        accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        for coding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if coding in accepted and os.path.isfile(path + suffix):
+                served, content_encoding = path + suffix, coding
+                break
+
+        stat = os.stat(served)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}{"-" + content_encoding if content_encoding else ""}"'
+        response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+        if response is None:
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=content_type)
+            else:
+                response = FileResponse(open(served, 'rb'), content_type=content_type)
+            response['Content-Length'] = str(stat.st_size)
+            response['Last-Modified'] = http_date(stat.st_mtime)
+        response['ETag'] = etag
+        if content_encoding:
+            response['Content-Encoding'] = content_encoding
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = IMMUTABLE if name in self.hashed else (
+            f"public, max-age={getattr(settings, 'STATIC_UNHASHED_MAX_AGE', 300)}"
+        )
+        return response
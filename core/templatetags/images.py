@@ -0,0 +1,12 @@
+from django import template
+
+register = template.Library()
+
+@register.filter
+def thumbnail(image, size='thumb'):
+    """URL of the `size` rendition of an image field file, e.g. {{ vehicle.image|thumbnail:'medium' }}"""
+    if not image:
+        return ''
+    if hasattr(image, 'get_thumbnail_url'):
+        return image.get_thumbnail_url(size)
+    return image.url
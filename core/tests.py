@@ -0,0 +1,271 @@
+import random
+import re
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import emergency, transitions
+from core.dispatch import can_service
+from core.models import EmergencyOffer, EmergencyRequest, Mechanic, Notification, Payment, ServiceRequest, User
+
+
+def _mechanic(index):
+    user = User.objects.create(username=f'mechanic-{index}', is_mechanic=True)
+    return Mechanic.objects.create(
+        user=user, specialization='General', experience_years=1, workshop_address='Test',
+        latitude=12.97 + index * 0.0001, longitude=77.59,
+    )
+
+
+class TransitionTests(TransactionTestCase):
+    # Real commits, so the racing threads' connections see each other's writes
+    ATTEMPTS = 300
+    # Threads released together by one barrier
+    BATCH = 100
+
+    def setUp(self):
+        self.customer = User.objects.create(username='customer')
+        self.request = ServiceRequest.objects.create(
+            user=self.customer, vehicle_type='CAR', issue_description='Flat tyre', location='Test',
+            latitude=12.97, longitude=77.59,
+        )
+
+    def test_concurrent_accepts_have_one_winner(self):
+        mechanics = [_mechanic(index) for index in range(self.ATTEMPTS)]
+        outcomes = []
+        lock = threading.Lock()
+
+        def attempt(mechanic, barrier):
+            try:
+                barrier.wait()
+                try:
+                    outcome = transitions.accept(self.request.pk, mechanic)
+                except OperationalError as e:
+                    # A writer that outwaits SQLite's busy timeout errors instead of
+                    # matching no row; that is the only failure allowed
+                    outcome = 'locked' if 'database is locked' in str(e) else e
+                except Exception as e:
+                    # Kept, not swallowed: reported by the assertion below
+                    outcome = e
+                with lock:
+                    outcomes.append((mechanic.pk, outcome))
+            finally:
+                connection.close()
+
+        threads = []
+        for start in range(0, len(mechanics), self.BATCH):
+            batch = mechanics[start:start + self.BATCH]
+            barrier = threading.Barrier(len(batch))
+            threads.extend(threading.Thread(target=attempt, args=(mechanic, barrier)) for mechanic in batch)
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(outcomes), self.ATTEMPTS)
+        winners = [pk for pk, outcome in outcomes if outcome is True]
+        unexpected = [outcome for _pk, outcome in outcomes if outcome not in (True, False, 'locked')]
+        self.assertEqual(unexpected, [])
+        self.assertEqual(len(winners), 1)
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, 'ACCEPTED')
+        self.assertEqual(self.request.mechanic_id, winners[0])
+
+    def test_complete_rolls_back_without_payment(self):
+        mechanic = _mechanic(0)
+        self.assertTrue(transitions.accept(self.request.pk, mechanic))
+        self.assertTrue(transitions.start(self.request.pk, mechanic))
+
+        with mock.patch.object(ServiceRequest, 'create_completion_payment', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                transitions.complete(self.request.pk, mechanic)
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, 'IN_PROGRESS')
+        self.assertIsNone(self.request.completed_at)
+
+        self.assertTrue(transitions.complete(self.request.pk, mechanic))
+        self.request.refresh_from_db()
+        self.assertEqual(self.request.status, 'COMPLETED')
+        self.assertTrue(Payment.objects.filter(service_request=self.request).exists())
+
+
+class CanServiceTests(SimpleTestCase):
+    def test_keywords_match_whole_words(self):
+        # 'auto', 'bus' and 'car' inside longer words mention no vehicle type
+        for specialization in ('Automotive electrics', 'Business fleet service', 'Scar and dent repair'):
+            for vehicle_type in ('CAR', 'MOTORCYCLE', 'TRUCK'):
+                with self.subTest(specialization=specialization, vehicle_type=vehicle_type):
+                    self.assertTrue(can_service(specialization, vehicle_type))
+
+    def test_keywords_restrict_vehicle_types(self):
+        self.assertTrue(can_service('Cars and SUVs', 'CAR'))
+        self.assertFalse(can_service('Cars and SUVs', 'MOTORCYCLE'))
+        self.assertTrue(can_service('Buses and lorries', 'TRUCK'))
+        self.assertFalse(can_service('Buses and lorries', 'CAR'))
+        self.assertFalse(can_service('2-wheeler specialist', 'CAR'))
+        self.assertTrue(can_service('General repairs, bikes', 'CAR'))
+
+
+@override_settings(EMERGENCY_RINGS_KM=(5, 10), EMERGENCY_ESCALATION_SECONDS=30)
+class EmergencyEscalationTests(TestCase):
+    def setUp(self):
+        emergency.locator.reset()
+        self.addCleanup(emergency.locator.reset)
+        self.customer = User.objects.create(username='customer')
+
+    def _later(self, sos):
+        sos.refresh_from_db()
+        return sos.ring_opened_at + timedelta(seconds=31)
+
+    def test_no_mechanic_in_range_is_retried_on_the_last_ring(self):
+        sos, offers = emergency.create_emergency_request(self.customer, 12.97, 77.59)
+        self.assertEqual(offers, [])
+        self.assertEqual(sos.ring, 1)
+        self.assertEqual(emergency.escalate_if_due(sos, now=self._later(sos)), [])
+
+        # A mechanic who comes into range later is offered it on the next retry
+        nearby = _mechanic(0)
+        self.assertEqual(emergency.escalate_due_emergencies(now=self._later(sos)), 1)
+        self.assertEqual(list(sos.offers.values_list('mechanic_id', flat=True)), [nearby.pk])
+        sos.refresh_from_db()
+        self.assertEqual((sos.status, sos.ring), ('PENDING', 1))
+
+    def test_last_ring_retry_only_offers_new_mechanics(self):
+        first = _mechanic(0)
+        sos, offers = emergency.create_emergency_request(self.customer, 12.97, 77.59)
+        self.assertEqual([offer.mechanic_id for offer in offers], [first.pk])
+
+        # Ring 0 lapses into ring 1, then ring 1 lapses with nobody new
+        self.assertEqual(emergency.escalate_if_due(sos, now=self._later(sos)), [])
+        self.assertEqual(emergency.escalate_if_due(sos, now=self._later(sos)), [])
+        second = _mechanic(1)
+        offers = emergency.escalate_if_due(sos, now=self._later(sos))
+        self.assertEqual([offer.mechanic_id for offer in offers], [second.pk])
+        self.assertEqual(EmergencyOffer.objects.filter(emergency_request=sos, mechanic=first).count(), 1)
+
+    def test_cancelled_emergency_is_not_retried(self):
+        sos, _offers = emergency.create_emergency_request(self.customer, 12.97, 77.59)
+        _mechanic(0)
+        EmergencyRequest.objects.filter(pk=sos.pk).update(status='CANCELLED')
+        self.assertEqual(emergency.escalate_due_emergencies(now=timezone.now() + timedelta(minutes=5)), 0)
+
+
+class HotQueryIndexTests(TestCase):
+    """EXPLAIN the hot dashboard, history, payment and notification queries on a seeded dataset."""
+
+    STATUSES = ['PENDING', 'ACCEPTED', 'IN_PROGRESS', 'COMPLETED', 'COMPLETED', 'COMPLETED', 'CANCELLED']
+    PAYMENT_STATUSES = ['PAID', 'PAID', 'PAID', 'PENDING', 'FAILED']
+    PAYMENT_METHODS = ['CASH', 'UPI', 'CARD', 'NET_BANKING']
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(1)
+        users = User.objects.bulk_create([User(username=f'user-{index}') for index in range(100)])
+        mechanic_users = User.objects.bulk_create([
+            User(username=f'mechanic-{index}', is_mechanic=True) for index in range(40)
+        ])
+        mechanics = Mechanic.objects.bulk_create([
+            Mechanic(
+                user=user, specialization='General', experience_years=1, workshop_address='Test',
+                latitude=12.9 + rng.random(), longitude=77.5 + rng.random(),
+            )
+            for user in mechanic_users
+        ])
+        requests = []
+        for _ in range(5000):
+            status = rng.choice(cls.STATUSES)
+            requests.append(ServiceRequest(
+                user=rng.choice(users), mechanic=None if status == 'PENDING' else rng.choice(mechanics),
+                vehicle_type='CAR', issue_description='Test', location='Test', status=status,
+                latitude=12.9 + rng.random(), longitude=77.5 + rng.random(),
+            ))
+        requests = ServiceRequest.objects.bulk_create(requests, batch_size=1000)
+        Payment.objects.bulk_create([
+            Payment(
+                service_request=request, amount=500, payment_status=rng.choice(cls.PAYMENT_STATUSES),
+                payment_method=rng.choice(cls.PAYMENT_METHODS),
+            )
+            for request in requests if request.status == 'COMPLETED'
+        ], batch_size=1000)
+        Notification.objects.bulk_create([
+            Notification(
+                recipient=rng.choice(users + mechanic_users), notification_type='STATUS_UPDATE',
+                template_key='status.COMPLETED', read=rng.random() < 0.8,
+            )
+            for _ in range(5000)
+        ], batch_size=1000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.user, cls.mechanic = users[0], mechanics[0]
+
+    def assertUsesIndex(self, queryset, *names):
+        # Matched as substrings, so a prefix stands for Django's hashed foreign key index names
+        plan = queryset.explain()
+        self.assertTrue(any(name in plan for name in names), f"expected {' or '.join(names)}:\n{plan}")
+
+    def test_mechanic_dashboard(self):
+        self.assertUsesIndex(
+            ServiceRequest.objects.filter(mechanic=self.mechanic, status='COMPLETED'), 'sr_mechanic_status',
+        )
+        self.assertUsesIndex(
+            ServiceRequest.objects.filter(mechanic=self.mechanic, status__in=['ACCEPTED', 'IN_PROGRESS']),
+            'sr_mechanic_status',
+        )
+
+    def test_user_history(self):
+        self.assertUsesIndex(ServiceRequest.objects.filter(user=self.user).order_by('-created_at'), 'sr_user_created')
+
+    def test_unassigned_requests(self):
+        self.assertUsesIndex(
+            ServiceRequest.objects.filter(status='PENDING', mechanic__isnull=True).order_by('created_at'),
+            'sr_status_mechanic_created',
+        )
+
+    def test_payments(self):
+        self.assertUsesIndex(
+            Payment.objects.filter(payment_status='PENDING', payment_method='CASH'), 'payment_status_method',
+        )
+        self.assertUsesIndex(
+            Payment.objects.filter(service_request__mechanic=self.mechanic, payment_status='PENDING'),
+            'sr_mechanic_status', 'core_servicerequest_mechanic_id', 'payment_status_method',
+        )
+
+    def test_unread_notifications(self):
+        self.assertUsesIndex(Notification.objects.filter(recipient=self.user, read=False), 'notif_recipient_read')
+
+
+class StaticReferenceTests(SimpleTestCase):
+    """Every {% static %} path in the templates resolves against a collected manifest."""
+
+    STATIC_TAG = re.compile(r"""{%\s*static\s+(['"])(.+?)\1\s*%}""")
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root, ignore_errors=True)
+        cls.enterClassContext(override_settings(DEBUG=False, STATIC_ROOT=cls.static_root))
+        call_command('collectstatic', interactive=False, verbosity=0)
+        # Built after collecting, so it reads the manifest just written
+        cls.storage = storages.create_storage(settings.STORAGES['staticfiles'])
+
+    def test_template_static_paths_are_collected(self):
+        references = {}
+        for directory in settings.TEMPLATES[0]['DIRS']:
+            for template in Path(directory).rglob('*.html'):
+                for _quote, path in self.STATIC_TAG.findall(template.read_text(encoding='utf-8')):
+                    references.setdefault(path, template.relative_to(directory))
+        self.assertTrue(references)
+        for path, template in sorted(references.items()):
+            with self.subTest(path=path, template=str(template)):
+                self.storage.url(path)
@@ -0,0 +1,99 @@
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import ServiceRequest
+
+# Service request state machine. Every transition is a single conditional
+# UPDATE ... WHERE status = <from state>, so when several callers race for the
+# same request exactly one of them sees a row count of 1 and wins. Nothing is
+# read and written back, and only the columns a transition owns are touched.
+TRANSITIONS = {
+    'assign': ('PENDING',),
+    'accept': ('PENDING',),
+    'start': ('ACCEPTED',),
+    'complete': ('IN_PROGRESS',),
+    'cancel': ('PENDING', 'ACCEPTED'),
+}
+
+# Queryset updates send no post_save, so listeners that cache per-request
+# data hear about winning transitions here (kwargs: service_request_id,
+# action, previous_mechanic_id; the last is set only by reassignments)
+transitioned = Signal()
+
+
+def _transition(service_request_id, action, extra_filter=None, previous_mechanic_id=None, **values):
+    queryset = ServiceRequest.objects.filter(pk=service_request_id, status__in=TRANSITIONS[action])
+    if extra_filter is not None:
+        queryset = queryset.filter(extra_filter)
+    values.setdefault('updated_at', timezone.now())
+    won = queryset.update(**values) == 1
+    if won:
+        transitioned.send(
+            sender=ServiceRequest, service_request_id=service_request_id, action=action,
+            previous_mechanic_id=previous_mechanic_id,
+        )
+    return won
+
+
+def assign(service_request_id, mechanic, distance_km=None, reassign=False):
+    """
+    Point a PENDING request at a mechanic without accepting it on their behalf.
+    Used by the dispatcher (which must not overwrite an existing assignment)
+    and by users picking a mechanic (who may change their pick, `reassign`).
+    """
+    extra = None if reassign else Q(mechanic__isnull=True)
+    values = {'mechanic_id': getattr(mechanic, 'pk', mechanic)}
+    if distance_km is not None:
+        values['distance_km'] = distance_km
+    previous_mechanic_id = None
+    if reassign:
+        # Only so listeners can drop what they cached for the replaced mechanic
+        previous_mechanic_id = ServiceRequest.objects.filter(pk=service_request_id).values_list(
+            'mechanic_id', flat=True,
+        ).first()
+    return _transition(service_request_id, 'assign', extra, previous_mechanic_id, **values)
+
+
+def accept(service_request_id, mechanic):
+    """
+    Claim a PENDING request. Open requests can be claimed by any mechanic;
+    requests already pointed at a mechanic only by that mechanic.
+    """
+    won = _transition(
+        service_request_id, 'accept',
+        Q(mechanic__isnull=True) | Q(mechanic=mechanic),
+        mechanic=mechanic,
+        status='ACCEPTED',
+        mechanic_latitude=mechanic.latitude,
+        mechanic_longitude=mechanic.longitude,
+    )
+    if won:
+        # Only the winner re-prices the request with the real travel distance
+        service_request = ServiceRequest.objects.get(pk=service_request_id)
+        service_request.estimated_cost = service_request.calculate_service_charge()
+        service_request.save(update_fields=['estimated_cost', 'distance_km', 'problem_complexity_fee', 'updated_at'])
+    return won
+
+
+def start(service_request_id, mechanic):
+    return _transition(service_request_id, 'start', Q(mechanic=mechanic), status='IN_PROGRESS')
+
+
+def complete(service_request_id, mechanic):
+    now = timezone.now()
+    # A request is never COMPLETED without its payment: if creating it fails,
+    # the status change is rolled back with it
+    with transaction.atomic():
+        won = _transition(
+            service_request_id, 'complete', Q(mechanic=mechanic),
+            status='COMPLETED', completed_at=now, updated_at=now,
+        )
+        if won:
+            ServiceRequest.objects.get(pk=service_request_id).create_completion_payment()
+    return won
+
+
+def cancel(service_request_id, user):
+    return _transition(service_request_id, 'cancel', Q(user=user), status='CANCELLED')
@@ -0,0 +1,79 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .models import ChunkedUpload
+from .uploads import UploadError, abandon_upload, start_upload, write_chunk
+
+
+def _upload_state(upload):
+    response = JsonResponse({
+        'success': True,
+        'upload_id': str(upload.pk),
+        'offset': upload.offset,
+        'size': upload.size,
+        'status': upload.status,
+        'url': reverse('core:upload_detail', args=[upload.pk]),
+    })
+    response['Upload-Offset'] = str(upload.offset)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _error(exc):
+    response = JsonResponse({'success': False, 'error': str(exc), 'offset': exc.offset}, status=exc.status)
+    if exc.offset is not None:
+        response['Upload-Offset'] = str(exc.offset)
+    return response
+
+
+@login_required
+def create_upload(request):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method.'}, status=405)
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'error': 'Invalid JSON.'}, status=400)
+    try:
+        upload = start_upload(
+            request.user, data.get('field'), data.get('filename'), data.get('size'), data.get('sha256', ''),
+        )
+    except UploadError as exc:
+        return _error(exc)
+    response = _upload_state(upload)
+    response.status_code = 201
+    response['Location'] = reverse('core:upload_detail', args=[upload.pk])
+    response['Upload-Chunk-Size'] = str(getattr(settings, 'UPLOAD_CHUNK_BYTES', 1024 * 1024))
+    return response
+
+
+@login_required
+def upload_detail(request, upload_id):
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    if request.method in ('GET', 'HEAD'):
+        return _upload_state(upload)
+    if request.method == 'DELETE':
+        abandon_upload(upload)
+        return HttpResponse(status=204)
+    if request.method not in ('PUT', 'PATCH'):
+        return JsonResponse({'success': False, 'error': 'Invalid request method.'}, status=405)
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Upload-Offset header is required.'}, status=400)
+    algorithm, _, checksum = request.headers.get('Upload-Checksum', '').partition(' ')
+    if algorithm and algorithm.lower() != 'sha256':
+        return JsonResponse({'success': False, 'error': 'Only sha256 checksums are supported.'}, status=400)
+    try:
+        # Read from the request stream, never request.body, so the chunk is not buffered
+        upload = write_chunk(upload, offset, request, length, checksum.strip())
+    except UploadError as exc:
+        return _error(exc)
+    return _upload_state(upload)
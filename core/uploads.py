@@ -0,0 +1,201 @@
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import ChunkedUpload, ServiceRequest
+
+# Chunked, resumable uploads for ServiceRequest.issue_video and issue_file
+# (API in core.upload_views):
+#
+#   POST   api/uploads/                {field, filename, size, sha256?} -> upload id
+#   HEAD   api/uploads/<id>/           Upload-Offset: bytes received so far
+#   PUT    api/uploads/<id>/           one chunk; Upload-Offset and optional
+#                                      Upload-Checksum: sha256 <hex> headers
+#   DELETE api/uploads/<id>/           abandon
+#
+# Each chunk is streamed from the request straight into a partial file
+# under MEDIA_ROOT, so memory use is one read block whatever the file size.
+# A client that loses its connection asks for the offset and resumes from
+# there. The last chunk moves the file into the field's upload_to directory,
+# and the service request form takes the finished upload's id
+# (`issue_video_upload` / `issue_file_upload`) instead of the file itself.
+
+UPLOAD_FIELDS = dict(ChunkedUpload.FIELD_CHOICES)
+READ_BLOCK = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def _path(name):
+    # Chunks are written with plain file I/O, so uploads need local storage
+    return default_storage.path(name)
+
+
+def start_upload(user, field, filename, size, sha256=''):
+    if field not in UPLOAD_FIELDS:
+        raise UploadError(f"Uploads are accepted for {', '.join(UPLOAD_FIELDS)} only.")
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("Size must be a whole number of bytes.")
+    max_bytes = getattr(settings, 'UPLOAD_MAX_BYTES', 512 * 1024 * 1024)
+    if not 0 < size <= max_bytes:
+        raise UploadError(f"Size must be between 1 and {max_bytes} bytes.", status=413)
+    filename = get_valid_filename(os.path.basename(filename or '')) or 'upload'
+
+    upload = ChunkedUpload.objects.create(
+        user=user, field=field, filename=filename[:255], size=size, sha256=(sha256 or '').lower()[:64],
+    )
+    path = _path(upload.partial_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length, checksum=''):
+    """
+    Append `length` bytes read from `stream` at `offset`, which must equal the
+    bytes received so far. A chunk that is short or fails its checksum is
+    discarded whole, leaving the offset where it was for the client to retry.
+    """
+    if upload.status != 'UPLOADING':
+        raise UploadError("Upload is already complete.", status=409, offset=upload.offset)
+    if offset != upload.offset:
+        # Checked again under the row lock; this only saves reading a chunk that cannot fit
+        raise UploadError("Chunk does not start at the upload offset.", status=409, offset=upload.offset)
+    if length <= 0 or offset + length > upload.size:
+        raise UploadError("Chunk is empty or runs past the declared size.", offset=upload.offset)
+    if length > getattr(settings, 'UPLOAD_MAX_CHUNK_BYTES', 8 * 1024 * 1024):
+        raise UploadError("Chunk is too large.", status=413, offset=upload.offset)
+
+    # The chunk is received into a file of its own and only appended once it
+    # is whole and verified, so a retry racing a dropped request for the same
+    # offset can never touch bytes already committed
+    received = _path(f'{upload.partial_name}.{uuid.uuid4().hex}')
+    try:
+        digest = hashlib.sha256()
+        with open(received, 'wb') as chunk:
+            remaining = length
+            while remaining:
+                block = stream.read(min(READ_BLOCK, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                chunk.write(block)
+                remaining -= len(block)
+        if remaining or (checksum and digest.hexdigest() != checksum.lower()):
+            raise UploadError(
+                "Chunk was cut short." if remaining else "Chunk checksum does not match.",
+                offset=ChunkedUpload.objects.values_list('offset', flat=True).get(pk=upload.pk),
+            )
+
+        with transaction.atomic():
+            upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+            if upload.status != 'UPLOADING':
+                raise UploadError("Upload is already complete.", status=409, offset=upload.offset)
+            # Conditional on the offset as well, for databases that ignore FOR UPDATE (SQLite
+            # serialises writers instead, from this UPDATE until commit)
+            advanced = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset, status='UPLOADING').update(
+                offset=offset + length, updated_at=timezone.now(),
+            )
+            if offset != upload.offset or not advanced:
+                raise UploadError("Chunk does not start at the upload offset.", status=409, offset=upload.offset)
+            with open(_path(upload.partial_name), 'r+b') as partial, open(received, 'rb') as chunk:
+                # Drops anything a failed append left past the committed offset, never less
+                partial.truncate(offset)
+                partial.seek(offset)
+                shutil.copyfileobj(chunk, partial, READ_BLOCK)
+            upload.offset = offset + length
+    finally:
+        if os.path.exists(received):
+            os.remove(received)
+
+    if upload.offset == upload.size:
+        _finish(upload)
+    return upload
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(READ_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _finish(upload):
+    partial = _path(upload.partial_name)
+    if upload.sha256 and _file_sha256(partial) != upload.sha256:
+        # Cannot tell which chunk went wrong: start over
+        open(partial, 'wb').close()
+        ChunkedUpload.objects.filter(pk=upload.pk).update(offset=0)
+        upload.offset = 0
+        raise UploadError("File checksum does not match; upload restarted.", offset=0)
+
+    field = ServiceRequest._meta.get_field(upload.field)
+    name = field.storage.get_available_name(field.generate_filename(None, upload.filename))
+    target = field.storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Same filesystem, so this is a rename, not a copy
+    os.replace(partial, target)
+    upload.status = 'COMPLETE'
+    upload.name = name
+    upload.save(update_fields=['status', 'name', 'updated_at'])
+
+
+def abandon_upload(upload):
+    for name in (upload.partial_name, upload.name):
+        if name:
+            default_storage.delete(name)
+    upload.delete()
+
+
+def finished_uploads(user, data, form):
+    """
+    The user's completed uploads named in `data` (`<field>_upload`), by field.
+    Unknown or unfinished ids are reported as errors on `form`.
+    """
+    uploads = {}
+    for field in UPLOAD_FIELDS:
+        upload_id = data.get(f'{field}_upload')
+        if not upload_id:
+            continue
+        upload = None
+        if _is_uuid(upload_id):
+            upload = ChunkedUpload.objects.filter(pk=upload_id, user=user, field=field, status='COMPLETE').first()
+        if upload is None:
+            form.add_error(None, f"The {UPLOAD_FIELDS[field].lower()} upload is missing or unfinished.")
+        else:
+            uploads[field] = upload
+    return uploads
+
+
+def _is_uuid(value):
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+def clear_stale_uploads(older_than=None):
+    """Abandon uploads untouched for UPLOAD_SESSION_TTL_HOURS, finished but never attached ones included."""
+    if older_than is None:
+        older_than = timedelta(hours=getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24))
+    stale = list(ChunkedUpload.objects.filter(updated_at__lt=timezone.now() - older_than))
+    for upload in stale:
+        abandon_upload(upload)
+    return len(stale)
@@ -1,5 +1,5 @@
 from django.urls import path, reverse_lazy
-from . import views, notification_views
+from . import views, notification_views, upload_views
 from .views import sos_call
 from django.contrib.auth import views as auth_views
 
@@ -14,7 +14,10 @@ urlpatterns = [
     
     # Service Request URLs
     path('service-requests/', views.service_requests, name='service_requests'),
+    path('api/service-requests/pending/', views.pending_requests_feed, name='pending_requests_feed'),
     path('service-request/create/', views.create_service_request, name='create_service_request'),
+    path('api/uploads/', upload_views.create_upload, name='create_upload'),
+    path('api/uploads/<uuid:upload_id>/', upload_views.upload_detail, name='upload_detail'),
     path('service-request/<int:pk>/', views.service_request_detail, name='service_request_detail'),
     path('service-request/<int:service_request_id>/review/', views.submit_review, name='submit_review'),
     path('service-request/<int:service_request_id>/nearby-mechanics/', views.find_nearby_mechanics, name='find_nearby_mechanics'),
@@ -38,6 +41,7 @@ urlpatterns = [
     path('api/mechanic/update-availability/', views.update_mechanic_availability, name='update_mechanic_availability'),
     path('api/mechanic/update-location/', views.update_mechanic_location, name='update_mechanic_location'),
     path('api/mechanic/<int:mechanic_id>/details/', views.mechanic_details, name='mechanic_details'),
+    path('api/cache-stats/', views.cache_stats, name='cache_stats'),
     path('api/service-request/<int:service_request_id>/mechanic-location/', views.get_mechanic_location_for_service_request, name='get_mechanic_location_for_service_request'),
     
     # Mechanic Dashboard
@@ -55,4 +59,7 @@ urlpatterns = [
     path('service/<int:service_id>/waiting-for-mechanic/', views.waiting_for_mechanic, name='waiting_for_mechanic'),
     path('custom-map/', views.custom_map_view, name='custom_map_view'),
     path('sos/call/', sos_call, name='sos_call'),
+    path('api/emergency/create/', views.create_emergency_request, name='create_emergency_request'),
+    path('api/emergency/<int:emergency_id>/status/', views.emergency_request_status, name='emergency_request_status'),
+    path('api/emergency/<int:emergency_id>/accept/', views.accept_emergency_request, name='accept_emergency_request'),
 ]
@@ -7,23 +7,29 @@ from django.contrib import messages
 from django.db.models import Q, Avg, Sum, Count
 from django.db.models.functions import TruncDay
 from decimal import Decimal
-from .models import User, Mechanic, ServiceRequest, Review, Payment, Notification, Vehicle
+from .models import User, Mechanic, ServiceRequest, Review, Payment, Notification, Vehicle, EmergencyRequest, EmergencyOffer, ChunkedUpload
+from . import emergency as emergency_dispatch
+from . import transitions
+from .pending_feed import pending_feed, parse_since as parse_feed_since, InvalidCursor as InvalidFeedCursor, DEFAULT_PAGE_SIZE as PENDING_FEED_PAGE_SIZE
 from django.contrib.auth.forms import UserCreationForm
 from django import forms
-from math import radians, sin, cos, sqrt, atan2
+from .geo import haversine_km
 from .notification_views import get_unread_notifications_count
+from .notices import add_notice
+from .middleware import remember_language
+from .db.routing import use_replica
+from .cache import cache_stats as get_cache_stats
+from .profiles import mechanic_details_cache
+from .uploads import finished_uploads
 from .forms import ReviewForm, UserProfileForm, MechanicProfileForm, UserRegistrationForm, MechanicRegistrationForm # Add UserProfileForm, MechanicProfileForm, UserRegistrationForm, MechanicRegistrationForm
 from django.conf import settings
-from django.http import JsonResponse, HttpResponse # Added HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404 # Added HttpResponse
 import json
 from django.db import models
 from django.contrib.auth import login as auth_login
 from django.contrib.auth import logout
 from django.contrib.auth.forms import AuthenticationForm
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
 from django.views.decorators.csrf import csrf_exempt # Added import for csrf_exempt
-import googlemaps # Import googlemaps library
 from django.contrib.auth.forms import PasswordResetForm
 from .forms import OtpForm, NewPasswordForm
 import random
@@ -32,7 +38,8 @@ from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from django.urls import reverse # Import reverse for URL lookups
 import io
-from xhtml2pdf import pisa
+from .clients import clients
+from .ratelimit import get_limiter
 
 def send_payment_receipt_email(payment):
     service_request = payment.service_request
@@ -84,7 +91,7 @@ def send_payment_receipt_email(payment):
             'current_year': timezone.now().year,
         })
         pdf_buffer = io.BytesIO()
-        pisa.CreatePDF(pdf_html, dest=pdf_buffer)
+        clients.get('pdf').CreatePDF(pdf_html, dest=pdf_buffer)
         pdf_data = pdf_buffer.getvalue()
         pdf_buffer.close()
         email.attach(f"payment_receipt_{payment.id}.pdf", pdf_data, 'application/pdf')
@@ -213,7 +220,6 @@ def register_user(request):
             # user.phone_number = form.cleaned_data['phone_number']
             # user.address = form.cleaned_data['address']
             user.save()
-            Notification.create_welcome_notification(user)
             messages.success(request, 'Registration successful! Please login to continue.')
             return redirect('core:login')
         else:
@@ -250,7 +256,6 @@ def register_mechanic(request):
             user.is_mechanic = True
             user.set_password(user_form.cleaned_data['password']) # Set password from user_form
             user.save()
-            Notification.create_welcome_notification(user)
 
             mechanic = mechanic_form.save(commit=False)
             mechanic.user = user
@@ -279,9 +284,13 @@ def register_mechanic(request):
 def create_service_request(request):
     if request.method == 'POST':
         form = ServiceRequestForm(request.POST, request.FILES)
+        # Videos and files arrive beforehand through the chunked upload API
+        uploads = finished_uploads(request.user, request.POST, form)
         if form.is_valid():
             service_request = form.save(commit=False)
             service_request.user = request.user
+            for field, upload in uploads.items():
+                setattr(service_request, field, upload.name)
 
             # If a mechanic is already assigned or found, use their coordinates for initial estimation
             # For simplicity, if no mechanic is assigned yet, we might defer full cost calculation
@@ -306,6 +315,8 @@ def create_service_request(request):
             calculated_cost = service_request.calculate_service_charge()
             service_request.estimated_cost = calculated_cost
             service_request.save() # Save again to persist estimated_cost and problem_complexity_fee
+            # The files now belong to the request
+            ChunkedUpload.objects.filter(pk__in=[upload.pk for upload in uploads.values()]).delete()
 
             Notification.create_service_request_notification(recipient=request.user, service_request=service_request)
             messages.success(request, 'Request Created Successfully — Your service request has been created successfully.')
@@ -332,13 +343,19 @@ def create_service_request(request):
     return render(request, 'service_request/create.html', context)
 
 @login_required
+@use_replica
 def dashboard(request):
     if request.user.is_mechanic:
         mechanic = get_object_or_404(Mechanic, user=request.user)
-        service_requests = ServiceRequest.objects.filter(
-            Q(mechanic=mechanic) | 
-            Q(mechanic__isnull=True, status='PENDING')
-        ).select_related('payment').order_by('-created_at')
+        # Only pending requests inside this mechanic's service radius, not the whole country
+        nearby_pending = pending_feed(mechanic, limit=5)
+        own_requests = ServiceRequest.objects.filter(
+            mechanic=mechanic
+        ).select_related('payment').order_by('-created_at')[:5]
+        service_requests = sorted(
+            list(nearby_pending.items) + list(own_requests),
+            key=lambda sr: sr.created_at, reverse=True
+        )
         
         # Calculate additional statistics
         total_services = ServiceRequest.objects.filter(mechanic=mechanic).count()
@@ -346,7 +363,7 @@ def dashboard(request):
         in_progress_services = ServiceRequest.objects.filter(mechanic=mechanic, status='IN_PROGRESS').count()
         total_earnings = Payment.objects.filter(service_request__mechanic=mechanic, payment_status='PAID').aggregate(total=Sum('mechanic_share'))['total'] or 0
         average_rating = Review.objects.filter(service_request__mechanic=mechanic).aggregate(Avg('rating'))['rating__avg'] or 0
-        pending_requests_count = ServiceRequest.objects.filter(mechanic__isnull=True, status='PENDING').count()
+        pending_requests_count = nearby_pending.total
         
 
         # Get last 30 days service trend
@@ -383,9 +400,15 @@ def dashboard(request):
             status__in=['ACCEPTED', 'IN_PROGRESS']
         ).order_by('-updated_at').first()
 
+        emergency_offers = EmergencyOffer.objects.filter(
+            mechanic=mechanic,
+            emergency_request__status='PENDING'
+        ).select_related('emergency_request')
+
         context = {
             'mechanic': mechanic,
             'service_requests': service_requests,
+            'emergency_offers': emergency_offers,
             'cash_payment_requests': cash_payment_requests,
             'total_services': total_services,
             'completed_services': completed_services,
@@ -454,33 +477,28 @@ def service_request_detail(request, pk):
         
         if request.method == 'POST':
             action = request.POST.get('action')
-            if action == 'accept' and service_request.status == 'PENDING':
-                service_request.mechanic = mechanic
-                service_request.status = 'ACCEPTED'
-                # Set mechanic's current location to service request
-                service_request.mechanic_latitude = mechanic.latitude
-                service_request.mechanic_longitude = mechanic.longitude
-                
-                # Recalculate estimated cost with actual mechanic location
-                calculated_cost = service_request.calculate_service_charge()
-                service_request.estimated_cost = calculated_cost
-                
-                service_request.save()
-                messages.success(request, 'Request Accepted Successfully — You have accepted the service request. Contact the user to confirm details.')
-                messages.info(request, (
-                    f'Updated Estimated Cost — The estimated cost is now Rs.{service_request.estimated_cost}. '
-                    f'This includes a distance fee of Rs.{(service_request.distance_km - 10) * 10 if service_request.distance_km and service_request.distance_km > 10 else 0} (for {service_request.distance_km:.2f} km) '
-                    f'and a problem complexity fee of Rs.{service_request.problem_complexity_fee}.'
-                ))
+            # Each action is a conditional UPDATE on the expected status, so
+            # when two mechanics race only one of them wins
+            if action == 'accept':
+                if transitions.accept(service_request.pk, mechanic):
+                    service_request.refresh_from_db()
+                    messages.success(request, 'Request Accepted Successfully — You have accepted the service request. Contact the user to confirm details.')
+                    messages.info(request, (
+                        f'Updated Estimated Cost — The estimated cost is now Rs.{service_request.estimated_cost}. '
+                        f'This includes a distance fee of Rs.{(service_request.distance_km - 10) * 10 if service_request.distance_km and service_request.distance_km > 10 else 0} (for {service_request.distance_km or 0:.2f} km) '
+                        f'and a problem complexity fee of Rs.{service_request.problem_complexity_fee}.'
+                    ))
+                else:
+                    messages.warning(request, 'Request Unavailable — This request has already been accepted by another mechanic.')
+                    return redirect('core:service_requests')
             
-            elif action == 'start' and service_request.status == 'ACCEPTED':
-                service_request.status = 'IN_PROGRESS'
-                service_request.save()
-                messages.success(request, 'Heading to User’s Location — You’re now marked as en route to the user’s location.')
+            elif action == 'start':
+                if transitions.start(service_request.pk, mechanic):
+                    messages.success(request, 'Heading to User’s Location — You’re now marked as en route to the user’s location.')
             
-            elif action == 'complete' and service_request.status == 'IN_PROGRESS':
-                service_request.mark_as_completed()  # This method will create the payment
-                messages.success(request, 'Service Completed Successfully — You have marked this service as completed.')
+            elif action == 'complete':
+                if transitions.complete(service_request.pk, mechanic):  # This also creates the payment
+                    messages.success(request, 'Service Completed Successfully — You have marked this service as completed.')
             
             return redirect('core:service_request_detail', pk=service_request.pk)
         
@@ -569,13 +587,7 @@ def submit_review(request, service_request_id):
 
 
 def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth's radius in kilometers
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    return R * c
+    return haversine_km(lat1, lon1, lat2, lon2)
 
 @login_required
 def find_nearby_mechanics(request, service_request_id):
@@ -669,12 +681,15 @@ def find_nearby_mechanics(request, service_request_id):
         # Tertiary fallback: attempt light geocoding for a few mechanics missing coords
         if not nearby_mechanics:
             try:
-                geolocator = Nominatim(user_agent="mechresq-app")
+                geolocator = clients.get('geocoder')
                 mechanics_missing = Mechanic.objects.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True)).exclude(workshop_address__isnull=True).exclude(workshop_address__exact='')[:5]
                 geocoded = []
                 for m in mechanics_missing:
                     try:
-                        loc = geolocator.geocode(m.workshop_address, timeout=5)
+                        # Nominatim allows about one request per second per
+                        # application; RateLimited falls through to `continue`
+                        with get_limiter('geocoding').limit():
+                            loc = geolocator.geocode(m.workshop_address, timeout=5)
                         if loc:
                             m.latitude = loc.latitude
                             m.longitude = loc.longitude
@@ -696,15 +711,9 @@ def find_nearby_mechanics(request, service_request_id):
             except Exception:
                 pass
     
-    # Initialize Google Maps client
-    gmaps = None
-    
-    # Use reverse_geocode to find nearby places
-    try:
-        nearby_places = []
-    except googlemaps.exceptions.ApiError as e:
-        # Handle API errors gracefully
-        nearby_places = []
+    # Nearby places are not looked up yet; when they are, take the Google
+    # Maps client from clients.get('googlemaps') so it is built on first use
+    nearby_places = []
 
     # Prepare mechanics data for JavaScript
     mechanics_json = json.dumps([
@@ -730,47 +739,20 @@ def find_nearby_mechanics(request, service_request_id):
 
 @login_required
 def mechanic_details(request, mechanic_id):
-    mechanic = get_object_or_404(Mechanic, pk=mechanic_id)
-    # Aggregate ratings across all reviews for this mechanic
-    agg = Review.objects.filter(service_request__mechanic=mechanic).aggregate(
-        average=Avg('rating'), total=Count('id')
-    )
-    avg_rating = round(agg['average'] or 0, 2)
-    total_reviews = agg['total'] or 0
-
-    recent_reviews_qs = (
-        Review.objects
-        .filter(service_request__mechanic=mechanic)
-        .select_related('service_request__user')
-        .order_by('-created_at')[:5]
-    )
-    recent_reviews = []
-    for r in recent_reviews_qs:
-        reviewer = r.service_request.user
-        recent_reviews.append({
-            'rating': r.rating,
-            'comment': r.comment,
-            'created_at': r.created_at.strftime('%Y-%m-%d %H:%M'),
-            'reviewer': reviewer.get_full_name() or reviewer.username,
-        })
-
-    data = {
-        'id': mechanic.id,
-        'name': mechanic.user.get_full_name() or mechanic.user.username,
-        'specialization': mechanic.specialization,
-        'experience_years': mechanic.experience_years,
-        'workshop_address': mechanic.workshop_address,
-        'available': mechanic.available,
-        'rating': float(mechanic.rating or 0),
-        'average_rating': float(avg_rating),
-        'total_reviews': total_reviews,
-        'base_fee': float(mechanic.base_fee),
-        'preferred_language': mechanic.preferred_language,
-        'recent_reviews': recent_reviews,
-    }
+    try:
+        data = mechanic_details_cache.get(mechanic_id)
+    except Mechanic.DoesNotExist:
+        raise Http404("No Mechanic matches the given query.")
     return JsonResponse(data)
 
 @login_required
+def cache_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return JsonResponse(get_cache_stats())
+
+@login_required
+@use_replica
 def service_history(request):
     if request.user.is_mechanic:
         # Get all service requests for the mechanic
@@ -895,7 +877,7 @@ def profile(request):
             
             # Activate the newly selected language
             translation.activate(user.preferred_language)
-            request.session['django_language'] = user.preferred_language
+            remember_language(request, user.preferred_language)
 
             Notification.create_profile_updated_notification(user)
             messages.success(request, 'Profile updated successfully!')
@@ -937,18 +919,58 @@ def service_requests(request):
     if not hasattr(request.user, 'mechanic'):
         return redirect('core:dashboard')
     
-    pending_requests = ServiceRequest.objects.filter(status='PENDING')
-    active_requests = ServiceRequest.objects.filter(mechanic=request.user.mechanic).exclude(status='COMPLETED')
-    pending_requests_count = pending_requests.count()
+    mechanic = request.user.mechanic
+    feed = pending_feed(mechanic)
+    active_requests = ServiceRequest.objects.filter(mechanic=mechanic).exclude(status='COMPLETED')
     
     context = {
-        'pending_requests': pending_requests,
+        'pending_requests': feed.items,
+        'pending_next_cursor': feed.next_cursor,
         'active_requests': active_requests,
-        'pending_requests_count': pending_requests_count,
+        'pending_requests_count': feed.total,
+        'service_radius_km': mechanic.service_radius_km,
+        'mechanic_has_location': mechanic.latitude is not None and mechanic.longitude is not None,
+        'feed_generated_at': timezone.now().isoformat(),
         'active_page': 'service_requests'
     }
     return render(request, 'service_requests/list.html', context)
 
+@login_required
+def pending_requests_feed(request):
+    if not hasattr(request.user, 'mechanic'):
+        return JsonResponse({'success': False, 'error': 'Not a mechanic'}, status=403)
+
+    mechanic = request.user.mechanic
+    generated_at = timezone.now()
+    try:
+        limit = int(request.GET.get('limit', PENDING_FEED_PAGE_SIZE))
+        since = parse_feed_since(request.GET.get('since'))
+        feed = pending_feed(mechanic, cursor=request.GET.get('cursor'), limit=limit, since=since)
+    except (InvalidFeedCursor, ValueError) as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'results': [
+            {
+                'id': sr.id,
+                'vehicle_type': sr.vehicle_type,
+                'issue_description': sr.issue_description[:120],
+                'location': sr.location,
+                'distance_km': sr.distance_from_mechanic_km,
+                'created_at': sr.created_at.isoformat(),
+                'requested_by': sr.user.get_full_name() or sr.user.username,
+                'detail_url': reverse('core:service_request_detail', args=[sr.id]),
+            }
+            for sr in feed.items
+        ],
+        'next_cursor': feed.next_cursor,
+        'total': feed.total,
+        'radius_km': mechanic.service_radius_km,
+        # Pass back as ?since= to fetch only requests created after this call
+        'generated_at': generated_at.isoformat(),
+    })
+
 @login_required
 def mechanic_schedule(request):
     if not request.user.is_mechanic:
@@ -980,6 +1002,7 @@ def mechanic_schedule(request):
     return render(request, 'dashboard/schedule.html', context)
 
 @login_required
+@use_replica
 def mechanic_earnings(request):
     if not request.user.is_mechanic:
         return redirect('core:dashboard')
@@ -1087,6 +1110,7 @@ def mechanic_earnings(request):
     return render(request, 'dashboard/earnings.html', context)
 
 @login_required
+@use_replica
 def mechanic_reviews(request):
     if not request.user.is_mechanic:
         return redirect('core:dashboard')
@@ -1409,14 +1433,11 @@ def assign_mechanic(request, service_request_id, mechanic_id):
         messages.error(request, 'You do not have permission to assign a mechanic to this request.')
         return redirect('core:dashboard')
 
-    if service_request.status != 'PENDING':
+    # Assign the mechanic, but keep the status as PENDING for mechanic to accept
+    if not transitions.assign(service_request.pk, mechanic, reassign=True):
         messages.warning(request, 'This service request is no longer pending.')
         return redirect('core:service_request_detail', pk=service_request_id)
-
-    # Assign the mechanic, but keep the status as PENDING for mechanic to accept
     service_request.mechanic = mechanic
-    # service_request.status remains 'PENDING'
-    service_request.save()
 
     # Notify the selected mechanic about the new service request
     Notification.create_service_request_notification(
@@ -1450,7 +1471,7 @@ def update_mechanic_location(request):
             mechanic = request.user.mechanic
             mechanic.latitude = latitude
             mechanic.longitude = longitude
-            mechanic.save()
+            mechanic.save(update_fields=['latitude', 'longitude'])
 
             # Save location to history
             LocationHistory.objects.create(
@@ -1467,7 +1488,7 @@ def update_mechanic_location(request):
             for sr in active_service_requests:
                 sr.mechanic_latitude = latitude
                 sr.mechanic_longitude = longitude
-                sr.save()
+                sr.save(update_fields=['mechanic_latitude', 'mechanic_longitude', 'updated_at'])
 
             return JsonResponse({'success': True, 'message': 'Mechanic location updated successfully.'})
         except json.JSONDecodeError:
@@ -1519,10 +1540,12 @@ def login_view(request):
                 auth_login(request, user)
                 
                 translation.activate(user.preferred_language)
-                request.session['django_language'] = user.preferred_language
+                remember_language(request, user.preferred_language)
 
-                Notification.create_welcome_notification(user)
-                messages.success(request, f"Welcome {user.get_full_name() or user.username}! — Welcome back! We’re ready to assist you.")
+                add_notice(
+                    request, f"welcome.{'mechanic' if user.is_mechanic else 'user'}",
+                    name=user.get_full_name() or user.username,
+                )
                 return redirect('core:dashboard')
             else:
                 messages.error(request, 'Invalid username or password.')
@@ -1535,6 +1558,7 @@ def login_view(request):
 from .models import LocationHistory
 
 @login_required
+@use_replica
 def get_location_history(request, mechanic_id):
     mechanic = get_object_or_404(Mechanic, pk=mechanic_id)
 
@@ -1589,11 +1613,66 @@ def custom_map_view(request):
 
 def logout_view(request):
     if request.user.is_authenticated:
-        Notification.create_logout_notification(request.user)
-        messages.success(request, "Logout Successful — You’ve logged out safely. See you again soon!")
+        # Rendered before logout() flushes the session and its language
+        add_notice(request, 'logout')
     logout(request)
     return redirect('core:login')
 
 def sos_call(request):
     phone = request.user.phone_number if request.user.is_authenticated else request.GET.get('number','')
     return render(request, 'core/sos_call.html', {'phone': phone})
+
+@login_required
+def create_emergency_request(request):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method.'}, status=405)
+    if request.user.is_mechanic:
+        return JsonResponse({'success': False, 'error': 'Mechanics cannot raise emergency requests.'}, status=403)
+    try:
+        data = json.loads(request.body)
+        latitude = float(data.get('latitude'))
+        longitude = float(data.get('longitude'))
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return JsonResponse({'success': False, 'error': 'Valid latitude and longitude are required.'}, status=400)
+
+    emergency, offers = emergency_dispatch.create_emergency_request(request.user, latitude, longitude)
+    return JsonResponse({
+        'success': True,
+        'emergency_request_id': emergency.id,
+        'offered_mechanics': len(offers),
+        'radius_km': emergency_dispatch.ring_radii()[emergency.ring],
+        'first_offer_latency_ms': emergency.first_offer_latency_ms,
+    })
+
+@login_required
+def emergency_request_status(request, emergency_id):
+    emergency = get_object_or_404(EmergencyRequest, pk=emergency_id, user=request.user)
+    # Polling doubles as the escalation timer when no background escalator runs
+    if emergency_dispatch.escalate_if_due(emergency):
+        emergency.refresh_from_db()
+    data = {
+        'success': True,
+        'status': emergency.status,
+        'radius_km': emergency_dispatch.ring_radii()[emergency.ring],
+        'offered_mechanics': emergency.offers.count(),
+        'mechanic': None,
+    }
+    if emergency.mechanic:
+        data['mechanic'] = {
+            'id': emergency.mechanic.id,
+            'name': emergency.mechanic.user.get_full_name() or emergency.mechanic.user.username,
+            'phone_number': emergency.mechanic.user.phone_number,
+            'latitude': emergency.mechanic.latitude,
+            'longitude': emergency.mechanic.longitude,
+        }
+    return JsonResponse(data)
+
+@login_required
+def accept_emergency_request(request, emergency_id):
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method.'}, status=405)
+    if not hasattr(request.user, 'mechanic'):
+        return JsonResponse({'success': False, 'error': 'Not a mechanic'}, status=403)
+    if emergency_dispatch.accept_emergency(emergency_id, request.user.mechanic):
+        return JsonResponse({'success': True, 'message': 'Emergency request accepted. Head to the user now.'})
+    return JsonResponse({'success': False, 'error': 'This emergency has already been taken or was not offered to you.'}, status=409)
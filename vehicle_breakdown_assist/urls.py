@@ -19,14 +19,16 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from core.media_views import serve_media
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", include("core.urls", namespace='core')),
     path("chatbot/", include("chatbot.urls")), # New chatbot URLs
     path("accounts/", include("allauth.urls")),
+    # Uploads are access-controlled in every environment (core.media)
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:name>", serve_media, name="media"),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)